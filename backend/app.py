@@ -1,18 +1,56 @@
 from fastapi import FastAPI, Request, UploadFile, File, Form
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
 import numpy as np
 import joblib
 import io
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
 from io import BytesIO
 import base64
-from typing import Dict, List
+import asyncio
+import functools
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import logging
+import multiprocessing
+import pathlib
+import threading
+import time
+import uuid
+import warnings
+from collections import OrderedDict
+
+from jobs import JobManager, JobStore, describe_job
+from metrics import SIZE_BUCKETS, MetricsRegistry, StageTimer, merge_timings, server_timing_header
+from model_bundle import (
+    DEFAULT_BUNDLE_DIR, BundleError, BundleModel, current_version, list_bundles, read_manifest, set_current,
+    verify_artifact
+)
+from model_registry import ModelRegistry, file_checksum, load_pipeline
+from tree_compiler import RoutedTreeModel, load_compiled_for
+from explanations import ExplanationError, explain_rows, is_explainable, top_contributions
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar uploads are optional
+    pa = None
+
+try:
+    import psutil
+except ImportError:  # Readiness then reports no memory breakdown
+    psutil = None
 
 # ===== FASTAPI APP INITIALIZATION =====
 app = FastAPI(
@@ -40,44 +78,246 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # ===== GLOBAL ML MODELS =====
-models = {}
+MODEL_FILES = {
+    'xgboost': 'ml_models/XGBoost_pipeline.pkl',
+    'catboost': 'ml_models/CatBoost_pipeline.pkl', 
+    'votingensemble': 'ml_models/VotingEnsemble_pipeline.pkl',
+    'lightgbm': 'ml_models/LightGBM_pipeline.pkl'
+}
+registry: Optional[ModelRegistry] = None
 scaler = None
 feature_names = []
 label_encoder = None
 
+# Features the server builds for every upload; bundle models pick their own
+# columns from this matrix
+SERVING_FEATURES = [
+    'period', 'planet_radius', 'depth', 'equilibrium_temp', 'insolation',
+    'impact', 'duration', 'star_radius', 'star_mass', 'star_teff', 'kepmag',
+    'planet_density_ratio', 'log_period', 'stellar_flux', 'temp_ratio'
+]
+
+# Versioned bundles written by train_models.py (<dir>/<version>/manifest.json).
+# When <dir>/CURRENT names a bundle it is served instead of MODEL_FILES, and
+# every worker polls CURRENT each SPACEEX_BUNDLE_POLL_SECONDS (0 disables) to
+# swap in a newly activated version without a restart. POST
+# /api/models/reload requires the X-Admin-Token header when
+# SPACEEX_ADMIN_TOKEN is set, and force=true to swap in a bundle that lacks
+# some of the served models.
+MODEL_BUNDLE_DIR = os.getenv("SPACEEX_MODEL_BUNDLES", DEFAULT_BUNDLE_DIR)
+BUNDLE_POLL_SECONDS = float(os.getenv("SPACEEX_BUNDLE_POLL_SECONDS", "5"))
+ADMIN_TOKEN = os.getenv("SPACEEX_ADMIN_TOKEN", "")
+active_bundle: Optional[Dict] = None  # Manifest of the bundle being served
+nan_policy: Dict[str, Tuple[str, float]] = {}  # Resolved NaN rules of the served bundle
+reload_lock = threading.Lock()
+
+# ===== SERVING CONFIGURATION =====
+# Rows per chunk when /api/predict is called with stream=true. Peak memory of a
+# streamed request is proportional to this value, not to the upload size.
+STREAM_CHUNK_ROWS = int(os.getenv("SPACEEX_STREAM_CHUNK_ROWS", "50000"))
+
+# CPU-bound stages (parsing, preprocessing, inference, plotting) run in a
+# per-model worker pool so the event loop stays free for other requests.
+# SPACEEX_INFERENCE_EXECUTOR is "thread" or "process" (spawned processes that
+# each load only the models of their pool); SPACEEX_MODEL_WORKERS overrides the
+# pool size per model, e.g. "votingensemble=1,xgboost=4".
+INFERENCE_EXECUTOR = os.getenv("SPACEEX_INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("SPACEEX_INFERENCE_WORKERS", "2"))
+
+def parse_model_workers(spec: str) -> Dict[str, int]:
+    """Parse a "model=workers,model=workers" pool size specification"""
+    workers = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, _, count = entry.partition("=")
+        workers[name.strip().lower()] = int(count)
+    return workers
+
+MODEL_WORKERS = parse_model_workers(os.getenv("SPACEEX_MODEL_WORKERS", ""))
+
+# Number of recent prediction results whose chart data (and rendered PNG, once
+# requested) are kept for /api/predict/{result_id}/plot.
+RESULT_CACHE_SIZE = int(os.getenv("SPACEEX_RESULT_CACHE_SIZE", "256"))
+
+# Memory budget (MB) of each model's row-level prediction cache; 0 disables it
+PREDICTION_CACHE_MB = float(os.getenv("SPACEEX_PREDICTION_CACHE_MB", "64"))
+
+# Score each distinct engineered feature row of a request once and copy the
+# result to its duplicates (cross-matched catalogs repeat the same objects)
+DEDUP_ROWS = os.getenv("SPACEEX_DEDUP_ROWS", "1").lower() in ("1", "true", "yes")
+
+# Models are loaded on first use. SPACEEX_PRELOAD_MODELS lists models to load
+# at startup ("all" for every model) and SPACEEX_MODEL_MEMORY_MB caps the
+# approximate resident size of loaded models (0 = unlimited); least recently
+# used models are evicted beyond it (with the process executor, whole pools are
+# retired so the budget covers the models of every pool process).
+PRELOAD_MODELS = [name.strip().lower() for name in os.getenv("SPACEEX_PRELOAD_MODELS", "").split(",") if name.strip()]
+MODEL_MEMORY_MB = float(os.getenv("SPACEEX_MODEL_MEMORY_MB", "0"))
+
+# /api/predict/object coalesces concurrent single-object requests into one
+# predict_proba call of at most MICROBATCH_MAX_SIZE rows, waiting at most
+# MICROBATCH_MAX_WAIT_MS for a batch to fill.
+MICROBATCH_MAX_SIZE = int(os.getenv("SPACEEX_MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("SPACEEX_MICROBATCH_MAX_WAIT_MS", "5"))
+
+# Background batch jobs (/api/jobs). Uploads and results live under JOBS_DIR
+# with progress in a SQLite store. Jobs are scored in their own pool of
+# JOB_WORKERS workers, so batch load cannot take over the interactive inference
+# pools. JOB_CONCURRENCY is service-wide: workers claim jobs through the shared
+# store, so `serve.py --workers N` still runs at most that many at once. A
+# running job's lease is renewed while it works; jobs whose lease runs out
+# (JOB_LEASE_SECONDS) or whose worker dies are resumed by another worker,
+# which checks for claimable jobs every JOB_POLL_SECONDS.
+JOBS_DIR = os.getenv("SPACEEX_JOBS_DIR", "jobs")
+JOB_CONCURRENCY = int(os.getenv("SPACEEX_JOB_CONCURRENCY", "1"))
+JOB_WORKERS = int(os.getenv("SPACEEX_JOB_WORKERS", "1"))
+JOB_LEASE_SECONDS = float(os.getenv("SPACEEX_JOB_LEASE_SECONDS", "60"))
+JOB_POLL_SECONDS = float(os.getenv("SPACEEX_JOB_POLL_SECONDS", "2"))
+JOB_CHUNK_ROWS = int(os.getenv("SPACEEX_JOB_CHUNK_ROWS", str(STREAM_CHUNK_ROWS)))
+JOB_RESULTS_PAGE_LIMIT = 10000
+
+# Tree ensembles compiled by `python tree_compiler.py` (ml_models/compiled/)
+# score batches of up to COMPILED_MAX_ROWS rows with the NumPy evaluator;
+# larger batches keep using the library predictor. 0 disables compiled models.
+COMPILED_MAX_ROWS = int(os.getenv("SPACEEX_COMPILED_MAX_ROWS", "64"))
+
+# Per-stage timings are always recorded for /api/metrics; with
+# SPACEEX_SERVER_TIMING=1 they are also sent to clients as a Server-Timing header.
+SERVER_TIMING = os.getenv("SPACEEX_SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+
+# Cascade served as model_type "cascade": the first (cheap) model scores every
+# row and rows whose top-class probability is below CASCADE_THRESHOLD are
+# re-scored by the second (full) model. Pick a threshold with cascade_eval.py.
+CASCADE_STAGES = tuple(
+    name.strip().lower() for name in os.getenv("SPACEEX_CASCADE_STAGES", "xgboost,votingensemble").split(",")
+)
+CASCADE_THRESHOLD = float(os.getenv("SPACEEX_CASCADE_THRESHOLD", "0.9"))
+CASCADE_MODEL = "cascade"
+
+# /api/explain returns the EXPLAIN_TOP_K largest per-feature contributions of
+# each row unless the request asks for another top_k (0 returns all features).
+# Exact TreeSHAP costs milliseconds per row on deep ensembles, so uploads are
+# limited to EXPLAIN_MAX_ROWS rows.
+EXPLAIN_TOP_K = int(os.getenv("SPACEEX_EXPLAIN_TOP_K", "5"))
+EXPLAIN_MAX_ROWS = int(os.getenv("SPACEEX_EXPLAIN_MAX_ROWS", "10000"))
+
+# Missing (NaN) feature values are routed to the models by default: tree models
+# score them natively and the others get their training fill values.
+# SPACEEX_NAN_POLICY sets another rule per column, e.g.
+# "kepmag=median,impact=0,star_mass=reject": "median" fills the training median
+# recorded in the bundle, a number fills that constant and "reject" refuses
+# uploads with missing values in the column. A bundle may carry its own
+# "nan_policy" in the manifest; this setting takes precedence over it.
+NAN_RULES = ("route", "median", "reject")
+
+def parse_nan_policy(spec: str) -> Dict[str, str]:
+    """Parse a "column=rule,column=rule" NaN policy (rule: route, median, reject or a number)"""
+    policy = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        column, _, rule = entry.partition("=")
+        rule = rule.strip().lower()
+        if rule not in NAN_RULES:
+            try:
+                float(rule)
+            except ValueError:
+                raise ValueError(f"Unknown NaN rule '{rule}' for {column.strip()}; expected one of {NAN_RULES} or a number")
+        policy[column.strip()] = rule
+    return policy
+
+NAN_POLICY = parse_nan_policy(os.getenv("SPACEEX_NAN_POLICY", ""))
+
+# Set per worker by serve.py (preload-and-fork mode)
+WORKER_ID: Optional[int] = None
+service_ready = False
+
 # ===== LOGGING SETUP =====
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Models are fed a plain float32 array in feature_names order, not a DataFrame
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+# ===== METRICS =====
+THROUGHPUT_BUCKETS = (10, 100, 1e3, 1e4, 3e4, 1e5, 3e5, 1e6, 3e6, 1e7)
+
+metrics = MetricsRegistry()
+REQUEST_DURATION = metrics.histogram(
+    "spaceex_request_duration_seconds", "HTTP request latency", ("route", "method", "status")
+)
+REQUESTS_IN_FLIGHT = metrics.gauge("spaceex_requests_in_flight", "Requests currently being served")
+REQUEST_SIZE = metrics.histogram(
+    "spaceex_request_size_bytes", "Request body size from Content-Length", ("route",), SIZE_BUCKETS
+)
+STAGE_DURATION = metrics.histogram(
+    "spaceex_stage_duration_seconds",
+    "Time per pipeline stage (parse, preprocess, predict, decode, visualize, serialize)",
+    ("stage", "model")
+)
+ROWS_PROCESSED = metrics.counter("spaceex_rows_processed_total", "Rows scored", ("model",))
+INFERENCE_SECONDS = metrics.counter(
+    "spaceex_inference_seconds_total", "Seconds spent in model inference", ("model",)
+)
+ROWS_PER_SECOND = metrics.histogram(
+    "spaceex_inference_rows_per_second", "Rows per second of each inference call", ("model",), THROUGHPUT_BUCKETS
+)
+MODEL_LOAD_DURATION = metrics.histogram(
+    "spaceex_model_load_seconds", "Time to load a model artifact", ("model",)
+)
+MODEL_READY = metrics.gauge("spaceex_model_ready", "1 if the model is loaded", ("model",))
+MODEL_RESIDENT_BYTES = metrics.gauge(
+    "spaceex_model_resident_bytes", "Approximate resident size of a loaded model", ("model",)
+)
+MODEL_LOADS = metrics.gauge("spaceex_model_loads", "Times the model has been loaded", ("model",))
+
+def record_stages(model_type: str, timings: Dict[str, float], rows: int = 0):
+    """Record stage timings of one request (or chunk) and the model's throughput"""
+    for stage, seconds in timings.items():
+        STAGE_DURATION.observe(seconds, stage=stage, model=model_type)
+    
+    predict_seconds = timings.get("predict")
+    if rows and predict_seconds:
+        ROWS_PROCESSED.inc(rows, model=model_type)
+        INFERENCE_SECONDS.inc(predict_seconds, model=model_type)
+        ROWS_PER_SECOND.observe(rows / predict_seconds, model=model_type)
+
+def set_server_timing(request: Request, timings: Dict[str, float]):
+    """Attach stage timings to the request for the Server-Timing header"""
+    request.state.timings = merge_timings(getattr(request.state, "timings", {}), timings)
+
+def update_model_gauges():
+    """Refresh per-model gauges from the registry before a scrape"""
+    for name, info in model_status().items():
+        MODEL_READY.set(1 if info["state"] == "ready" else 0, model=name)
+        MODEL_RESIDENT_BYTES.set(info["resident_bytes"] or 0, model=name)
+        MODEL_LOADS.set(info["loads"], model=name)
+
 # ===== MODEL LOADING =====
-def load_ml_models():
-    """Load trained ML models and preprocessing objects"""
-    global models, scaler, feature_names, label_encoder
+def load_ml_models(preload: Optional[List[str]] = None):
+    """Register model pipelines and load preprocessing objects
+    
+    Pipelines are loaded lazily on first use (or eagerly for `preload`, by
+    default the models listed in SPACEEX_PRELOAD_MODELS) by the model registry.
+    The parent of process pools only registers them.
+    """
+    global registry, scaler, feature_names, label_encoder, active_bundle, nan_policy
     
     try:
-        logger.info("🔄 Loading trained ML models...")
-        
-        # Load model pipelines
-        model_files = {
-            'xgboost': 'ml_models/XGBoost_pipeline.pkl',
-            'catboost': 'ml_models/CatBoost_pipeline.pkl', 
-            'votingensemble': 'ml_models/VotingEnsemble_pipeline.pkl',
-            'lightgbm': 'ml_models/LightGBM_pipeline.pkl'
-        }
-        
-        for model_name, file_path in model_files.items():
-            pipeline_data = joblib.load(file_path)
-            if isinstance(pipeline_data, tuple) and len(pipeline_data) == 2:
-                models[model_name] = pipeline_data[0]  # Extract pipeline
-            else:
-                models[model_name] = pipeline_data
+        logger.info("🔄 Registering trained ML models...")
         
         # Feature configuration
-        feature_names = [
-            'period', 'planet_radius', 'depth', 'equilibrium_temp', 'insolation',
-            'impact', 'duration', 'star_radius', 'star_mass', 'star_teff', 'kepmag',
-            'planet_density_ratio', 'log_period', 'stellar_flux', 'temp_ratio'
-        ]
+        feature_names = list(SERVING_FEATURES)
+        
+        version = current_version(MODEL_BUNDLE_DIR)
+        if version is not None:
+            registry, active_bundle = open_bundle(version)
+            logger.info(f"📦 Serving bundle {version}")
+        else:
+            registry = create_registry(MODEL_FILES, load_model_artifact)
+            active_bundle = None
+        nan_policy = resolve_nan_policy(active_bundle)
         
         # Load preprocessing objects if available
         try:
@@ -87,325 +327,2002 @@ def load_ml_models():
             label_encoder = None
             logger.info("ℹ️ No label encoder found")
         
-        logger.info(f"✅ Models loaded: {list(models.keys())}")
+        if preload is None:
+            preload = [] if models_in_pool_processes() else preload_model_names()
+        registry.preload(preload)
+        
+        logger.info(f"✅ Models available: {registry.names()} (preloaded: {preload})")
         logger.info(f"✅ Features: {len(feature_names)}")
         
     except Exception as e:
         logger.error(f"❌ Model loading failed: {e}")
         raise
 
-# ===== PREDICTION DECODING =====
-def decode_predictions(predictions, probabilities=None):
-    """Decode numerical predictions to human-readable labels"""
-    class_mapping = {
-        0: {"label": "FALSE POSITIVE", "emoji": "❌", "color": "#ff4444"},
-        1: {"label": "CANDIDATE", "emoji": "🔍", "color": "#ffa500"}, 
-        2: {"label": "CONFIRMED", "emoji": "🌍", "color": "#44ff44"}
-    }
+def create_registry(model_files: Dict[str, str], loader) -> ModelRegistry:
+    """Model registry with the serving memory budget and load listener"""
+    new_registry = ModelRegistry(
+        model_files,
+        memory_budget_bytes=int(MODEL_MEMORY_MB * 1024 * 1024),
+        loader=loader
+    )
+    new_registry.add_load_listener(functools.partial(on_model_loaded, new_registry))
+    return new_registry
+
+def open_bundle(version: str):
+    """Registry over a bundle's models after checking it against this server
+
+    Every feature must be one the server builds and every class one it can
+    decode; model files are verified against their manifest checksums when loaded.
+    """
+    bundle_dir = os.path.join(MODEL_BUNDLE_DIR, version)
+    manifest = read_manifest(bundle_dir)
+    
+    unknown = [name for name in manifest['feature_names'] if name not in SERVING_FEATURES]
+    if unknown:
+        raise BundleError(f"Bundle {version} uses features this server does not build: {unknown}")
+    codes_by_label = {info['label']: code for code, info in CLASS_MAPPING.items()}
+    labels = [manifest['class_mapping'][str(code)] for code in range(len(manifest['class_mapping']))]
+    unknown = [label for label in labels if label not in codes_by_label]
+    if unknown:
+        raise BundleError(f"Bundle {version} predicts classes this server does not serve: {unknown}")
+    class_codes = np.array([codes_by_label[label] for label in labels], dtype=np.intp)
+    
+    if 'scaler' in manifest:
+        verify_artifact(os.path.join(bundle_dir, manifest['scaler']['file']), manifest['scaler']['checksum'])
+    model_files = {name: os.path.join(bundle_dir, entry['file']) for name, entry in manifest['models'].items()}
+    checksums = {model_files[name]: entry['checksum'] for name, entry in manifest['models'].items()}
+    
+    def load_bundle_model(path: str):
+        verify_artifact(path, checksums[path])
+        return BundleModel(
+            load_model_artifact(path), manifest['feature_names'], SERVING_FEATURES, class_codes,
+            medians=manifest.get('medians')
+        )
+    
+    return create_registry(model_files, load_bundle_model), manifest
+
+def reload_models(version: Optional[str] = None, force: bool = False) -> Dict:
+    """Load a bundle next to the serving one and swap it in once its models are ready
+    
+    Without `version` the bundle named by CURRENT is loaded; an explicit
+    version also becomes CURRENT so other workers follow. A bundle that lacks
+    models being served is refused unless `force`. Requests that already hold
+    a model from the previous bundle finish with it.
+    """
+    global registry, active_bundle, nan_policy
     
-    decoded = []
-    for i, pred in enumerate(predictions):
-        class_info = class_mapping.get(pred, {"label": "UNKNOWN", "emoji": "❓", "color": "#888888"})
+    with reload_lock:
+        version = version or current_version(MODEL_BUNDLE_DIR)
+        if version is None:
+            raise BundleError("No bundle has been activated")
+        previous = active_bundle['version'] if active_bundle is not None else None
+        if version == previous:
+            return {"version": version, "previous": previous, "swapped": False, "dropped_models": []}
         
-        prediction_data = {
-            "row": i + 1,
-            "prediction": f"{class_info['emoji']} {class_info['label']}",
-            "prediction_code": pred,
-            "color": class_info['color']
-        }
+        started = time.perf_counter()
+        new_registry, manifest = open_bundle(version)
+        new_policy = resolve_nan_policy(manifest)
+        served = registry.names() if registry is not None else []
+        dropped = [name for name in served if name not in new_registry.names()]
+        if dropped and not force:
+            raise BundleError(f"Bundle {version} does not include {dropped}; reload with force to drop them")
+        if PRELOAD_MODELS == ["all"]:
+            warm = new_registry.names()
+        else:
+            warm = [
+                name for name in new_registry.names()
+                if name in PRELOAD_MODELS or model_status().get(name, {}).get('state') == "ready"
+            ]
+        # Any failure keeps the current bundle serving
+        if models_in_pool_processes():
+            # The models load in the pool processes; check their artifacts here instead
+            for name in warm:
+                verify_artifact(new_registry.model_files[name], manifest['models'][name]['checksum'])
+        else:
+            new_registry.preload(warm)
+        if current_version(MODEL_BUNDLE_DIR) != version:
+            set_current(MODEL_BUNDLE_DIR, version, force=True)  # Dropped models were checked above
         
-        # Add probabilities if available
-        if probabilities is not None and i < len(probabilities):
-            prob_array = probabilities[i]
-            prediction_data["confidence"] = float(np.max(prob_array))
-            prediction_data["probabilities"] = {
-                "false_positive": float(prob_array[0]),
-                "candidate": float(prob_array[1]), 
-                "confirmed": float(prob_array[2])
-            }
+        registry, active_bundle, nan_policy = new_registry, manifest, new_policy
+        if INFERENCE_EXECUTOR == "process":
+            retire_inference_executors()  # New pools load the bundle now named by CURRENT
+            for name in warm:
+                get_inference_executor(name)
+        update_model_gauges()
         
-        decoded.append(prediction_data)
-    
-    return decoded
+        load_seconds = time.perf_counter() - started
+        logger.info(f"🔁 Swapped bundle {previous} -> {version} ({len(warm)} models warm, {load_seconds:.1f}s)")
+        if dropped:
+            logger.info(f"⚠️ No longer serving {dropped}")
+        return {"version": version, "previous": previous, "swapped": True, "warm_models": warm,
+                "dropped_models": dropped, "load_seconds": load_seconds}
 
-def calculate_statistics(predictions):
-    """Calculate prediction statistics"""
-    prediction_codes = [pred["prediction_code"] for pred in predictions]
+bundle_watcher: Optional[asyncio.Task] = None
+
+async def watch_bundles():
+    """Swap in the bundle named by CURRENT whenever it changes"""
+    failed_version = None
+    while True:
+        await asyncio.sleep(BUNDLE_POLL_SECONDS)
+        version = current_version(MODEL_BUNDLE_DIR)
+        serving = active_bundle['version'] if active_bundle is not None else None
+        if version is None or version == serving or version == failed_version:
+            continue
+        try:
+            # Dropping models was confirmed when CURRENT was activated
+            await run_in_threadpool(reload_models, version, True)
+        except Exception as e:
+            failed_version = version  # Not retried until CURRENT changes again
+            logger.error(f"❌ Could not switch to bundle {version}: {e}")
+
+def start_bundle_watcher():
+    global bundle_watcher
+    if BUNDLE_POLL_SECONDS > 0:
+        bundle_watcher = asyncio.create_task(watch_bundles())
+
+async def stop_bundle_watcher():
+    if bundle_watcher is not None:
+        bundle_watcher.cancel()
+        try:
+            await bundle_watcher
+        except asyncio.CancelledError:
+            pass
+
+def bundle_summary(manifest: Optional[Dict]) -> Optional[Dict]:
+    """Public fields of a bundle manifest"""
+    if manifest is None:
+        return None
+    return {
+        "version": manifest['version'],
+        "created_at": manifest['created_at'],
+        "models": list(manifest['models']),
+        "feature_names": manifest['feature_names'],
+        "class_mapping": manifest['class_mapping'],
+        "training": manifest.get('training', {})
+    }
+
+def resolve_nan_policy(manifest: Optional[Dict]) -> Dict[str, Tuple[str, float]]:
+    """NaN rules per serving feature: ("fill", value) or ("reject", nan); other columns are routed"""
+    manifest = manifest or {}
+    medians = manifest.get('medians', {})
+    resolved = {}
+    for column, rule in {**manifest.get('nan_policy', {}), **NAN_POLICY}.items():
+        if column not in SERVING_FEATURES:
+            raise BundleError(f"NaN policy names unknown feature '{column}'")
+        if rule == "route":
+            continue
+        if rule == "reject":
+            resolved[column] = ("reject", np.nan)
+        elif rule == "median":
+            if column not in medians:
+                raise BundleError(f"NaN policy fills '{column}' with its median, but no training median is recorded")
+            resolved[column] = ("fill", float(medians[column]))
+        else:
+            resolved[column] = ("fill", float(rule))
+    return resolved
+
+def preload_model_names() -> List[str]:
+    """Models to load at startup (SPACEEX_PRELOAD_MODELS)"""
+    return registry.names() if PRELOAD_MODELS == ["all"] else PRELOAD_MODELS
+
+def load_model_artifact(path: str):
+    """Load a pipeline, pairing it with its compiled arrays when they are current"""
+    pipeline = load_pipeline(path)
+    if COMPILED_MAX_ROWS <= 0:
+        return pipeline
+    try:
+        compiled = load_compiled_for(path, file_checksum(path))
+    except Exception as e:
+        logger.error(f"❌ Compiled model for {path} could not be loaded: {e}")
+        return pipeline
+    if compiled is None:
+        return pipeline
+    logger.info(f"🌲 Using compiled trees for batches of up to {COMPILED_MAX_ROWS} rows ({path})")
+    return RoutedTreeModel(pipeline, compiled, COMPILED_MAX_ROWS)
+
+def on_model_loaded(source: ModelRegistry, name: str, model):
+    """Prepare per-model static artifacts once a model becomes ready"""
+    load_seconds = source.status()[name]["load_seconds"]
+    if load_seconds is not None:
+        MODEL_LOAD_DURATION.observe(load_seconds, model=name)
+    if name == 'xgboost':
+        prepare_feature_importance_panel(model)
+
+# ===== PREDICTION DECODING =====
+CLASS_MAPPING = {
+    0: {"label": "FALSE POSITIVE", "emoji": "❌", "color": "#ff4444"},
+    1: {"label": "CANDIDATE", "emoji": "🔍", "color": "#ffa500"}, 
+    2: {"label": "CONFIRMED", "emoji": "🌍", "color": "#44ff44"}
+}
+UNKNOWN_CLASS = {"label": "UNKNOWN", "emoji": "❓", "color": "#888888"}
+CLASS_KEYS = ["false_positive", "candidate", "confirmed"]
+RESPONSE_FORMATS = ("rows", "columnar")
+
+# Lookup tables indexed by class code, with UNKNOWN_CLASS in the last slot
+_CLASS_TABLE = [CLASS_MAPPING[code] for code in range(len(CLASS_MAPPING))] + [UNKNOWN_CLASS]
+_DISPLAY_LABELS = np.array([f"{info['emoji']} {info['label']}" for info in _CLASS_TABLE], dtype=object)
+_DISPLAY_COLORS = np.array([info['color'] for info in _CLASS_TABLE], dtype=object)
+
+def _class_index(codes: np.ndarray) -> np.ndarray:
+    """Map prediction codes to lookup table slots, sending unknown codes to the last one"""
+    known = (codes >= 0) & (codes < len(CLASS_MAPPING))
+    return np.where(known, codes, len(CLASS_MAPPING))
+
+def class_table() -> List[Dict]:
+    """Label/color table sent once alongside columnar responses"""
+    return [{"code": code, **info} for code, info in CLASS_MAPPING.items()]
+
+def decode_predictions(predictions, probabilities=None, row_offset=0):
+    """Decode numerical predictions to human-readable labels"""
+    codes = np.asarray(predictions, dtype=np.int64)
+    class_index = _class_index(codes)
     
-    counts = {
-        "false_positive": sum(1 for code in prediction_codes if code == 0),
-        "candidate": sum(1 for code in prediction_codes if code == 1),
-        "confirmed": sum(1 for code in prediction_codes if code == 2)
+    rows = range(row_offset + 1, row_offset + len(codes) + 1)
+    labels = _DISPLAY_LABELS[class_index].tolist()
+    colors = _DISPLAY_COLORS[class_index].tolist()
+    
+    if probabilities is None:
+        return [
+            {"row": row, "prediction": label, "prediction_code": code, "color": color}
+            for row, label, code, color in zip(rows, labels, codes.tolist(), colors)
+        ]
+    
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    confidence = probabilities.max(axis=1).tolist()
+    p_false_positive, p_candidate, p_confirmed = (probabilities[:, k].tolist() for k in range(3))
+    
+    return [
+        {
+            "row": row,
+            "prediction": label,
+            "prediction_code": code,
+            "color": color,
+            "confidence": conf,
+            "probabilities": {
+                "false_positive": fp,
+                "candidate": cand,
+                "confirmed": confirmed
+            }
+        }
+        for row, label, code, color, conf, fp, cand, confirmed in zip(
+            rows, labels, codes.tolist(), colors, confidence, p_false_positive, p_candidate, p_confirmed
+        )
+    ]
+
+def decode_predictions_columnar(predictions, probabilities=None, row_offset=0) -> Dict:
+    """Decode predictions into parallel arrays instead of per-row objects"""
+    codes = np.asarray(predictions, dtype=np.int64)
+    columns = {
+        "row_offset": row_offset,
+        "prediction_code": codes.tolist()
     }
     
-    total = len(predictions)
+    if probabilities is not None:
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        columns["confidence"] = probabilities.max(axis=1).tolist()
+        columns["p_false_positive"] = probabilities[:, 0].tolist()
+        columns["p_candidate"] = probabilities[:, 1].tolist()
+        columns["p_confirmed"] = probabilities[:, 2].tolist()
+    
+    return columns
+
+def format_predictions(predictions, probabilities=None, row_offset=0, response_format="rows"):
+    """Decode predictions in the requested response format"""
+    if response_format == "columnar":
+        return decode_predictions_columnar(predictions, probabilities, row_offset)
+    return decode_predictions(predictions, probabilities, row_offset)
+
+def count_predictions(prediction_codes) -> Dict[str, int]:
+    """Count predictions per class"""
+    codes = np.asarray(prediction_codes, dtype=np.int64)
+    counts = np.bincount(codes[_class_index(codes) < len(CLASS_MAPPING)], minlength=len(CLASS_MAPPING))
+    
+    return {key: int(counts[code]) for code, key in enumerate(CLASS_KEYS)}
+
+def calculate_statistics(prediction_codes):
+    """Calculate prediction statistics"""
+    return statistics_from_counts(count_predictions(prediction_codes), len(prediction_codes))
+
+def statistics_from_counts(counts: Dict[str, int], total: int) -> Dict:
+    """Build the statistics payload from per-class counts"""
+    denominator = total or 1  # Avoid division by zero on empty inputs
     
     return {
         "total_predictions": total,
         "false_positive_count": counts["false_positive"],
         "candidate_count": counts["candidate"],
         "confirmed_count": counts["confirmed"],
-        "false_positive_percentage": (counts["false_positive"] / total) * 100,
-        "candidate_percentage": (counts["candidate"] / total) * 100,
-        "confirmed_percentage": (counts["confirmed"] / total) * 100,
+        "false_positive_percentage": (counts["false_positive"] / denominator) * 100,
+        "candidate_percentage": (counts["candidate"] / denominator) * 100,
+        "confirmed_percentage": (counts["confirmed"] / denominator) * 100,
         "prediction_breakdown": counts
     }
 
 # ===== VISUALIZATION =====
-def create_prediction_visualization(predictions, probabilities, statistics):
-    """Create comprehensive visualization plots"""
+PLOT_LABELS = ['False Positive', 'Candidate', 'Confirmed']
+PLOT_COLORS = ['#ff4444', '#ffa500', '#44ff44']
+TOP_IMPORTANCE_FEATURES = 8
+
+# Feature importance is static per model: it is computed once the xgboost model
+# is loaded, travels with each report's chart data and its panel is rasterized
+# once by every process that draws reports.
+feature_importance_data: Optional[Dict] = None
+
+def get_feature_importances(model) -> Optional[np.ndarray]:
+    """Return feature_importances_ from a model or the final step of a pipeline"""
+    if hasattr(model, 'feature_importances_'):
+        return np.asarray(model.feature_importances_)
+    steps = getattr(model, 'steps', None)
+    if steps and hasattr(steps[-1][1], 'feature_importances_'):
+        return np.asarray(steps[-1][1].feature_importances_)
+    return None
+
+def prepare_feature_importance_panel(model):
+    """Compute the feature importance data once per model load and rasterize its panel"""
+    global feature_importance_data
+    
+    feature_importance_data = None
+    
+    importance = get_feature_importances(model)
+    names = getattr(model, 'bundle_feature_names', feature_names)
+    if importance is None or len(importance) != len(names):
+        logger.info("ℹ️ Feature importance not available for the report")
+        return
+    
+    indices = np.argsort(importance)[-TOP_IMPORTANCE_FEATURES:]
+    feature_importance_data = {
+        "features": [names[i] for i in indices],
+        "importance": importance[indices].astype(float).tolist()
+    }
+    if feature_importance_panel(feature_importance_data) is not None:
+        logger.info("✅ Feature importance panel rendered")
+
+@functools.lru_cache(maxsize=4)
+def _render_feature_importance_panel(features: tuple, importance: tuple) -> np.ndarray:
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.barh(range(len(features)), importance, color='#9c27b0', alpha=0.7)
+    ax.set_yticks(range(len(features)))
+    ax.set_yticklabels(features)
+    ax.set_xlabel('Importance')
+    ax.set_title(f'Top {len(features)} Feature Importance')
+    fig.tight_layout()
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+def feature_importance_panel(data: Optional[Dict]) -> Optional[np.ndarray]:
+    """Rasterized feature importance panel for a report's chart data (cached per process)"""
+    if not data:
+        return None
     try:
-        fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-        fig.suptitle('Exoplanet Detection Analysis', fontsize=16, fontweight='bold')
-        
-        # Plot 1: Distribution Pie Chart
-        ax1 = axes[0, 0]
-        sizes = [statistics['false_positive_count'], statistics['candidate_count'], statistics['confirmed_count']]
-        labels = ['False Positive', 'Candidate', 'Confirmed']
-        colors = ['#ff4444', '#ffa500', '#44ff44']
-        
-        if sum(sizes) > 0:
-            ax1.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-            ax1.set_title('Classification Distribution')
-        else:
-            ax1.text(0.5, 0.5, 'No Data', ha='center', va='center', fontsize=12)
-            ax1.set_title('Classification Distribution')
+        return _render_feature_importance_panel(tuple(data['features']), tuple(data['importance']))
+    except Exception as e:
+        logger.error(f"Feature importance rendering error: {e}")
+        return None
+
+def build_chart_data(probabilities, statistics) -> Dict:
+    """Collect the plain arrays behind every panel of the prediction report"""
+    chart_data = {
+        "distribution": {
+            "labels": PLOT_LABELS,
+            "counts": [statistics['false_positive_count'], statistics['candidate_count'], statistics['confirmed_count']]
+        },
+        "confidence_histogram": None,
+        "sample_probabilities": None,
+        "feature_importance": feature_importance_data
+    }
+    
+    if probabilities is not None and len(probabilities) > 0:
+        probabilities = np.asarray(probabilities)
+        counts, edges = np.histogram(np.max(probabilities, axis=1), bins=15)
+        chart_data["confidence_histogram"] = {
+            "counts": counts.tolist(),
+            "bin_edges": edges.tolist()
+        }
+        chart_data["sample_probabilities"] = probabilities[:5].tolist()
+    
+    return chart_data
+
+def render_prediction_plot(chart_data: Dict) -> bytes:
+    """Render the four-panel prediction report to PNG bytes"""
+    fig = Figure(figsize=(16, 12))
+    axes = fig.subplots(2, 2)
+    fig.suptitle('Exoplanet Detection Analysis', fontsize=16, fontweight='bold')
+    
+    # Plot 1: Distribution Pie Chart
+    ax1 = axes[0, 0]
+    sizes = chart_data['distribution']['counts']
+    
+    if sum(sizes) > 0:
+        ax1.pie(sizes, labels=PLOT_LABELS, colors=PLOT_COLORS, autopct='%1.1f%%', startangle=90)
+    else:
+        ax1.text(0.5, 0.5, 'No Data', ha='center', va='center', fontsize=12)
+    ax1.set_title('Classification Distribution')
+    
+    # Plot 2: Confidence Histogram
+    ax2 = axes[0, 1]
+    histogram = chart_data['confidence_histogram']
+    if histogram:
+        ax2.stairs(histogram['counts'], histogram['bin_edges'], fill=True, alpha=0.7, color='#4fc3f7', edgecolor='black')
+        ax2.set_xlabel('Confidence Score')
+        ax2.set_ylabel('Frequency')
+        ax2.set_title('Confidence Distribution')
+        ax2.axvline(0.8, color='red', linestyle='--', alpha=0.7, label='High Confidence')
+        ax2.legend()
+    else:
+        ax2.text(0.5, 0.5, 'No Confidence Data', ha='center', va='center', fontsize=12)
+        ax2.set_title('Confidence Distribution')
+    
+    # Plot 3: Class Probabilities
+    ax3 = axes[1, 0]
+    samples = chart_data['sample_probabilities']
+    if samples:
+        x = np.arange(len(samples))
+        width = 0.25
         
-        # Plot 2: Confidence Histogram
-        ax2 = axes[0, 1]
-        if probabilities and len(probabilities) > 0:
-            max_confidences = np.max(probabilities, axis=1)
-            ax2.hist(max_confidences, bins=15, alpha=0.7, color='#4fc3f7', edgecolor='black')
-            ax2.set_xlabel('Confidence Score')
-            ax2.set_ylabel('Frequency')
-            ax2.set_title('Confidence Distribution')
-            ax2.axvline(0.8, color='red', linestyle='--', alpha=0.7, label='High Confidence')
-            ax2.legend()
-        else:
-            ax2.text(0.5, 0.5, 'No Confidence Data', ha='center', va='center', fontsize=12)
-            ax2.set_title('Confidence Distribution')
+        for i in range(3):
+            probs = [p[i] for p in samples]
+            ax3.bar(x + i*width, probs, width, label=PLOT_LABELS[i], color=PLOT_COLORS[i], alpha=0.8)
         
-        # Plot 3: Class Probabilities
-        ax3 = axes[1, 0]
-        if probabilities and len(probabilities) > 0:
-            sample_indices = min(5, len(probabilities))
-            x = np.arange(sample_indices)
-            width = 0.25
-            
-            for i in range(3):
-                probs = [p[i] for p in probabilities[:sample_indices]]
-                ax3.bar(x + i*width, probs, width, label=labels[i], color=colors[i], alpha=0.8)
-            
-            ax3.set_xlabel('Sample Index')
-            ax3.set_ylabel('Probability')
-            ax3.set_title('Class Probabilities (First 5 Samples)')
-            ax3.legend()
-            ax3.set_xticks(x + width)
-            ax3.set_xticklabels([f'Sample {i+1}' for i in range(sample_indices)])
+        ax3.set_xlabel('Sample Index')
+        ax3.set_ylabel('Probability')
+        ax3.set_title('Class Probabilities (First 5 Samples)')
+        ax3.legend()
+        ax3.set_xticks(x + width)
+        ax3.set_xticklabels([f'Sample {i+1}' for i in range(len(samples))])
+    else:
+        ax3.text(0.5, 0.5, 'No Probability Data', ha='center', va='center', fontsize=12)
+        ax3.set_title('Class Probabilities')
+    
+    # Plot 4: Feature Importance (rasterized once per model)
+    ax4 = axes[1, 1]
+    panel = feature_importance_panel(chart_data.get('feature_importance'))
+    if panel is not None:
+        ax4.imshow(panel)
+        ax4.axis('off')
+    else:
+        ax4.text(0.5, 0.5, 'Feature Importance\nNot Available', ha='center', va='center', fontsize=12)
+        ax4.set_title('Feature Importance')
+    
+    fig.tight_layout()
+    
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight', facecolor='white')
+    png = buffer.getvalue()
+    buffer.close()
+    
+    return png
+
+def png_data_uri(png: bytes) -> str:
+    """Encode PNG bytes as an inline data URI"""
+    return f"data:image/png;base64,{base64.b64encode(png).decode()}"
+
+def create_prediction_visualization(chart_data: Dict) -> Optional[bytes]:
+    """Create comprehensive visualization plots, or None if rendering fails"""
+    try:
+        return render_prediction_plot(chart_data)
+    except Exception as e:
+        logger.error(f"Visualization error: {e}")
+        return None
+
+# ===== UPLOAD FORMATS =====
+# Extensions and leading magic bytes of the accepted upload formats. Feather v2
+# is the Arrow IPC file format, so both share the ARROW1 magic.
+UPLOAD_EXTENSIONS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.arrows': 'arrow',
+    '.ipc': 'arrow',
+    '.feather': 'feather'
+}
+UPLOAD_MAGIC = [
+    (b'PAR1', 'parquet'),
+    (b'ARROW1', 'arrow'),
+    (b'FEA1', 'feather'),
+    (b'\xff\xff\xff\xff', 'arrow')  # Arrow IPC stream continuation marker
+]
+class UploadFormatError(ValueError):
+    """Raised when an upload cannot be decoded in its detected format"""
+
+class FeatureSchemaError(UploadFormatError):
+    """Raised when an upload has no usable feature columns"""
+
+def detect_upload_format(filename: str, head: bytes) -> Optional[str]:
+    """Detect the upload format from the file extension, then from magic bytes"""
+    extension = pathlib.PurePath(filename or '').suffix.lower()
+    if extension in UPLOAD_EXTENSIONS:
+        return UPLOAD_EXTENSIONS[extension]
+    
+    for magic, upload_format in UPLOAD_MAGIC:
+        if head.startswith(magic):
+            return upload_format
+    return None
+
+def base_feature_columns() -> List[str]:
+    """Raw input columns needed to build feature_names"""
+    return [feature for feature in feature_names if feature not in ENGINEERED_FEATURES]
+
+def _projected_columns(schema_names) -> Optional[List[str]]:
+    """Columns to read from a columnar file: the base features it actually has"""
+    if not feature_names:
+        return None
+    return [column for column in base_feature_columns() if column in schema_names]
+
+def _require_pyarrow(upload_format: str):
+    if pa is None:
+        raise UploadFormatError(f"{upload_format} uploads require pyarrow to be installed")
+
+def _is_arrow_stream(source) -> bool:
+    head = source.read(6)
+    source.seek(0)
+    return head != b'ARROW1'
+
+def _read_feather_table(source):
+    """Read an Arrow IPC file / Feather file, projecting to the base features"""
+    try:
+        schema_names = ipc.open_file(source).schema.names
+    except pa.ArrowInvalid:
+        schema_names = None  # Feather v1 has no IPC footer to read the schema from
+    source.seek(0)
+    
+    if schema_names is not None:
+        return feather.read_table(source, columns=_projected_columns(schema_names), memory_map=False)
+    
+    table = feather.read_table(source, memory_map=False)
+    columns = _projected_columns(table.schema.names)
+    return table.select(columns) if columns is not None else table
+
+def read_upload_frame(source, upload_format: str) -> pd.DataFrame:
+    """Read a whole upload into a DataFrame, projecting columnar files to the base features"""
+    if upload_format == 'csv':
+        return pd.read_csv(source)
+    
+    _require_pyarrow(upload_format)
+    try:
+        if upload_format == 'parquet':
+            parquet_file = pq.ParquetFile(source)
+            columns = _projected_columns(parquet_file.schema_arrow.names)
+            table = parquet_file.read(columns=columns)
+        elif upload_format == 'arrow' and _is_arrow_stream(source):
+            reader = ipc.open_stream(source)
+            table = reader.read_all()
+            columns = _projected_columns(table.schema.names)
+            if columns is not None:
+                table = table.select(columns)
         else:
-            ax3.text(0.5, 0.5, 'No Probability Data', ha='center', va='center', fontsize=12)
-            ax3.set_title('Class Probabilities')
+            table = _read_feather_table(source)
+    except pa.ArrowException as e:
+        raise UploadFormatError(f"Invalid {upload_format} file: {e}")
+    
+    # Arrow numeric columns convert to float arrays directly, with no text parsing
+    return table.to_pandas()
+
+def iter_upload_chunks(source, upload_format: str, chunk_size: int):
+    """Yield an upload as DataFrames of at most `chunk_size` rows"""
+    if upload_format == 'csv':
+        yield from pd.read_csv(source, chunksize=chunk_size)
+        return
+    
+    _require_pyarrow(upload_format)
+    try:
+        if upload_format == 'parquet':
+            parquet_file = pq.ParquetFile(source)
+            columns = _projected_columns(parquet_file.schema_arrow.names)
+            for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+                yield batch.to_pandas()
+            return
         
-        # Plot 4: Feature Importance (if available)
-        ax4 = axes[1, 1]
-        if 'xgboost' in models and hasattr(models['xgboost'], 'feature_importances_'):
-            importance = models['xgboost'].feature_importances_
-            if len(importance) == len(feature_names):
-                top_features = 8
-                indices = np.argsort(importance)[-top_features:]
-                
-                ax4.barh(range(top_features), importance[indices], color='#9c27b0', alpha=0.7)
-                ax4.set_yticks(range(top_features))
-                ax4.set_yticklabels([feature_names[i] for i in indices])
-                ax4.set_xlabel('Importance')
-                ax4.set_title(f'Top {top_features} Feature Importance')
-            else:
-                ax4.text(0.5, 0.5, 'Feature Dimension Mismatch', ha='center', va='center', fontsize=12)
-                ax4.set_title('Feature Importance')
+        if upload_format == 'arrow' and _is_arrow_stream(source):
+            reader = ipc.open_stream(source)
+            batches = iter(reader)
         else:
-            ax4.text(0.5, 0.5, 'Feature Importance\nNot Available', ha='center', va='center', fontsize=12)
-            ax4.set_title('Feature Importance')
-        
-        plt.tight_layout()
-        
-        # Convert to base64
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight', facecolor='white')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode()
-        buffer.close()
-        plt.close()
+            try:
+                reader = ipc.open_file(source)
+            except pa.ArrowInvalid:
+                reader = None  # Feather v1 has no record batches
+            if reader is not None:
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
         
-        return f"data:image/png;base64,{image_base64}"
-        
-    except Exception as e:
-        logger.error(f"Visualization error: {e}")
-        return ""
+        if reader is not None:
+            columns = _projected_columns(reader.schema.names)
+            for batch in batches:
+                if columns is not None:
+                    batch = batch.select(columns)
+                for offset in range(0, batch.num_rows, chunk_size):
+                    yield batch.slice(offset, chunk_size).to_pandas()
+            return
+    except pa.ArrowException as e:
+        raise UploadFormatError(f"Invalid {upload_format} file: {e}")
+    
+    # Feather v1: read it whole and slice
+    source.seek(0)
+    df = read_upload_frame(source, upload_format)
+    for offset in range(0, len(df), chunk_size):
+        yield df.iloc[offset:offset + chunk_size]
 
 # ===== FEATURE ENGINEERING =====
-def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Apply feature engineering transformations"""
-    df = df.copy()
+# Engineered features: (input columns, formula). Formulas get float64 arrays
+# and their result is stored straight into the float32 feature matrix.
+FEATURE_DEFINITIONS = {
+    'planet_density_ratio': (('planet_radius', 'star_radius'), lambda radius, star_radius: radius / (star_radius + 1e-6)),
+    'log_period': (('period',), np.log1p),
+    'stellar_flux': (('insolation', 'star_radius'), lambda insolation, star_radius: insolation / (star_radius ** 2 + 1e-6)),
+    'temp_ratio': (('equilibrium_temp', 'star_teff'), lambda temp, star_teff: temp / (star_teff + 1e-6))
+}
+ENGINEERED_FEATURES = list(FEATURE_DEFINITIONS)
+
+def validate_feature_schema(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Check an upload's columns once and return its base feature columns as float64 arrays
     
-    # Create engineered features
-    if all(col in df.columns for col in ['planet_radius', 'star_radius']):
-        df['planet_density_ratio'] = df['planet_radius'] / (df['star_radius'] + 1e-6)
+    Absent columns are simply left out (they become NaN features). Columns that
+    hold values which are not numbers are rejected instead of guessed at.
+    """
+    base_columns = base_feature_columns()
+    present = [column for column in base_columns if column in df.columns]
+    if not present:
+        raise FeatureSchemaError(f"No feature columns found; expected some of {base_columns}")
     
-    if 'period' in df.columns:
-        df['log_period'] = np.log1p(df['period'])
+    values = {}
+    for column in present:
+        series = df[column]
+        if not pd.api.types.is_numeric_dtype(series):
+            converted = pd.to_numeric(series, errors='coerce')
+            invalid = converted.isna() & series.notna()
+            if invalid.any():
+                raise FeatureSchemaError(
+                    f"Column '{column}' has non-numeric values (first: {series[invalid].iloc[0]!r})"
+                )
+            series = converted
+        values[column] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values
+
+def build_feature_matrix(df: pd.DataFrame) -> np.ndarray:
+    """Build the model input as one C-contiguous float32 array in feature_names order
     
-    if all(col in df.columns for col in ['insolation', 'star_radius']):
-        df['stellar_flux'] = df['insolation'] / (df['star_radius'] ** 2 + 1e-6)
+    Missing values per column:
+    - base feature absent from the upload or empty in a row: NaN
+    - engineered feature: NaN when any of its inputs is NaN
+    - any non-finite result (overflow, log of a negative period): NaN
+    Columns with a NaN policy rule are then filled or rejected; the remaining
+    NaNs are routed natively by the tree models, and models that cannot take
+    them are given their training fill values instead (see impute_missing).
+    """
+    inputs = validate_feature_schema(df)
+    features = np.empty((len(df), len(feature_names)), dtype=np.float32)
     
-    if all(col in df.columns for col in ['equilibrium_temp', 'star_teff']):
-        df['temp_ratio'] = df['equilibrium_temp'] / (df['star_teff'] + 1e-6)
+    with np.errstate(all='ignore'):
+        for position, feature in enumerate(feature_names):
+            if feature in FEATURE_DEFINITIONS:
+                columns, formula = FEATURE_DEFINITIONS[feature]
+                if all(column in inputs for column in columns):
+                    features[:, position] = formula(*(inputs[column] for column in columns))
+                else:
+                    features[:, position] = np.nan
+            else:
+                features[:, position] = inputs.get(feature, np.nan)
     
-    return df
+    features[np.isinf(features)] = np.nan
+    apply_nan_policy(features)
+    return features
+
+def apply_nan_policy(features: np.ndarray):
+    """Fill or reject NaNs in place for the columns with a NaN policy rule"""
+    for position, feature in enumerate(feature_names):
+        rule = nan_policy.get(feature)
+        if rule is None:
+            continue
+        missing = np.isnan(features[:, position])
+        if not missing.any():
+            continue
+        action, value = rule
+        if action == "reject":
+            raise FeatureSchemaError(
+                f"Column '{feature}' has {int(missing.sum())} missing values (first in row {int(np.argmax(missing))})"
+            )
+        features[missing, position] = value
 
-def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
+def preprocess_data(df: pd.DataFrame) -> np.ndarray:
     """Preprocess input data for prediction"""
-    df_engineered = engineer_features(df)
-    
     if feature_names:
-        # Ensure all required features are present
-        for feature in feature_names:
-            if feature not in df_engineered.columns:
-                df_engineered[feature] = 0.0  # Fill missing features
-        
-        return df_engineered[feature_names]
-    else:
-        # Fallback: use numerical columns
-        numerical_cols = df_engineered.select_dtypes(include=[np.number]).columns
-        return df_engineered[numerical_cols].fillna(0)
+        return build_feature_matrix(df)
+    
+    # Fallback: use numerical columns
+    numerical = df.select_dtypes(include=[np.number])
+    return np.ascontiguousarray(numerical.fillna(0).to_numpy(dtype=np.float32))
+
+# NaN replacement per (model, artifact version): None when the model accepts NaN natively.
+# Probed on the first request with missing values, never at load time: serve.py
+# loads models in the parent before forking, and running a model there would start
+# the libraries' OpenMP thread pools, which deadlock in forked children.
+missing_value_fills: Dict[tuple, Optional[np.ndarray]] = {}
+
+def missing_value_fill(model) -> Optional[np.ndarray]:
+    """Values that replace NaN inputs of a model, or None to pass NaNs through
+    
+    Bundles that record the training medians are filled with them, as in
+    training; otherwise NaNs are kept for models that score them natively and
+    replaced with training means for the others.
+    """
+    if isinstance(model, BundleModel):
+        medians = model.feature_medians(len(feature_names))
+        if medians is not None:
+            return medians
+    
+    probe = np.full((1, len(feature_names)), np.nan, dtype=np.float32)
+    try:
+        model.predict_proba(probe)
+        return None
+    except Exception:
+        pass
+    
+    if isinstance(model, BundleModel):
+        means = model.feature_means(len(feature_names))
+        return means if means is not None else np.zeros(len(feature_names), dtype=np.float32)
+    
+    steps = getattr(model, 'steps', None)
+    mean = getattr(steps[0][1], 'mean_', None) if steps else None
+    if mean is not None and len(mean) == len(feature_names):
+        return np.asarray(mean, dtype=np.float32)
+    return np.zeros(len(feature_names), dtype=np.float32)
+
+def impute_missing(model_type: str, version: Optional[str], model, features: np.ndarray) -> np.ndarray:
+    """Replace NaNs with the model's training fill values (see missing_value_fill)"""
+    missing = np.isnan(features)
+    if not missing.any():
+        return features
+    key = (model_type, version)
+    if key not in missing_value_fills:
+        missing_value_fills[key] = missing_value_fill(model)
+        if missing_value_fills[key] is not None:
+            logger.info(f"ℹ️ NaN inputs of {model_type} are replaced with training values")
+    fill = missing_value_fills[key]
+    if fill is None or features.shape[1] != len(fill):
+        return features
+    return np.where(missing, fill, features)
 
 # ===== PREDICTION LOGIC =====
-def make_predictions(model, features: pd.DataFrame) -> Dict:
+def probabilities_to_predictions(model, probabilities: np.ndarray) -> Dict:
+    """Derive class predictions and confidences from class probabilities"""
+    # One pass: the predicted class is the argmax of the probabilities
+    best = np.argmax(probabilities, axis=1)
+    classes = getattr(model, 'classes_', None)
+    predictions = np.asarray(classes)[best] if classes is not None else best
+    
+    return {
+        'predictions': predictions,
+        'probabilities': probabilities,
+        'confidence_scores': probabilities[np.arange(len(best)), best]
+    }
+
+def make_predictions(model, features: np.ndarray) -> Dict:
     """Generate predictions using trained model"""
     try:
-        predictions = model.predict(features)
-        
         if hasattr(model, 'predict_proba'):
-            probabilities = model.predict_proba(features)
-            confidence_scores = np.max(probabilities, axis=1)
+            return probabilities_to_predictions(model, model.predict_proba(features))
         else:
+            predictions = np.asarray(model.predict(features))
             probabilities = None
-            confidence_scores = np.ones(len(predictions)) * 0.5
+            confidence_scores = np.full(len(predictions), 0.5)
         
         return {
-            'predictions': predictions.tolist(),
-            'probabilities': probabilities.tolist() if probabilities is not None else None,
-            'confidence_scores': confidence_scores.tolist()
+            'predictions': predictions,
+            'probabilities': probabilities,
+            'confidence_scores': confidence_scores
         }
     
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         n_samples = len(features)
         return {
-            'predictions': [1] * n_samples,  # Default to candidate
+            'predictions': np.ones(n_samples, dtype=np.int64),  # Default to candidate
             'probabilities': None,
-            'confidence_scores': [0.5] * n_samples
+            'confidence_scores': np.full(n_samples, 0.5)
         }
 
-# ===== FASTAPI ROUTES =====
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application on startup"""
-    load_ml_models()
+# ===== PREDICTION CACHE =====
+class PredictionCache:
+    """Per-model LRU cache of class probabilities keyed by engineered feature rows
+    
+    Keys are 128-bit content hashes of each row of the feature matrix, so the
+    same object submitted in different catalogs is only scored once. Entries
+    are tied to the model artifact version and dropped when it changes.
+    """
+    
+    # Rough per-entry footprint: key tuple, probability tuple and dict slot
+    ENTRY_BYTES = 360
+    
+    def __init__(self, max_bytes: int):
+        self.max_entries = max(1, int(max_bytes) // self.ENTRY_BYTES)
+        self.version = None
+        self.entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+    
+    def lookup(self, keys: List[tuple], version: str) -> List[Optional[tuple]]:
+        """Return cached probabilities per key (None for misses)"""
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            
+            found = []
+            for key in keys:
+                value = self.entries.get(key)
+                if value is not None:
+                    self.entries.move_to_end(key)
+                found.append(value)
+            
+            hit_count = sum(value is not None for value in found)
+            self.hits += hit_count
+            self.misses += len(keys) - hit_count
+            return found
+    
+    def store(self, keys: List[tuple], probabilities: np.ndarray, version: str):
+        """Insert freshly scored rows, evicting the least recently used ones"""
+        with self.lock:
+            if version != self.version:
+                return
+            for key, row in zip(keys, probabilities.tolist()):
+                self.entries[key] = tuple(row)
+                self.entries.move_to_end(key)
+            overflow = max(0, len(self.entries) - self.max_entries)
+            for _ in range(overflow):
+                self.entries.popitem(last=False)
+            self.evictions += overflow
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self.lock:
+            self.entries.clear()
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current occupancy"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "approx_bytes": len(self.entries) * self.ENTRY_BYTES,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "model_version": self.version
+            }
 
-@app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    """Serve homepage"""
-    return templates.TemplateResponse("index.html", {"request": request})
+prediction_caches: Dict[str, PredictionCache] = {}
+prediction_caches_lock = threading.Lock()
 
-@app.get("/predict", response_class=HTMLResponse)
-async def predict_page(request: Request):
-    """Serve prediction page"""
-    return templates.TemplateResponse("predict.html", {"request": request})
+def get_prediction_cache(model_type: str) -> Optional[PredictionCache]:
+    """Return the model's prediction cache, or None when caching is disabled"""
+    if PREDICTION_CACHE_MB <= 0:
+        return None
+    with prediction_caches_lock:
+        cache = prediction_caches.get(model_type)
+        if cache is None:
+            cache = PredictionCache(PREDICTION_CACHE_MB * 1024 * 1024)
+            prediction_caches[model_type] = cache
+        return cache
 
-@app.post("/api/predict")
-async def predict_exoplanets(
-    model_type: str = Form(...),
-    file: UploadFile = File(...)
-):
-    """Main prediction endpoint"""
-    # Validate file type
-    if not file.filename.lower().endswith('.csv'):
-        return JSONResponse(
-            {"error": "Please upload a CSV file"}, 
-            status_code=400
-        )
+def feature_row_hashes(features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Two independent vectorized 64-bit content hashes of every feature row"""
+    frame = pd.DataFrame(features, copy=False)
+    low = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    high = pd.util.hash_pandas_object(frame, index=False, hash_key="spaceex-cache-02").to_numpy()
+    return low, high
+
+def hash_feature_rows(features: np.ndarray) -> List[tuple]:
+    """128-bit content hash of every feature row, built from two vectorized 64-bit hashes"""
+    low, high = feature_row_hashes(features)
+    return list(zip(low.tolist(), high.tolist()))
+
+def unique_feature_rows(low: np.ndarray, high: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """First row of each distinct 128-bit row hash and, per row, the index of its distinct row"""
+    # Hash-table factorization of the low half; codes follow first appearance
+    inverse, _ = pd.factorize(low)
+    _, first = np.unique(inverse, return_index=True)
+    if np.array_equal(high[first][inverse], high):
+        return first, inverse
+    # A 64-bit collision: fall back to sorting on the full 128-bit hashes
+    _, first, inverse = np.unique(np.column_stack([low, high]), axis=0, return_index=True, return_inverse=True)
+    return first, inverse.ravel()
+
+def dedup_ratio(rows: int, unique_rows: int) -> float:
+    """Share of rows that duplicated an earlier row and were not scored again"""
+    return 1 - unique_rows / rows if rows else 0.0
+
+def uncached_results(prediction_results: Dict, rows: int) -> Dict:
+    """Prediction results of rows that were all scored by the model"""
+    return {**prediction_results, 'cache_hits': 0, 'cached': np.zeros(rows, dtype=bool), 'unique_rows': rows}
+
+def predict_with_cache(model_type: str, features: np.ndarray) -> Dict:
+    """make_predictions that only sends distinct, uncached rows to the model"""
+    models = registry  # One registry for the whole call, even if a reload swaps it meanwhile
+    model = models.get(model_type)
+    version = models.version(model_type) or ""
+    features = impute_missing(model_type, version, model, features)
+    cache = get_prediction_cache(model_type)
+    if (cache is None and not DEDUP_ROWS) or not hasattr(model, 'predict_proba') or len(features) == 0:
+        return uncached_results(make_predictions(model, features), len(features))
     
-    try:
-        # Read and validate CSV
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-        
-        logger.info(f"📊 Processing {file.filename}: {df.shape[0]} rows, {df.shape[1]} columns")
-        
-        # Validate models
-        if not models:
-            return JSONResponse(
-                {"error": "ML models not loaded"}, 
-                status_code=500
-            )
-        
-        if model_type not in models:
-            return JSONResponse(
-                {"error": f"Model '{model_type}' not available"}, 
-                status_code=400
-            )
-        
-        # Preprocess and predict
-        processed_features = preprocess_data(df)
-        model = models[model_type]
-        prediction_results = make_predictions(model, processed_features)
-        
-        # Decode and analyze results
-        decoded_predictions = decode_predictions(
-            prediction_results['predictions'],
-            prediction_results['probabilities']
-        )
-        
-        statistics = calculate_statistics(decoded_predictions)
-        
-        # Generate visualization
-        plot_image = create_prediction_visualization(
-            decoded_predictions,
-            np.array(prediction_results['probabilities']) if prediction_results['probabilities'] else None,
-            statistics
-        )
-        
-        # Prepare response
-        model_display_names = {
-            'xgboost': 'XGBoost',
-            'catboost': 'CatBoost', 
-            'votingensemble': 'Voting Ensemble',
-            'lightgbm': 'LightGBM'
-        }
-        
-        response_data = {
-            "model_used": model_display_names.get(model_type, model_type),
-            "is_real_prediction": True,
-            "file_info": {
-                "filename": file.filename,
-                "rows_processed": len(df),
-                "features_used": len(processed_features.columns)
-            },
-            "predictions": decoded_predictions,
-            "statistics": statistics,
-            "visualizations": {
-                "prediction_plot": plot_image
-            },
-            "message": f"Analysis complete: {statistics['confirmed_count']} confirmed, {statistics['candidate_count']} candidates, {statistics['false_positive_count']} false positives."
-        }
-        
+    low, high = feature_row_hashes(features)
+    if DEDUP_ROWS:
+        first, inverse = unique_feature_rows(low, high)
+        low, high = low[first], high[first]
+    else:
+        first = inverse = np.arange(len(features))
+    keys = list(zip(low.tolist(), high.tolist()))
+    
+    cached = cache.lookup(keys, version) if cache is not None else [None] * len(keys)
+    hit_rows = [i for i, value in enumerate(cached) if value is not None]
+    missing = [i for i, value in enumerate(cached) if value is None]
+    
+    if missing:
+        miss_results = make_predictions(model, features[first[missing]])
+        if miss_results['probabilities'] is None:
+            # The model failed; return its fallback for every row without caching
+            return uncached_results(make_predictions(model, features), len(features))
+        miss_probabilities = np.asarray(miss_results['probabilities'], dtype=np.float64)
+        if cache is not None:
+            cache.store([keys[i] for i in missing], miss_probabilities, version)
+    
+    # Merge cached and freshly scored distinct rows, then scatter them to every row
+    n_classes = len(cached[hit_rows[0]]) if hit_rows else miss_probabilities.shape[1]
+    probabilities = np.empty((len(keys), n_classes), dtype=np.float64)
+    if hit_rows:
+        probabilities[hit_rows] = [cached[i] for i in hit_rows]
+    if missing:
+        probabilities[missing] = miss_probabilities
+    hit = np.zeros(len(keys), dtype=bool)
+    hit[hit_rows] = True
+    
+    return {
+        **probabilities_to_predictions(model, probabilities[inverse]),
+        'cache_hits': int(np.count_nonzero(hit[inverse])),
+        'cached': hit[inverse],  # Rows whose probabilities came from the cache
+        'unique_rows': len(keys)
+    }
+
+def predict_cascade(features: np.ndarray, first: str, second: str, threshold: float) -> Dict:
+    """Score every row with `first` and only its low-confidence rows with `second`"""
+    results = predict_with_cache(first, features)
+    escalated = results['confidence_scores'] < threshold
+    if results['probabilities'] is None:
+        escalated[:] = True  # The first stage failed; the full model scores everything
+    
+    rows = np.flatnonzero(escalated)
+    if len(rows) == 0:
+        return {**results, 'escalated': escalated}
+    
+    second_results = predict_with_cache(second, features[rows])
+    models = registry
+    first_model = models.get(first)
+    same_classes = np.array_equal(
+        getattr(first_model, 'classes_', None), getattr(models.get(second), 'classes_', None)
+    )
+    if results['probabilities'] is None or second_results['probabilities'] is None or not same_classes:
+        if len(rows) < len(features):
+            second_results = predict_with_cache(second, features)
+        return {**second_results, 'escalated': np.ones(len(features), dtype=bool)}
+    
+    probabilities = results['probabilities'].copy()
+    probabilities[rows] = second_results['probabilities']
+    # A row is a cache hit only if every stage that scored it was served from the cache
+    cached = results['cached'].copy()
+    cached[rows] &= second_results['cached']
+    return {
+        **probabilities_to_predictions(first_model, probabilities),
+        'cache_hits': int(np.count_nonzero(cached)),
+        'cached': cached,
+        'unique_rows': results['unique_rows'],
+        'escalated': escalated
+    }
+
+def predict_rows(model_type: str, features: np.ndarray) -> Dict:
+    """Score a feature matrix with a registered model or the cascade"""
+    if model_type == CASCADE_MODEL:
+        first, second = CASCADE_STAGES
+        return predict_cascade(features, first, second, CASCADE_THRESHOLD)
+    return predict_with_cache(model_type, features)
+
+def escalated_count(prediction_results: Dict) -> Optional[int]:
+    """Rows sent to the second cascade stage, None for plain models"""
+    escalated = prediction_results.get('escalated')
+    return int(np.count_nonzero(escalated)) if escalated is not None else None
+
+def cascade_summary(rows: int, escalated: int) -> Dict:
+    """Escalation report included in cascade responses"""
+    return {
+        "first_stage": CASCADE_STAGES[0],
+        "second_stage": CASCADE_STAGES[1],
+        "threshold": CASCADE_THRESHOLD,
+        "escalated_rows": escalated,
+        "escalation_rate": escalated / rows if rows else 0.0
+    }
+
+# ===== INFERENCE WORKER POOL =====
+# With the process executor the models live only in the pool processes: each
+# one loads the models of the pool it serves and returns a report of its
+# registry with every result. The parent answers /api/models, /api/ready,
+# /api/health and the model gauges from those reports and keeps the models of
+# all pool processes within SPACEEX_MODEL_MEMORY_MB by retiring the least
+# recently used pool. Prediction caches live in the pool processes too: the
+# reports carry their stats and DELETE /api/cache bumps a generation that each
+# process checks before its next task. The xgboost feature importances reported
+# by one pool are passed on to the others for their prediction reports.
+inference_executors: Dict[str, Executor] = {}
+INFERENCE_POOL: Optional[str] = None  # Pool served by this process (set in pool processes)
+worker_reports: Dict[str, Dict[int, Dict]] = {}  # pool -> pid -> latest report
+pool_last_used: Dict[str, float] = {}
+pool_lock = threading.Lock()
+cache_generation = 0  # Parent: bumped on every cache clear; pool process: last one applied
+
+def models_in_pool_processes() -> bool:
+    """True in the parent of process pools, which never loads models itself"""
+    return INFERENCE_EXECUTOR == "process" and INFERENCE_POOL is None
+
+def pool_models(pool: str) -> List[str]:
+    """Models a pool loads when its processes start"""
+    if pool == CASCADE_MODEL:
+        return list(CASCADE_STAGES)
+    if pool == JOB_POOL:
+        return []  # Job models load on their first chunk
+    return [pool]
+
+def _init_inference_worker(pool: str):
+    """Load the models of one pool inside a freshly spawned inference process"""
+    global INFERENCE_POOL
+    INFERENCE_POOL = pool
+    load_ml_models(preload=pool_models(pool))
+
+def worker_report() -> Dict:
+    """Registry state of this inference process, sent back to the parent"""
+    return {
+        "pid": os.getpid(),
+        "models": registry.status(),
+        "caches": {name: cache.stats() for name, cache in prediction_caches.items()},
+        "feature_importance": feature_importance_data if registry.is_ready('xgboost') else None
+    }
+
+def parent_state() -> Dict:
+    """Parent state a pool process applies before each task"""
+    return {"cache_generation": cache_generation, "feature_importance": feature_importance_data}
+
+def apply_parent_state(state: Dict):
+    global cache_generation, feature_importance_data
+    if state['cache_generation'] != cache_generation:
+        for cache in list(prediction_caches.values()):
+            cache.clear()
+        cache_generation = state['cache_generation']
+    if not registry.is_ready('xgboost'):
+        feature_importance_data = state['feature_importance']
+
+def _run_in_worker(call, state: Dict) -> Dict:
+    """Run a pool task and return its result together with this process' report"""
+    apply_parent_state(state)
+    result = call()
+    return {"result": result, "report": worker_report()}
+
+def record_worker_report(pool: str, executor: Executor, report: Dict):
+    """Keep the latest report of a pool process unless its pool was retired meanwhile"""
+    global feature_importance_data
+    with pool_lock:
+        if inference_executors.get(pool) is not executor:
+            return
+        worker_reports.setdefault(pool, {})[report['pid']] = report
+        if report['feature_importance'] is not None:
+            feature_importance_data = report['feature_importance']
+    enforce_pool_memory_budget(keep=pool)
+
+def _record_started_worker(pool: str, executor: Executor, future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(f"❌ Inference process for {pool} failed to start: {error}")
+        return
+    record_worker_report(pool, executor, future.result())
+
+def pool_resident_bytes(reports: Dict[int, Dict]) -> int:
+    return sum(
+        info['resident_bytes'] or 0
+        for report in reports.values() for info in report['models'].values() if info['state'] == "ready"
+    )
+
+def enforce_pool_memory_budget(keep: str):
+    """Retire least recently used pools while their processes hold more than the model budget"""
+    budget = int(MODEL_MEMORY_MB * 1024 * 1024)
+    if budget <= 0:
+        return
+    while True:
+        with pool_lock:
+            resident = {pool: pool_resident_bytes(reports) for pool, reports in worker_reports.items()}
+            victims = sorted(
+                (pool for pool, size in resident.items() if pool != keep and size > 0),
+                key=lambda pool: pool_last_used.get(pool, 0.0)
+            )
+        if sum(resident.values()) <= budget or not victims:
+            return
+        logger.info(f"♻️ Retiring the {victims[0]} pool to keep models within {MODEL_MEMORY_MB:.0f} MB")
+        retire_inference_executor(victims[0])
+
+def model_status() -> Dict[str, Dict]:
+    """Registry status of every model, merged over the pool processes in process mode
+    
+    A model is ready when at least one pool process holds it; resident bytes,
+    loads and evictions are summed over those processes.
+    """
+    if registry is None:
+        return {}
+    status = registry.status()
+    if not models_in_pool_processes():
+        return status
+    
+    with pool_lock:
+        reports = [report for reports in worker_reports.values() for report in reports.values()]
+    for name, info in status.items():
+        entries = [report['models'][name] for report in reports if name in report['models']]
+        loaded = [entry for entry in entries if entry['state'] == "ready"]
+        failed = [entry for entry in entries if entry['state'] == "failed"]
+        info["processes"] = len(loaded)
+        if loaded:
+            info.update(
+                state="ready",
+                version=loaded[0]['version'],
+                load_seconds=max(entry['load_seconds'] or 0.0 for entry in loaded),
+                resident_bytes=sum(entry['resident_bytes'] or 0 for entry in loaded),
+                last_used=max(entry['last_used'] or 0.0 for entry in loaded)
+            )
+        elif failed:
+            info.update(state="failed", error=failed[0]['error'])
+        info["loads"] = sum(entry['loads'] for entry in entries)
+        info["evictions"] = sum(entry['evictions'] for entry in entries)
+    return status
+
+def merge_cache_stats(stats: List[Dict]) -> Dict:
+    """Prediction cache stats of one model summed over the processes holding a cache"""
+    merged = {
+        key: sum(entry[key] for entry in stats)
+        for key in ("entries", "max_entries", "approx_bytes", "hits", "misses", "evictions")
+    }
+    lookups = merged["hits"] + merged["misses"]
+    merged["hit_rate"] = merged["hits"] / lookups if lookups else 0.0
+    merged["model_version"] = next((entry["model_version"] for entry in stats if entry["model_version"]), None)
+    merged["processes"] = len(stats)
+    return merged
+
+def cache_stats() -> Dict[str, Dict]:
+    """Prediction cache stats per model, merged over the pool processes in process mode"""
+    if not models_in_pool_processes():
+        return {name: cache.stats() for name, cache in prediction_caches.items()}
+    by_model: Dict[str, List[Dict]] = {}
+    with pool_lock:
+        for reports in worker_reports.values():
+            for report in reports.values():
+                for name, stats in report['caches'].items():
+                    by_model.setdefault(name, []).append(stats)
+    return {name: merge_cache_stats(stats) for name, stats in by_model.items()}
+
+def clear_caches():
+    """Drop every cached prediction, in the pool processes on their next task"""
+    global cache_generation
+    for cache in list(prediction_caches.values()):
+        cache.clear()
+    with pool_lock:
+        cache_generation += 1
+        for reports in worker_reports.values():
+            for report in reports.values():
+                report['caches'] = {}
+
+def loaded_model_bytes(status: Dict[str, Dict]) -> int:
+    return sum(info['resident_bytes'] or 0 for info in status.values() if info['state'] == "ready")
+
+def pools_holding(name: str) -> List[str]:
+    """Pools with a process that has the model loaded"""
+    with pool_lock:
+        return [
+            pool for pool in inference_executors
+            if pool == name or any(
+                report['models'].get(name, {}).get('state') == "ready"
+                for report in worker_reports.get(pool, {}).values()
+            )
+        ]
+
+def load_model_in_process(name: str):
+    """Load a model in the calling pool process"""
+    registry.get(name)
+
+def get_inference_executor(model_type: str, workers: Optional[int] = None) -> Executor:
+    """Return the worker pool dedicated to a model, creating it on first use"""
+    executor = inference_executors.get(model_type)
+    if executor is None:
+        if workers is None:
+            workers = MODEL_WORKERS.get(model_type, INFERENCE_WORKERS)
+        if INFERENCE_EXECUTOR == "process":
+            # Spawned, not forked: a pool process holds only the models of its pool
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_inference_worker,
+                initargs=(model_type,)
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"infer-{model_type}")
+        inference_executors[model_type] = executor
+        logger.info(f"🧵 Started {INFERENCE_EXECUTOR} pool for {model_type} with {workers} workers")
+        if INFERENCE_EXECUTOR == "process":
+            # Start every process now so each loads its models before its first request
+            for _ in range(workers):
+                executor.submit(worker_report).add_done_callback(
+                    functools.partial(_record_started_worker, model_type, executor)
+                )
+    pool_last_used[model_type] = time.time()
+    return executor
+
+async def run_in_inference_pool(model_type: str, func, *args, workers: Optional[int] = None, **kwargs):
+    """Run a CPU-bound function in the model's pool and await its result"""
+    loop = asyncio.get_running_loop()
+    executor = get_inference_executor(model_type, workers)
+    call = functools.partial(func, *args, **kwargs)
+    if INFERENCE_EXECUTOR != "process":
+        return await loop.run_in_executor(executor, call)
+    
+    outcome = await loop.run_in_executor(executor, _run_in_worker, call, parent_state())
+    record_worker_report(model_type, executor, outcome['report'])
+    return outcome['result']
+
+def start_preloaded_pools():
+    """Start the pools of SPACEEX_PRELOAD_MODELS so their processes load them now"""
+    for name in preload_model_names():
+        get_inference_executor(name)
+
+def retire_inference_executor(pool: str) -> bool:
+    """Replace one pool on next use; its queued and running work still completes"""
+    with pool_lock:
+        executor = inference_executors.pop(pool, None)
+        worker_reports.pop(pool, None)
+    if executor is None:
+        return False
+    executor.shutdown(wait=False)
+    return True
+
+def retire_inference_executors():
+    """Replace the pools on next use; queued and running work still completes"""
+    for pool in list(inference_executors):
+        retire_inference_executor(pool)
+
+def shutdown_inference_executors():
+    """Stop all inference pools, waiting for queued work to finish"""
+    for executor in inference_executors.values():
+        executor.shutdown(wait=True)
+    inference_executors.clear()
+    worker_reports.clear()
+
+def run_prediction_pipeline(model_type: str, contents: bytes, include_plot: bool = True,
+                            response_format: str = "rows", upload_format: str = "csv") -> Dict:
+    """Parse, preprocess, score and plot one upload inside the inference pool"""
+    timer = StageTimer()
+    with timer.stage("parse"):
+        df = read_upload_frame(io.BytesIO(contents), upload_format)
+    
+    logger.info(f"📊 Processing upload: {df.shape[0]} rows, {df.shape[1]} columns")
+    
+    # Preprocess and predict
+    with timer.stage("preprocess"):
+        processed_features = preprocess_data(df)
+    with timer.stage("predict"):
+        prediction_results = predict_rows(model_type, processed_features)
+    
+    # Decode and analyze results
+    with timer.stage("decode"):
+        decoded_predictions = format_predictions(
+            prediction_results['predictions'],
+            prediction_results['probabilities'],
+            response_format=response_format
+        )
+        statistics = calculate_statistics(prediction_results['predictions'])
+    
+    # Chart data is cheap; the PNG is only rendered when the client asks for it
+    with timer.stage("visualize"):
+        chart_data = build_chart_data(prediction_results['probabilities'], statistics)
+        plot_png = create_prediction_visualization(chart_data) if include_plot else None
+    
+    return {
+        "rows_processed": len(df),
+        "features_used": processed_features.shape[1],
+        "cache_hits": prediction_results['cache_hits'],
+        "unique_rows": prediction_results['unique_rows'],
+        "escalated": escalated_count(prediction_results),
+        "predictions": decoded_predictions,
+        "statistics": statistics,
+        "chart_data": chart_data,
+        "plot_png": plot_png,
+        "timings": timer.timings
+    }
+
+def score_chunk(model_type: str, chunk: pd.DataFrame, row_offset: int, response_format: str = "rows") -> Dict:
+    """Preprocess and score one streamed chunk inside the inference pool"""
+    timer = StageTimer()
+    with timer.stage("preprocess"):
+        processed_features = preprocess_data(chunk)
+    with timer.stage("predict"):
+        prediction_results = predict_rows(model_type, processed_features)
+    
+    with timer.stage("decode"):
+        decoded_predictions = format_predictions(
+            prediction_results['predictions'],
+            prediction_results['probabilities'],
+            row_offset=row_offset,
+            response_format=response_format
+        )
+        counts = count_predictions(prediction_results['predictions'])
+    
+    return {
+        "features_used": processed_features.shape[1],
+        "cache_hits": prediction_results['cache_hits'],
+        "unique_rows": prediction_results['unique_rows'],
+        "escalated": escalated_count(prediction_results),
+        "predictions": decoded_predictions,
+        "counts": counts,
+        "timings": timer.timings
+    }
+
+# ===== EXPLANATIONS =====
+def run_explain_pipeline(model_type: str, contents: bytes, upload_format: str, top_k: int) -> Dict:
+    """Parse an upload and attribute each row's predicted class to its features"""
+    models = registry  # Model and fill values from the same bundle
+    model = models.get(model_type)
+    if not is_explainable(model):
+        raise ExplanationError(
+            f"Model '{model_type}' has no native tree contributions; use an XGBoost, LightGBM or CatBoost model"
+        )
+    
+    timer = StageTimer()
+    with timer.stage("parse"):
+        df = read_upload_frame(io.BytesIO(contents), upload_format)
+    if len(df) > EXPLAIN_MAX_ROWS:
+        raise ExplanationError(f"Uploads to /api/explain are limited to {EXPLAIN_MAX_ROWS} rows, got {len(df)}")
+    with timer.stage("preprocess"):
+        features = preprocess_data(df)
+    
+    features = impute_missing(model_type, models.version(model_type) or "", model, features)
+    with timer.stage("explain"):
+        explanation = explain_rows(model, features, getattr(model, 'bundle_feature_names', feature_names))
+        contributions = top_contributions(explanation, top_k)
+    
+    with timer.stage("decode"):
+        codes = np.asarray(explanation['classes'], dtype=np.int64)
+        labels = _DISPLAY_LABELS[_class_index(codes)].tolist()
+        explanations = [
+            {
+                "row": row,
+                "prediction": label,
+                "prediction_code": code,
+                "base_value": base,
+                "margin": margin,
+                **row_contributions
+            }
+            for row, label, code, base, margin, row_contributions in zip(
+                range(1, len(codes) + 1), labels, codes.tolist(),
+                explanation['base_values'].tolist(), explanation['margins'].tolist(), contributions
+            )
+        ]
+    
+    return {
+        "rows_processed": len(df),
+        "feature_names": explanation['feature_names'],
+        "explanations": explanations,
+        "timings": timer.timings
+    }
+
+# ===== MODEL COMPARISON =====
+COMPARE_DISAGREEMENT_ROWS = 100  # Row indices listed in the comparison response
+
+def parse_model_list(models: Optional[str]) -> List[str]:
+    """Comma-separated model names, defaulting to every available model"""
+    if not models:
+        return registry.names() if registry is not None else []
+    names = [name.strip().lower() for name in models.split(",") if name.strip()]
+    return list(dict.fromkeys(names))  # Drop duplicates, keep order
+
+def prepare_comparison_features(contents: bytes, upload_format: str) -> Dict:
+    """Parse an upload and engineer its features once for every compared model"""
+    timer = StageTimer()
+    with timer.stage("parse"):
+        df = read_upload_frame(io.BytesIO(contents), upload_format)
+    logger.info(f"📊 Processing upload for comparison: {df.shape[0]} rows, {df.shape[1]} columns")
+    with timer.stage("preprocess"):
+        features = preprocess_data(df)
+    return {"features": features, "timings": timer.timings}
+
+def score_features(model_type: str, features: np.ndarray) -> Dict:
+    """Score a shared feature matrix inside the model's pool, timing inference only"""
+    started = time.perf_counter()
+    prediction_results = predict_rows(model_type, features)
+    prediction_results['timings'] = {"predict": time.perf_counter() - started}
+    return prediction_results
+
+def compare_predictions(codes_by_model: Dict[str, np.ndarray]) -> Dict:
+    """Agreement between models on the same rows"""
+    names = list(codes_by_model)
+    codes = np.vstack([np.asarray(codes_by_model[name], dtype=np.int64) for name in names])
+    total = codes.shape[1]
+    
+    unanimous = np.all(codes == codes[0], axis=0)
+    disagreeing_rows = np.flatnonzero(~unanimous)
+    
+    pairwise = {}
+    for i, first in enumerate(names):
+        for j in range(i + 1, len(names)):
+            agree = int(np.count_nonzero(codes[i] == codes[j]))
+            pairwise[f"{first}/{names[j]}"] = {
+                "agree": agree,
+                "disagree": total - agree,
+                "agreement_rate": agree / total if total else 1.0
+            }
+    
+    return {
+        "total_rows": total,
+        "unanimous_count": int(np.count_nonzero(unanimous)),
+        "disagreement_count": int(len(disagreeing_rows)),
+        "agreement_rate": float(np.mean(unanimous)) if total else 1.0,
+        "disagreeing_rows": disagreeing_rows[:COMPARE_DISAGREEMENT_ROWS].tolist(),
+        "pairwise": pairwise
+    }
+
+# ===== MICRO-BATCHING =====
+class CandidateObject(BaseModel):
+    """One object with the base columns of merged_unified_dataset.csv"""
+    period: Optional[float] = None
+    planet_radius: Optional[float] = None
+    depth: Optional[float] = None
+    equilibrium_temp: Optional[float] = None
+    insolation: Optional[float] = None
+    impact: Optional[float] = None
+    duration: Optional[float] = None
+    star_radius: Optional[float] = None
+    star_mass: Optional[float] = None
+    star_teff: Optional[float] = None
+    kepmag: Optional[float] = None
+
+def score_records(model_type: str, records: List[Dict]) -> Dict:
+    """Score a micro-batch of single objects inside the inference pool"""
+    timer = StageTimer()
+    with timer.stage("preprocess"):
+        df = pd.DataFrame.from_records(records, columns=list(CandidateObject.model_fields)).astype(np.float64)
+        features = preprocess_data(df)
+    with timer.stage("predict"):
+        prediction_results = predict_rows(model_type, features)
+    
+    with timer.stage("decode"):
+        decoded = decode_predictions(prediction_results['predictions'], prediction_results['probabilities'])
+        escalated = prediction_results.get('escalated')
+        for i, prediction in enumerate(decoded):
+            del prediction['row']
+            if escalated is not None:
+                prediction['escalated'] = bool(escalated[i])
+    return {"predictions": decoded, "timings": timer.timings}
+
+class MicroBatcher:
+    """Coalesce concurrent single-object requests into batched model calls
+    
+    Requests are queued and a background task drains them into batches of at
+    most `max_batch_size`, waiting no longer than `max_wait` seconds after the
+    first request of a batch. At most one batch per pool worker is in flight, so
+    requests that arrive while the model is busy join the next, larger batch.
+    """
+    
+    def __init__(self, model_type: str, max_batch_size: int, max_wait: float, max_in_flight: int):
+        self.model_type = model_type
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.dispatches = set()
+        self.batches = 0
+        self.objects = 0
+        self.task = asyncio.create_task(self._collect())
+    
+    async def submit(self, record: Dict) -> Dict:
+        """Queue one object and wait for its prediction"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+    
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await self.in_flight.acquire()
+            # Pick up anything that queued while waiting for a free worker
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            
+            dispatch = asyncio.create_task(self._dispatch(batch))
+            self.dispatches.add(dispatch)
+            dispatch.add_done_callback(self.dispatches.discard)
+    
+    async def _dispatch(self, batch: List[tuple]):
+        records = [record for record, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            scored = await run_in_inference_pool(self.model_type, score_records, self.model_type, records)
+            record_stages(self.model_type, scored['timings'], len(records))
+            for future, result in zip(futures, scored['predictions']):
+                if not future.done():
+                    future.set_result({**result, "batch_size": len(batch)})
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.batches += 1
+            self.objects += len(batch)
+            self.in_flight.release()
+    
+    async def stop(self):
+        """Cancel the collector and fail any request still queued"""
+        self.task.cancel()
+        while not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+micro_batchers: Dict[str, MicroBatcher] = {}
+
+def get_micro_batcher(model_type: str) -> MicroBatcher:
+    """Return the model's micro-batcher, starting it on first use"""
+    batcher = micro_batchers.get(model_type)
+    if batcher is None:
+        batcher = MicroBatcher(
+            model_type,
+            MICROBATCH_MAX_SIZE,
+            MICROBATCH_MAX_WAIT_MS / 1000,
+            MODEL_WORKERS.get(model_type, INFERENCE_WORKERS)
+        )
+        micro_batchers[model_type] = batcher
+    return batcher
+
+async def stop_micro_batchers():
+    """Stop every running micro-batcher"""
+    for batcher in micro_batchers.values():
+        await batcher.stop()
+    micro_batchers.clear()
+
+# ===== RESULT STORE =====
+prediction_result_store: "OrderedDict[str, Dict]" = OrderedDict()
+result_store_lock = threading.Lock()
+
+def store_prediction_result(chart_data: Dict, plot_png: Optional[bytes] = None) -> str:
+    """Keep a result's chart data for deferred plotting and return its id"""
+    result_id = uuid.uuid4().hex
+    with result_store_lock:
+        prediction_result_store[result_id] = {"chart_data": chart_data, "plot_png": plot_png}
+        while len(prediction_result_store) > RESULT_CACHE_SIZE:
+            prediction_result_store.popitem(last=False)
+    return result_id
+
+def get_prediction_result(result_id: str) -> Optional[Dict]:
+    """Look up a stored result, marking it as recently used"""
+    with result_store_lock:
+        entry = prediction_result_store.get(result_id)
+        if entry is not None:
+            prediction_result_store.move_to_end(result_id)
+        return entry
+
+def cache_prediction_plot(result_id: str, plot_png: bytes):
+    """Remember the rendered PNG of a stored result"""
+    with result_store_lock:
+        entry = prediction_result_store.get(result_id)
+        if entry is not None:
+            entry["plot_png"] = plot_png
+
+# ===== BATCH JOBS =====
+job_manager: Optional[JobManager] = None
+JOB_POOL = "jobs"
+
+def iter_job_chunks(path: str, upload_format: str, chunk_size: int):
+    """Yield the chunks of a stored job upload"""
+    with open(path, 'rb') as source:
+        yield from iter_upload_chunks(source, upload_format, chunk_size)
+
+def count_upload_rows(path: str, upload_format: str) -> Optional[int]:
+    """Row count of a stored upload, read from metadata where the format has it"""
+    try:
+        if upload_format == 'csv':
+            with open(path, 'rb') as f:
+                newlines = sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    newlines += 1
+            return max(0, newlines - 1)  # Header line
+        if pa is None:
+            return None
+        if upload_format == 'parquet':
+            return pq.ParquetFile(path).metadata.num_rows
+        # Arrow IPC / Feather v2: memory-mapped batches are counted without copying
+        with pa.memory_map(path) as source:
+            reader = ipc.open_file(source)
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    except Exception:
+        return None
+
+async def score_job_chunk(model_type: str, chunk: pd.DataFrame, row_offset: int) -> Dict:
+    """Score one job chunk in the dedicated job pool"""
+    scored = await run_in_inference_pool(JOB_POOL, score_chunk, model_type, chunk, row_offset, workers=JOB_WORKERS)
+    record_stages(model_type, scored['timings'], len(chunk))
+    return scored
+
+def open_job_store() -> JobStore:
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    return JobStore(os.path.join(JOBS_DIR, "jobs.sqlite3"))
+
+def start_job_manager():
+    """Open the job store and start claiming queued and interrupted jobs"""
+    global job_manager
+    job_manager = JobManager(
+        open_job_store(),
+        JOBS_DIR,
+        JOB_CONCURRENCY,
+        iter_chunks=iter_job_chunks,
+        score_chunk=score_job_chunk,
+        summarize=statistics_from_counts,
+        lease_seconds=JOB_LEASE_SECONDS,
+        poll_seconds=JOB_POLL_SECONDS
+    )
+    job_manager.start()
+
+def requeue_worker_jobs(pid: int) -> List[str]:
+    """Put the running jobs of a dead worker back in the queue (called by serve.py)"""
+    store = open_job_store()
+    try:
+        return store.requeue_owned(pid)
+    finally:
+        store.close()
+
+async def stop_job_manager():
+    """Pause running jobs; they go back to the queue and resume from their last chunk"""
+    if job_manager is not None:
+        await job_manager.stop()
+        job_manager.store.close()
+
+def create_job(model_type: str, filename: str, upload_format: str, source, chunk_size: int) -> Dict:
+    """Store an upload as a new job and record its row count (blocking I/O)"""
+    job = job_manager.create_job(model_type, filename, upload_format, source, chunk_size)
+    total_rows = count_upload_rows(job['input_path'], upload_format)
+    if total_rows is not None:
+        job_manager.store.update(job['id'], total_rows=total_rows)
+    return job_manager.store.get(job['id'])
+
+# ===== RESPONSE HELPERS =====
+MODEL_DISPLAY_NAMES = {
+    'xgboost': 'XGBoost',
+    'catboost': 'CatBoost', 
+    'votingensemble': 'Voting Ensemble',
+    'lightgbm': 'LightGBM'
+}
+MODEL_DISPLAY_NAMES[CASCADE_MODEL] = " → ".join(
+    MODEL_DISPLAY_NAMES.get(name, name) for name in CASCADE_STAGES
+) + " cascade"
+
+def validate_model_type(model_type: str, allow_cascade: bool = True) -> Optional[JSONResponse]:
+    """Return an error response if the requested model cannot be used"""
+    if registry is None or not registry.names():
+        return JSONResponse(
+            {"error": "ML models not loaded"}, 
+            status_code=500
+        )
+    
+    if model_type == CASCADE_MODEL and allow_cascade:
+        if len(CASCADE_STAGES) != 2 or not all(stage in registry for stage in CASCADE_STAGES):
+            return JSONResponse(
+                {"error": f"Cascade needs the models {list(CASCADE_STAGES)}"}, 
+                status_code=400
+            )
+        return None
+    
+    if model_type not in registry:
+        return JSONResponse(
+            {"error": f"Model '{model_type}' not available"}, 
+            status_code=400
+        )
+    
+    return None
+
+def summary_message(statistics: Dict) -> str:
+    """Human-readable one-line summary of the prediction statistics"""
+    return (
+        f"Analysis complete: {statistics['confirmed_count']} confirmed, "
+        f"{statistics['candidate_count']} candidates, "
+        f"{statistics['false_positive_count']} false positives."
+    )
+
+# ===== STREAMING PREDICTION =====
+async def stream_predictions(model_type: str, file: UploadFile, chunk_size: int, response_format: str = "rows",
+                             upload_format: str = "csv"):
+    """Score an upload chunk by chunk and stream the results as NDJSON
+    
+    The upload is read straight from the spooled request file in blocks of
+    `chunk_size` rows, so neither the raw bytes nor the full DataFrame are ever
+    held in memory. Each chunk is emitted as one JSON line; the final line holds
+    the aggregated statistics.
+    """
+    error_response = validate_model_type(model_type)
+    if error_response is not None:
+        return error_response
+    
+    if chunk_size <= 0:
+        return JSONResponse({"error": "chunk_size must be a positive integer"}, status_code=400)
+    
+    try:
+        reader = iter_upload_chunks(file.file, upload_format, chunk_size)
+        first_chunk = await run_in_threadpool(next, reader, None)
+    except pd.errors.EmptyDataError:
+        return JSONResponse({"error": "CSV file is empty"}, status_code=400)
+    except pd.errors.ParserError:
+        return JSONResponse({"error": "Invalid CSV format"}, status_code=400)
+    except UploadFormatError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    
+    if first_chunk is None:
+        return JSONResponse({"error": "Uploaded file is empty"}, status_code=400)
+    
+    logger.info(f"📊 Streaming {file.filename} in chunks of {chunk_size} rows")
+    
+    return StreamingResponse(
+        iter_prediction_chunks(reader, first_chunk, model_type, file.filename, response_format),
+        media_type="application/x-ndjson"
+    )
+
+async def iter_prediction_chunks(reader, first_chunk: pd.DataFrame, model_type: str, filename: str,
+                                 response_format: str = "rows"):
+    """Yield one NDJSON line per scored chunk followed by a summary line"""
+    counts = {"false_positive": 0, "candidate": 0, "confirmed": 0}
+    rows_processed = 0
+    features_used = 0
+    cache_hits = 0
+    unique_rows = 0
+    escalated = 0
+    chunk = first_chunk
+    chunk_index = 0
+    
+    try:
+        while chunk is not None:
+            scored = await run_in_inference_pool(
+                model_type, score_chunk, model_type, chunk, rows_processed, response_format
+            )
+            record_stages(model_type, scored['timings'], len(chunk))
+            features_used = scored['features_used']
+            cache_hits += scored['cache_hits']
+            unique_rows += scored['unique_rows']
+            escalated += scored['escalated'] or 0
+            for label, count in scored['counts'].items():
+                counts[label] += count
+            rows_processed += len(chunk)
+            
+            started = time.perf_counter()
+            line = json.dumps({"chunk": chunk_index, "predictions": scored['predictions']}) + "\n"
+            record_stages(model_type, {"serialize": time.perf_counter() - started})
+            yield line
+            
+            chunk_index += 1
+            started = time.perf_counter()
+            chunk = await run_in_threadpool(next, reader, None)
+            record_stages(model_type, {"parse": time.perf_counter() - started})
+    except pd.errors.ParserError:
+        yield json.dumps({"error": "Invalid CSV format", "rows_processed": rows_processed}) + "\n"
+        return
+    except UploadFormatError as e:
+        yield json.dumps({"error": str(e), "rows_processed": rows_processed}) + "\n"
+        return
+    except Exception as e:
+        logger.error(f"Streaming prediction failed: {e}")
+        yield json.dumps({"error": f"Processing error: {str(e)}", "rows_processed": rows_processed}) + "\n"
+        return
+    
+    statistics = statistics_from_counts(counts, rows_processed)
+    logger.info(f"✅ Streamed prediction complete: {rows_processed} rows in {chunk_index} chunks")
+    
+    summary = {
+        "model_used": MODEL_DISPLAY_NAMES.get(model_type, model_type),
+        "is_real_prediction": True,
+        "file_info": {
+            "filename": filename,
+            "rows_processed": rows_processed,
+            "features_used": features_used,
+            "cache_hits": cache_hits,
+            "unique_rows": unique_rows,  # Rows are deduplicated within each chunk
+            "dedup_ratio": dedup_ratio(rows_processed, unique_rows),
+            "chunks": chunk_index
+        },
+        "statistics": statistics,
+        "message": summary_message(statistics)
+    }
+    if model_type == CASCADE_MODEL:
+        summary["cascade"] = cascade_summary(rows_processed, escalated)
+    if response_format == "columnar":
+        summary["class_mapping"] = class_table()
+    
+    yield json.dumps(summary) + "\n"
+
+# ===== FASTAPI ROUTES =====
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Request latency, size and in-flight metrics plus the optional Server-Timing header
+    
+    Latency is recorded once the last chunk of the body has been sent, so
+    streamed (NDJSON) responses are timed to the end of the stream.
+    """
+    started = time.perf_counter()
+    with REQUESTS_IN_FLIGHT.track():
+        response = await call_next(request)
+    
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        REQUEST_SIZE.observe(int(content_length), route=route_path)
+    
+    if SERVER_TIMING:
+        # Headers leave before a streamed body, so "total" is the time to the first byte
+        timings = {**getattr(request.state, "timings", {}), "total": time.perf_counter() - started}
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    
+    body = response.body_iterator
+    
+    async def timed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started, route=route_path, method=request.method, status=response.status_code
+            )
+    
+    response.body_iterator = timed_body()
+    return response
+
+@app.on_event("startup")
+async def startup_event():
+    """Initialize application on startup"""
+    global service_ready
+    if registry is None:  # Already loaded when forked from a preloading parent
+        load_ml_models()
+    if models_in_pool_processes():
+        start_preloaded_pools()
+    start_job_manager()
+    start_bundle_watcher()
+    service_ready = True
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker pools on shutdown"""
+    await stop_bundle_watcher()
+    await stop_micro_batchers()
+    await stop_job_manager()
+    shutdown_inference_executors()
+
+@app.get("/", response_class=HTMLResponse)
+async def home(request: Request):
+    """Serve homepage"""
+    return templates.TemplateResponse("index.html", {"request": request})
+
+@app.get("/predict", response_class=HTMLResponse)
+async def predict_page(request: Request):
+    """Serve prediction page"""
+    return templates.TemplateResponse("predict.html", {"request": request})
+
+@app.post("/api/predict")
+async def predict_exoplanets(
+    request: Request,
+    model_type: str = Form(...),
+    file: UploadFile = File(...),
+    stream: bool = Form(False),
+    chunk_size: Optional[int] = Form(None),
+    include_plot: bool = Form(True),
+    response_format: str = Form("rows", alias="format")
+):
+    """Main prediction endpoint"""
+    # Validate file type from the extension or the leading magic bytes
+    head = await file.read(8)
+    await file.seek(0)
+    upload_format = detect_upload_format(file.filename, head)
+    if upload_format is None:
+        return JSONResponse(
+            {"error": "Please upload a CSV, Parquet, Arrow IPC or Feather file"}, 
+            status_code=400
+        )
+    
+    if response_format not in RESPONSE_FORMATS:
+        return JSONResponse(
+            {"error": f"Unknown format '{response_format}', expected one of {list(RESPONSE_FORMATS)}"},
+            status_code=400
+        )
+    
+    if stream:
+        return await stream_predictions(
+            model_type, file, chunk_size or STREAM_CHUNK_ROWS, response_format, upload_format
+        )
+    
+    # Validate models
+    error_response = validate_model_type(model_type)
+    if error_response is not None:
+        return error_response
+    
+    try:
+        # Parsing, inference and plotting are CPU-bound: hand them to the
+        # model's worker pool so the event loop keeps serving other requests
+        contents = await file.read()
+        logger.info(f"📊 Received {file.filename}: {len(contents)} bytes")
+        result = await run_in_inference_pool(
+            model_type, run_prediction_pipeline, model_type, contents, include_plot, response_format, upload_format
+        )
+        statistics = result['statistics']
+        result_id = store_prediction_result(result['chart_data'], result['plot_png'])
+        
+        if include_plot:
+            visualizations = {
+                "prediction_plot": png_data_uri(result['plot_png']) if result['plot_png'] else ""
+            }
+        else:
+            visualizations = {"chart_data": result['chart_data']}
+        visualizations["plot_url"] = f"/api/predict/{result_id}/plot"
+        
+        # Prepare response
+        response_data = {
+            "result_id": result_id,
+            "model_used": MODEL_DISPLAY_NAMES.get(model_type, model_type),
+            "is_real_prediction": True,
+            "file_info": {
+                "filename": file.filename,
+                "format": upload_format,
+                "rows_processed": result['rows_processed'],
+                "features_used": result['features_used'],
+                "cache_hits": result['cache_hits'],
+                "unique_rows": result['unique_rows'],
+                "dedup_ratio": dedup_ratio(result['rows_processed'], result['unique_rows'])
+            },
+            "predictions": result['predictions'],
+            "statistics": statistics,
+            "visualizations": visualizations,
+            "message": summary_message(statistics)
+        }
+        if model_type == CASCADE_MODEL:
+            response_data["cascade"] = cascade_summary(result['rows_processed'], result['escalated'])
+        if response_format == "columnar":
+            response_data["class_mapping"] = class_table()
+        
+        timings = result['timings']
+        started = time.perf_counter()
+        response = JSONResponse(response_data)
+        timings["serialize"] = time.perf_counter() - started
+        record_stages(model_type, timings, result['rows_processed'])
+        set_server_timing(request, timings)
+        
         logger.info(f"✅ Prediction complete: {statistics['confirmed_count']} confirmed exoplanets")
-        return response_data
+        return response
         
     except pd.errors.EmptyDataError:
         return JSONResponse({"error": "CSV file is empty"}, status_code=400)
     except pd.errors.ParserError:
         return JSONResponse({"error": "Invalid CSV format"}, status_code=400)
+    except UploadFormatError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
     except Exception as e:
         logger.error(f"Prediction failed: {e}")
         return JSONResponse(
@@ -413,26 +2330,436 @@ async def predict_exoplanets(
             status_code=500
         )
 
+@app.post("/api/predict/object")
+async def predict_object(candidate: CandidateObject, model_type: str = "xgboost"):
+    """Low-latency prediction for a single JSON object"""
+    error_response = validate_model_type(model_type)
+    if error_response is not None:
+        return error_response
+    
+    try:
+        prediction = await get_micro_batcher(model_type).submit(candidate.model_dump())
+    except Exception as e:
+        logger.error(f"Object prediction failed: {e}")
+        return JSONResponse(
+            {"error": f"Processing error: {str(e)}"}, 
+            status_code=500
+        )
+    
+    return {
+        "model_used": MODEL_DISPLAY_NAMES.get(model_type, model_type),
+        "is_real_prediction": True,
+        **prediction
+    }
+
+@app.post("/api/predict/compare")
+async def compare_models(
+    request: Request,
+    file: UploadFile = File(...),
+    models: Optional[str] = Form(None),
+    response_format: str = Form("rows", alias="format")
+):
+    """Score one upload with several models on a shared feature matrix"""
+    head = await file.read(8)
+    await file.seek(0)
+    upload_format = detect_upload_format(file.filename, head)
+    if upload_format is None:
+        return JSONResponse(
+            {"error": "Please upload a CSV, Parquet, Arrow IPC or Feather file"}, 
+            status_code=400
+        )
+    
+    if response_format not in RESPONSE_FORMATS:
+        return JSONResponse(
+            {"error": f"Unknown format '{response_format}', expected one of {list(RESPONSE_FORMATS)}"},
+            status_code=400
+        )
+    
+    model_types = parse_model_list(models)
+    if not model_types:
+        return JSONResponse({"error": "ML models not loaded"}, status_code=500)
+    for model_type in model_types:
+        error_response = validate_model_type(model_type)
+        if error_response is not None:
+            return error_response
+    
+    try:
+        contents = await file.read()
+        logger.info(f"📊 Received {file.filename} for comparison of {model_types}: {len(contents)} bytes")
+        
+        started = time.perf_counter()
+        prepared = await run_in_threadpool(prepare_comparison_features, contents, upload_format)
+        features = prepared['features']
+        preprocessing_ms = (time.perf_counter() - started) * 1000
+        record_stages("", prepared['timings'])  # Shared by every compared model
+        
+        # Each model runs in its own pool, so the models score concurrently
+        scored = await asyncio.gather(*[
+            run_in_inference_pool(model_type, score_features, model_type, features)
+            for model_type in model_types
+        ])
+        
+        results = {}
+        for model_type, prediction_results in zip(model_types, scored):
+            record_stages(model_type, prediction_results['timings'], len(features))
+            results[model_type] = {
+                "model_used": MODEL_DISPLAY_NAMES.get(model_type, model_type),
+                "inference_ms": prediction_results['timings']['predict'] * 1000,
+                "cache_hits": prediction_results['cache_hits'],
+                "unique_rows": prediction_results['unique_rows'],
+                "statistics": calculate_statistics(prediction_results['predictions']),
+                "predictions": format_predictions(
+                    prediction_results['predictions'],
+                    prediction_results['probabilities'],
+                    response_format=response_format
+                )
+            }
+            if model_type == CASCADE_MODEL:
+                results[model_type]["cascade"] = cascade_summary(len(features), escalated_count(prediction_results))
+        agreement = compare_predictions(
+            {model_type: prediction_results['predictions'] for model_type, prediction_results in zip(model_types, scored)}
+        )
+        
+        response_data = {
+            "is_real_prediction": True,
+            "file_info": {
+                "filename": file.filename,
+                "format": upload_format,
+                "rows_processed": len(features),
+                "features_used": features.shape[1]
+            },
+            "timings": {
+                "preprocessing_ms": preprocessing_ms,
+                "inference_ms": {model_type: results[model_type]["inference_ms"] for model_type in model_types},
+                "total_ms": (time.perf_counter() - started) * 1000
+            },
+            "models": results,
+            "agreement": agreement,
+            "message": (
+                f"Compared {len(model_types)} models on {agreement['total_rows']} rows: "
+                f"{agreement['unanimous_count']} unanimous, {agreement['disagreement_count']} disputed."
+            )
+        }
+        if response_format == "columnar":
+            response_data["class_mapping"] = class_table()
+        
+        timings = {
+            **prepared['timings'],
+            **{f"predict-{model_type}": results[model_type]["inference_ms"] / 1000 for model_type in model_types}
+        }
+        set_server_timing(request, timings)
+        
+        logger.info(f"✅ Comparison complete: {agreement['disagreement_count']} disputed rows")
+        return response_data
+        
+    except pd.errors.EmptyDataError:
+        return JSONResponse({"error": "CSV file is empty"}, status_code=400)
+    except pd.errors.ParserError:
+        return JSONResponse({"error": "Invalid CSV format"}, status_code=400)
+    except UploadFormatError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"Comparison failed: {e}")
+        return JSONResponse(
+            {"error": f"Processing error: {str(e)}"}, 
+            status_code=500
+        )
+
+@app.post("/api/explain")
+async def explain_predictions(
+    request: Request,
+    file: UploadFile = File(...),
+    model_type: str = Form("xgboost"),
+    top_k: int = Form(EXPLAIN_TOP_K)
+):
+    """Per-row feature contributions to the predicted class from the trees' own TreeSHAP"""
+    head = await file.read(8)
+    await file.seek(0)
+    upload_format = detect_upload_format(file.filename, head)
+    if upload_format is None:
+        return JSONResponse(
+            {"error": "Please upload a CSV, Parquet, Arrow IPC or Feather file"}, 
+            status_code=400
+        )
+    
+    error_response = validate_model_type(model_type, allow_cascade=False)
+    if error_response is not None:
+        return error_response
+    if top_k < 0:
+        return JSONResponse({"error": "top_k must be 0 (all features) or positive"}, status_code=400)
+    
+    try:
+        # The model is only loaded inside its inference pool, as for /api/predict
+        contents = await file.read()
+        logger.info(f"🔬 Explaining {file.filename} with {model_type}: {len(contents)} bytes")
+        result = await run_in_inference_pool(
+            model_type, run_explain_pipeline, model_type, contents, upload_format, top_k
+        )
+        
+        response_data = {
+            "model_used": MODEL_DISPLAY_NAMES.get(model_type, model_type),
+            # Contributions and base values are in the model's raw margin
+            # (log-odds) space and add up to the margin of the predicted class
+            "output": "margin",
+            "top_k": top_k,
+            "rows_processed": result['rows_processed'],
+            "feature_names": result['feature_names'],
+            "explanations": result['explanations']
+        }
+        
+        timings = result['timings']
+        started = time.perf_counter()
+        response = JSONResponse(response_data)
+        timings["serialize"] = time.perf_counter() - started
+        record_stages(model_type, timings)
+        set_server_timing(request, timings)
+        return response
+        
+    except pd.errors.EmptyDataError:
+        return JSONResponse({"error": "CSV file is empty"}, status_code=400)
+    except pd.errors.ParserError:
+        return JSONResponse({"error": "Invalid CSV format"}, status_code=400)
+    except UploadFormatError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except ExplanationError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"Explanation failed: {e}")
+        return JSONResponse(
+            {"error": f"Processing error: {str(e)}"}, 
+            status_code=500
+        )
+
+@app.get("/api/predict/{result_id}/plot")
+async def get_prediction_plot(result_id: str):
+    """Render (or serve the cached) report PNG for a previous prediction"""
+    entry = get_prediction_result(result_id)
+    if entry is None:
+        return JSONResponse({"error": f"Result '{result_id}' not found"}, status_code=404)
+    
+    plot_png = entry["plot_png"]
+    if plot_png is None:
+        started = time.perf_counter()
+        plot_png = await run_in_threadpool(create_prediction_visualization, entry["chart_data"])
+        STAGE_DURATION.observe(time.perf_counter() - started, stage="visualize", model="")
+        if plot_png is None:
+            return JSONResponse({"error": "Visualization failed"}, status_code=500)
+        cache_prediction_plot(result_id, plot_png)
+    
+    return Response(content=plot_png, media_type="image/png")
+
+@app.post("/api/jobs")
+async def create_prediction_job(
+    model_type: str = Form(...),
+    file: UploadFile = File(...),
+    chunk_size: Optional[int] = Form(None)
+):
+    """Store an upload and score it in the background"""
+    head = await file.read(8)
+    await file.seek(0)
+    upload_format = detect_upload_format(file.filename, head)
+    if upload_format is None:
+        return JSONResponse(
+            {"error": "Please upload a CSV, Parquet, Arrow IPC or Feather file"}, 
+            status_code=400
+        )
+    
+    error_response = validate_model_type(model_type)
+    if error_response is not None:
+        return error_response
+    
+    chunk_size = chunk_size or JOB_CHUNK_ROWS
+    if chunk_size <= 0:
+        return JSONResponse({"error": "chunk_size must be a positive integer"}, status_code=400)
+    
+    job = await run_in_threadpool(create_job, model_type, file.filename, upload_format, file.file, chunk_size)
+    job_manager.wake()
+    logger.info(f"📥 Job {job['id']} queued: {file.filename} ({job['total_rows']} rows)")
+    
+    return JSONResponse(describe_job(job), status_code=202)
+
+@app.get("/api/jobs")
+async def list_prediction_jobs(limit: int = 50):
+    """List the most recent jobs"""
+    return {"jobs": [describe_job(job) for job in job_manager.store.list(limit)]}
+
+@app.get("/api/jobs/{job_id}")
+async def get_prediction_job(job_id: str):
+    """Report a job's status and progress"""
+    job = job_manager.store.get(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Job '{job_id}' not found"}, status_code=404)
+    return describe_job(job)
+
+@app.get("/api/jobs/{job_id}/results")
+async def get_prediction_job_results(job_id: str, offset: int = 0, limit: int = 1000, stream: bool = False):
+    """Page through (or stream as NDJSON) the predictions a job has committed so far"""
+    job = job_manager.store.get(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Job '{job_id}' not found"}, status_code=404)
+    
+    if stream:
+        return StreamingResponse(job_manager.iter_results(job), media_type="application/x-ndjson")
+    
+    if offset < 0 or limit <= 0:
+        return JSONResponse({"error": "offset must be >= 0 and limit > 0"}, status_code=400)
+    limit = min(limit, JOB_RESULTS_PAGE_LIMIT)
+    
+    predictions = await run_in_threadpool(job_manager.read_results, job, offset, limit)
+    next_offset = offset + len(predictions)
+    
+    return {
+        "job_id": job_id,
+        "status": job['status'],
+        "complete": job['status'] == "completed",
+        "offset": offset,
+        "limit": limit,
+        "rows_available": job['rows_processed'],
+        "next_offset": next_offset if next_offset < job['rows_processed'] else None,
+        "predictions": predictions
+    }
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_prediction_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Job '{job_id}' not found"}, status_code=404)
+    return describe_job(job)
+
 @app.get("/api/models")
 async def get_models():
     """Return available models and status"""
+    available = registry.names() if registry is not None else []
+    status = model_status()
     return {
-        "available_models": list(models.keys()),
+        "available_models": available,
         "loaded_features": feature_names,
-        "models_loaded": len(models) > 0,
-        "status": "ready" if models else "not_loaded"
+        "models_loaded": any(status[name]['state'] == "ready" for name in available),
+        "status": "ready" if available else "not_loaded",
+        "executor": INFERENCE_EXECUTOR,
+        "models": status,
+        "resident_bytes": loaded_model_bytes(status),
+        "memory_budget_bytes": registry.memory_budget_bytes if registry is not None else 0,
+        "nan_policy": {column: action if action == "reject" else value for column, (action, value) in nan_policy.items()},
+        "bundle": bundle_summary(active_bundle),
+        "cascade": {
+            "available": len(CASCADE_STAGES) == 2 and all(stage in available for stage in CASCADE_STAGES),
+            "stages": list(CASCADE_STAGES),
+            "threshold": CASCADE_THRESHOLD
+        }
     }
 
+@app.get("/api/models/bundles")
+async def get_bundles():
+    """List the model bundles on disk and the one this worker serves"""
+    return {
+        "serving": active_bundle['version'] if active_bundle is not None else None,
+        "current": current_version(MODEL_BUNDLE_DIR),
+        "bundles": [bundle_summary(manifest) for manifest in list_bundles(MODEL_BUNDLE_DIR)]
+    }
+
+@app.post("/api/models/reload")
+async def reload_bundle(request: Request, version: Optional[str] = Form(None), force: bool = Form(False)):
+    """Load a bundle in the background and swap it in without dropping requests
+    
+    A bundle without some of the served models is refused unless force=true.
+    """
+    if ADMIN_TOKEN and request.headers.get("x-admin-token") != ADMIN_TOKEN:
+        return JSONResponse({"error": "Invalid admin token"}, status_code=403)
+    
+    try:
+        return await run_in_threadpool(reload_models, version, force)
+    except BundleError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"❌ Bundle reload failed: {e}")
+        return JSONResponse({"error": f"Bundle reload failed: {str(e)}"}, status_code=500)
+
+@app.post("/api/models/{model_type}/load")
+async def load_model(model_type: str):
+    """Load a model ahead of its first request"""
+    error_response = validate_model_type(model_type, allow_cascade=False)
+    if error_response is not None:
+        return error_response
+    
+    if models_in_pool_processes():
+        await run_in_inference_pool(model_type, load_model_in_process, model_type)
+    else:
+        await run_in_threadpool(registry.get, model_type)
+    return model_status()[model_type]
+
+@app.post("/api/models/{model_type}/evict")
+async def evict_model(model_type: str):
+    """Unload a model; it is reloaded on next use"""
+    error_response = validate_model_type(model_type, allow_cascade=False)
+    if error_response is not None:
+        return error_response
+    
+    if models_in_pool_processes():
+        # Pool processes exit once their queued work is done
+        for pool in pools_holding(model_type):
+            retire_inference_executor(pool)
+    else:
+        registry.evict(model_type)
+    return model_status()[model_type]
+
+@app.get("/api/cache")
+async def get_cache_stats():
+    """Return hit/miss counters of the per-model prediction caches"""
+    return {
+        "enabled": PREDICTION_CACHE_MB > 0,
+        "budget_mb_per_model": PREDICTION_CACHE_MB,
+        "executor": INFERENCE_EXECUTOR,  # With "process" the budget applies in each pool process
+        "models": cache_stats()
+    }
+
+@app.delete("/api/cache")
+async def clear_prediction_caches():
+    """Drop every cached prediction"""
+    clear_caches()
+    return {"status": "cleared"}
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Prometheus text-format metrics"""
+    update_model_gauges()
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness of this worker: started up and every preloaded model resident"""
+    status = model_status()
+    models = {name: status[name]['state'] == "ready" for name in registry.names()} if registry is not None else {}
+    ready = service_ready and all(models.get(name, False) for name in preload_model_names())
+    body = {
+        "ready": ready,
+        "worker": WORKER_ID,
+        "pid": os.getpid(),
+        "bundle": active_bundle['version'] if active_bundle is not None else None,
+        "models": models
+    }
+    if psutil is not None:
+        memory = psutil.Process().memory_full_info()
+        body["memory_mb"] = {
+            "rss": memory.rss / 1e6,
+            "unique": memory.uss / 1e6,  # Private pages; the rest is shared with the parent
+            "proportional": getattr(memory, "pss", 0) / 1e6
+        }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "models_loaded": len(models),
+        "models_loaded": sum(info['state'] == "ready" for info in model_status().values()),
         "service": "SpaceEx ML Backend"
     }
 
 if __name__ == "__main__":
+    # Development server with auto-reload. For production run `python serve.py`,
+    # which loads the models once and forks workers that share them.
     import uvicorn
     logger.info("🚀 Starting SpaceEx Backend on http://localhost:8000")
     uvicorn.run(
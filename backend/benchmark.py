@@ -0,0 +1,313 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from profiling import RSSSampler
+
+REFERENCE_DATA = 'data/merged_unified_dataset.csv'
+RESULTS_DIR = 'benchmark_results'
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_THRESHOLD = 0.2
+QUANTILE_POINTS = 1001
+LABEL_COLUMN = 'label'
+SKIP_COLUMNS = ['source']
+
+# ===== SYNTHETIC CATALOGS =====
+def fit_catalog_distribution(df: pd.DataFrame) -> Dict:
+    """Per-class Gaussian copula over the empirical marginals of the reference catalog
+
+    Each numeric column keeps its own quantile function and missing rate per
+    label, and the rank correlation between columns is kept through the
+    copula, so synthetic rows look like real ones to the feature engineering
+    and to the models.
+    """
+    columns = [c for c in df.select_dtypes(include=[np.number]).columns if c not in SKIP_COLUMNS]
+    probabilities = np.linspace(0, 1, QUANTILE_POINTS)
+    labels = df[LABEL_COLUMN] if LABEL_COLUMN in df.columns else pd.Series("ALL", index=df.index)
+
+    classes = []
+    for label, group in df.groupby(labels):
+        values = group[columns]
+        # Normal scores of the ranks; missing values contribute 0 to the correlation
+        scores = ndtri((values.rank(pct=True) - 0.5 / len(values)).clip(1e-6, 1 - 1e-6)).fillna(0.0)
+        correlation = np.corrcoef(scores.to_numpy(), rowvar=False) if len(values) > 1 else np.eye(len(columns))
+        classes.append({
+            "label": label,
+            "weight": len(group) / len(df),
+            "quantiles": np.vstack([
+                np.nanquantile(values[c], probabilities) if values[c].notna().any() else np.zeros(QUANTILE_POINTS)
+                for c in columns
+            ]),
+            "missing_rate": values.isna().mean().to_numpy(),
+            "correlation": np.nan_to_num(correlation) + 1e-6 * np.eye(len(columns))
+        })
+    return {"columns": columns, "probabilities": probabilities, "classes": classes}
+
+def generate_catalog(distribution: Dict, rows: int, seed: int = 42, with_labels: bool = False,
+                     missing: bool = False) -> pd.DataFrame:
+    """Sample a synthetic catalog following the reference distribution
+
+    With `missing` the per-column missing rates of the reference are applied
+    too; the VotingEnsemble cannot score rows with NaNs, so they are off by
+    default to keep every model on its real prediction path.
+    """
+    rng = np.random.default_rng(seed)
+    columns = distribution['columns']
+    weights = np.array([c['weight'] for c in distribution['classes']])
+    per_class = rng.multinomial(rows, weights / weights.sum())
+
+    frames = []
+    for spec, count in zip(distribution['classes'], per_class):
+        if count == 0:
+            continue
+        normal = rng.multivariate_normal(np.zeros(len(columns)), spec['correlation'], size=count, method='cholesky')
+        uniform = ndtr(normal)
+        data = np.empty((count, len(columns)))
+        for i in range(len(columns)):
+            data[:, i] = np.interp(uniform[:, i], distribution['probabilities'], spec['quantiles'][i])
+            if missing:
+                data[rng.random(count) < spec['missing_rate'][i], i] = np.nan
+        frame = pd.DataFrame(data, columns=columns)
+        if with_labels:
+            frame[LABEL_COLUMN] = spec['label']
+        frames.append(frame)
+
+    catalog = pd.concat(frames, ignore_index=True)
+    return catalog.iloc[rng.permutation(len(catalog))].reset_index(drop=True)
+
+def encode_catalog(catalog: pd.DataFrame, upload_format: str) -> bytes:
+    buffer = io.BytesIO()
+    if upload_format == 'parquet':
+        catalog.to_parquet(buffer, index=False)
+    else:
+        catalog.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+# ===== MEASUREMENT =====
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples, dtype=float)
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max())
+    }
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Stage durations (ms) from a Server-Timing header"""
+    timings = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if params.startswith("dur="):
+            timings[name] = float(params[4:])
+    return timings
+
+def run_predict_scenario(client, model_type: str, payload: bytes, filename: str, rows: int,
+                         repeats: int, form: Dict) -> Dict:
+    """Upload one catalog `repeats` times and summarize latency, throughput and memory"""
+    latencies, stage_samples = [], {}
+    with RSSSampler() as rss:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            response = client.post(
+                '/api/predict',
+                data={'model_type': model_type, **form},
+                files={'file': (filename, payload)}
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code != 200:
+                raise RuntimeError(f"{model_type} failed on {rows} rows: {response.text[:200]}")
+            latencies.append(elapsed)
+            for stage, duration in parse_server_timing(response.headers.get('server-timing')).items():
+                stage_samples.setdefault(stage, []).append(duration)
+
+    latency = percentiles(latencies)
+    return {
+        "name": f"predict/{model_type}/{rows}",
+        "kind": "predict",
+        "model": model_type,
+        "rows": rows,
+        "repeats": repeats,
+        "upload_bytes": len(payload),
+        "latency_ms": latency,
+        "rows_per_second": rows / (latency['p50'] / 1000),
+        "stages_ms": {stage: percentiles(samples) for stage, samples in stage_samples.items()},
+        "peak_rss_mb": rss.peak / 1e6,
+        "rss_growth_mb": (rss.peak - rss.start) / 1e6
+    }
+
+def run_training_scenario(distribution: Dict, rows: int, seed: int, missing: bool = False,
+                          svm_kernel: str = 'exact') -> Dict:
+    """Time the training pipeline on a labelled synthetic catalog"""
+    from train_models import ExoplanetModelTrainer
+
+    catalog = generate_catalog(distribution, rows, seed, with_labels=True, missing=missing)
+    path = os.path.join(RESULTS_DIR, f"train_{rows}.csv")
+    catalog.to_csv(path, index=False)
+    try:
+        # The seeded catalog is identical on every run; a cache hit would time a different path
+        trainer = ExoplanetModelTrainer(path, svm_kernel=svm_kernel, dataset_cache_dir=None)
+        with RSSSampler() as rss, contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            trainer.train_models()
+            elapsed = time.perf_counter() - started
+    finally:
+        os.remove(path)
+
+    return {
+        "name": f"train/{rows}" if svm_kernel == 'exact' else f"train-{svm_kernel}/{rows}",
+        "kind": "train",
+        "rows": rows,
+        "repeats": 1,
+        "latency_ms": percentiles([elapsed * 1000]),
+        "rows_per_second": rows / elapsed,
+        "stages_ms": {
+            f"{stage['model']}/{stage['stage']}": percentiles([stage['wall_seconds'] * 1000])
+            for stage in trainer.stage_report
+        },
+        # Models are fitted in worker processes, each stage with its own peak
+        "stage_peak_rss_mb": {
+            f"{stage['model']}/{stage['stage']}": stage['peak_rss_mb'] for stage in trainer.stage_report
+        },
+        "peak_rss_mb": rss.peak / 1e6,
+        "rss_growth_mb": (rss.peak - rss.start) / 1e6
+    }
+
+# ===== REGRESSION CHECK =====
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Scenarios whose p50 latency grew or throughput dropped by more than `threshold`"""
+    previous = {scenario['name']: scenario for scenario in baseline['scenarios']}
+    regressions = []
+    for scenario in current['scenarios']:
+        before = previous.get(scenario['name'])
+        if before is None:
+            continue
+        latency_change = scenario['latency_ms']['p50'] / before['latency_ms']['p50'] - 1
+        throughput_change = scenario['rows_per_second'] / before['rows_per_second'] - 1
+        scenario['baseline_change'] = {"latency_p50": latency_change, "rows_per_second": throughput_change}
+        if latency_change > threshold or throughput_change < -threshold:
+            regressions.append({"name": scenario['name'], **scenario['baseline_change']})
+    return regressions
+
+def environment_info() -> Dict:
+    versions = {}
+    for package in ('numpy', 'pandas', 'sklearn', 'xgboost', 'lightgbm', 'catboost', 'pyarrow', 'fastapi'):
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions
+    }
+
+# ===== CLI =====
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the prediction service on synthetic catalogs")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated catalog sizes")
+    parser.add_argument('--models', default="", help="Comma-separated models (default: every available model)")
+    parser.add_argument('--repeats', type=int, default=5, help="Requests per scenario")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Upload format")
+    parser.add_argument('--response-format', choices=['rows', 'columnar'], default='columnar')
+    parser.add_argument('--plot', action='store_true', help="Render the report PNG in each request")
+    parser.add_argument('--cache', action='store_true', help="Keep the prediction cache enabled")
+    parser.add_argument('--missing', action='store_true', help="Apply the reference missing-value rates")
+    parser.add_argument('--training', default="", help="Comma-separated catalog sizes for training runs")
+    parser.add_argument('--svm', default='exact', help="SVM kernel of the trained ensemble (exact, nystroem, rff)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Results file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument('--baseline', default=None, help="Previous results file to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown before the run fails")
+    args = parser.parse_args(argv)
+
+    # Stage timings come from the Server-Timing header; repeated uploads of the
+    # same catalog must not be answered from the prediction cache
+    os.environ["SPACEEX_SERVER_TIMING"] = "1"
+    if not args.cache:
+        os.environ["SPACEEX_PREDICTION_CACHE_MB"] = "0"
+    import app as service
+    from fastapi.testclient import TestClient
+
+    print("⏱️ SpaceEx benchmark")
+    print("="*50)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    distribution = fit_catalog_distribution(pd.read_csv(REFERENCE_DATA))
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    form = {
+        'include_plot': str(args.plot).lower(),
+        'format': args.response_format
+    }
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment_info(),
+        "config": {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        "scenarios": []
+    }
+
+    with TestClient(service.app) as client:
+        models = [m.strip() for m in args.models.split(",") if m.strip()] or service.registry.names()
+        warmup = encode_catalog(generate_catalog(distribution, 100, args.seed, missing=args.missing), args.format)
+        for model_type in models:
+            # First use loads the model; keep that out of the measurements
+            run_predict_scenario(client, model_type, warmup, f"warmup.{args.format}", 100, 1, form)
+            results.setdefault("model_load_seconds", {})[model_type] = \
+                service.registry.status()[model_type]["load_seconds"]
+
+        for rows in sizes:
+            payload = encode_catalog(generate_catalog(distribution, rows, args.seed, missing=args.missing), args.format)
+            print(f"\n📊 {rows} rows ({len(payload) / 1e6:.1f} MB {args.format})")
+            for model_type in models:
+                scenario = run_predict_scenario(
+                    client, model_type, payload, f"catalog.{args.format}", rows, args.repeats, form
+                )
+                results["scenarios"].append(scenario)
+                latency = scenario['latency_ms']
+                print(f"   {model_type:15s} p50 {latency['p50']:9.1f} ms  p99 {latency['p99']:9.1f} ms  "
+                      f"{scenario['rows_per_second']:12,.0f} rows/s  peak RSS {scenario['peak_rss_mb']:7.0f} MB")
+
+    for rows in [int(size) for size in args.training.split(",") if size.strip()]:
+        print(f"\n🎯 Training on {rows} rows")
+        scenario = run_training_scenario(distribution, rows, args.seed, args.missing, args.svm)
+        results["scenarios"].append(scenario)
+        print(f"   {scenario['latency_ms']['p50'] / 1000:.1f} s, peak RSS {scenario['peak_rss_mb']:.0f} MB")
+        for stage, peak in scenario['stage_peak_rss_mb'].items():
+            print(f"      {stage:20s} {scenario['stages_ms'][stage]['p50'] / 1000:8.2f} s  peak RSS {peak:7.0f} MB")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        results["regressions"] = regressions
+        if regressions:
+            exit_code = 1
+            print(f"\n❌ {len(regressions)} scenario(s) regressed by more than {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   {regression['name']}: latency {regression['latency_p50']:+.1%}, "
+                      f"throughput {regression['rows_per_second']:+.1%}")
+        else:
+            print(f"\n✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+REFERENCE_DATA = 'data/merged_unified_dataset.csv'
+DEFAULT_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99]
+DEFAULT_TOLERANCE = 0.005
+
+def held_out_split(service, data_path: str):
+    """Test rows of the 80/20 stratified split used by train_models.py, with class codes"""
+    df = pd.read_csv(data_path)
+    codes = {info['label']: code for code, info in service.CLASS_MAPPING.items()}
+    df = df[df['label'].isin(codes)]
+    y = df['label'].map(codes).to_numpy()
+    X = df.drop(columns=['label'])
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    return X_test, y_test
+
+def time_scoring(score, repeats: int) -> Dict:
+    """Best-of-`repeats` wall time of one scoring call, with its result"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        results = score()
+        best = min(best, time.perf_counter() - started)
+    return {"results": results, "seconds": best}
+
+def evaluate(name: str, timed: Dict, labels: np.ndarray, threshold=None) -> Dict:
+    results = timed['results']
+    predictions = np.asarray(results['predictions'])
+    escalated = results.get('escalated')
+    return {
+        "name": name,
+        "threshold": threshold,
+        "accuracy": float(np.mean(predictions == labels)),
+        "escalation_rate": float(np.mean(escalated)) if escalated is not None else None,
+        "rows_per_second": len(labels) / timed['seconds'] if timed['seconds'] else float("inf"),
+        "latency_ms": timed['seconds'] * 1000
+    }
+
+def recommend_threshold(cascades: List[Dict], full_accuracy: float, tolerance: float):
+    """Lowest threshold whose accuracy is within `tolerance` of the second stage alone"""
+    for entry in sorted(cascades, key=lambda e: e['threshold']):
+        if entry['accuracy'] >= full_accuracy - tolerance:
+            return entry['threshold']
+    return None
+
+def print_table(rows: List[Dict]):
+    print(f"{'run':<28} {'accuracy':>9} {'escalated':>10} {'rows/s':>12} {'ms':>9}")
+    for row in rows:
+        escalated = f"{row['escalation_rate']:.1%}" if row['escalation_rate'] is not None else "-"
+        print(
+            f"{row['name']:<28} {row['accuracy']:>9.4f} {escalated:>10} "
+            f"{row['rows_per_second']:>12,.0f} {row['latency_ms']:>9.1f}"
+        )
+
+# ===== CLI =====
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cascade accuracy and throughput per confidence threshold")
+    parser.add_argument('--first', default=None, help="Cheap model scoring every row (default: SPACEEX_CASCADE_STAGES)")
+    parser.add_argument('--second', default=None, help="Full model for escalated rows (default: SPACEEX_CASCADE_STAGES)")
+    parser.add_argument('--thresholds', default=",".join(map(str, DEFAULT_THRESHOLDS)),
+                        help="Comma-separated top-class probability thresholds")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per threshold (best is reported)")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Accuracy loss against the second stage accepted for the recommended threshold")
+    parser.add_argument('--data', default=REFERENCE_DATA)
+    parser.add_argument('--output', default=None, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    # Repeated scoring of the same rows must not be answered from the prediction cache
+    os.environ["SPACEEX_PREDICTION_CACHE_MB"] = "0"
+    import app as service
+
+    first = (args.first or service.CASCADE_STAGES[0]).lower()
+    second = (args.second or service.CASCADE_STAGES[-1]).lower()
+    thresholds = [float(t) for t in args.thresholds.split(",") if t.strip()]
+
+    print("🪜 SpaceEx cascade evaluation")
+    print("="*50)
+    service.load_ml_models()
+    for name in (first, second):
+        if name not in service.registry:
+            print(f"❌ Model '{name}' not available")
+            return 1
+
+    X_test, labels = held_out_split(service, args.data)
+    features = service.preprocess_data(X_test)
+    print(f"📊 Held-out split: {len(labels)} rows, {features.shape[1]} features")
+    print(f"🔗 Cascade: {first} → {second}\n")
+
+    # Warm both models so loading stays out of the timings
+    service.predict_cascade(features[:10], first, second, 1.01)
+
+    baselines = [
+        evaluate(f"{first} only", time_scoring(lambda: service.predict_with_cache(first, features), args.repeats), labels),
+        evaluate(f"{second} only", time_scoring(lambda: service.predict_with_cache(second, features), args.repeats), labels)
+    ]
+    cascades = [
+        evaluate(
+            f"cascade @ {threshold:g}",
+            time_scoring(lambda: service.predict_cascade(features, first, second, threshold), args.repeats),
+            labels,
+            threshold
+        )
+        for threshold in thresholds
+    ]
+    print_table(baselines + cascades)
+
+    recommended = recommend_threshold(cascades, baselines[1]['accuracy'], args.tolerance)
+    if recommended is None:
+        print(f"\n⚠️ No threshold stays within {args.tolerance:.3f} of {second} accuracy")
+    else:
+        print(f"\n✅ Recommended SPACEEX_CASCADE_THRESHOLD={recommended:g}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "first_stage": first,
+                "second_stage": second,
+                "rows": int(len(labels)),
+                "baselines": baselines,
+                "cascades": cascades,
+                "recommended_threshold": recommended
+            }, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # BLAS/OpenMP pools then follow their own defaults
+    threadpool_limits = None
+
+DEFAULT_FOLDS = 5
+DEFAULT_CV_DIR = 'cv_results'
+
+def folds_key(X: np.ndarray, y: np.ndarray, n_folds: int, seed: int) -> str:
+    """Fingerprint of the rows, labels and split settings the fold matrices depend on"""
+    digest = hashlib.sha256(f"{n_folds}:{seed}:".encode())
+    digest.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=np.int64).tobytes())
+    return digest.hexdigest()[:16]
+
+# ===== FOLD MATRICES =====
+def prepare_folds(X: np.ndarray, y: np.ndarray, root: str, n_folds: int = DEFAULT_FOLDS, seed: int = 42) -> str:
+    """Scaled train/test matrices of every stratified fold, written once and reused
+
+    Each fold's scaler is fitted on its training rows only. The matrices are
+    saved as .npy files that workers memory-map, so every model is scored on
+    identical folds without scaling or copying them again. Returns the
+    directory of the folds.
+    """
+    directory = os.path.join(root, folds_key(X, y, n_folds, seed))
+    if os.path.exists(os.path.join(directory, "folds.json")):
+        print(f"⚡ Reusing {n_folds} scaled folds from {directory}")
+        return directory
+
+    print(f"\n✂️ Scaling {n_folds} stratified folds into {directory}...")
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=root, prefix=".staging-")
+    try:
+        fold_of_row = np.empty(len(y), dtype=np.int64)
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+        for fold, (train_rows, test_rows) in enumerate(splitter.split(X, y)):
+            scaler = StandardScaler()
+            arrays = {
+                "X_train": scaler.fit_transform(X[train_rows]),
+                "X_test": scaler.transform(X[test_rows]),
+                "y_train": y[train_rows],
+                "test_rows": test_rows
+            }
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f"fold{fold}_{name}.npy"), np.ascontiguousarray(array))
+            fold_of_row[test_rows] = fold
+        np.save(os.path.join(staging, "y.npy"), y)
+        np.save(os.path.join(staging, "fold_of_row.npy"), fold_of_row)
+        with open(os.path.join(staging, "folds.json"), "w") as f:
+            json.dump({"folds": n_folds, "seed": seed, "rows": len(y), "created_at": time.time()}, f)
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.replace(staging, directory)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return directory
+
+def load_fold(directory: str, fold: int) -> Dict[str, np.ndarray]:
+    return {
+        name: np.load(os.path.join(directory, f"fold{fold}_{name}.npy"), mmap_mode='r')
+        for name in ("X_train", "X_test", "y_train", "test_rows")
+    }
+
+# ===== WORKERS =====
+def _fit_fold(trainer, model_name: str, directory: str, fold: int) -> Dict:
+    """Fit one model on one fold single-threaded and return its test-row probabilities"""
+    data = load_fold(directory, fold)
+    limits = threadpool_limits(1) if threadpool_limits is not None else contextlib.nullcontext()
+    with limits:
+        model = trainer.build_model(model_name, data["X_train"].shape[1], trainer.params.get(model_name), n_jobs=1)
+        started = time.perf_counter()
+        model.fit(data["X_train"], data["y_train"])
+        fit_seconds = time.perf_counter() - started
+        probabilities = model.predict_proba(data["X_test"])
+
+    # Columns follow the target codes even if a class is missing from the fold
+    full = np.zeros((len(probabilities), len(trainer.classes)), dtype=np.float64)
+    full[:, np.asarray(model.classes_, dtype=np.intp).ravel()] = probabilities
+    return {"probabilities": full, "fit_seconds": fit_seconds}
+
+# ===== CROSS-VALIDATION =====
+def cross_validate(trainer, model_names: Sequence[str], directory: str, output_dir: str,
+                   cores: Optional[int] = None) -> Dict:
+    """Score every model on every fold of `directory` in a pool of `cores` processes
+
+    Out-of-fold probabilities are written to <output_dir>/oof_<model>.npy
+    (rows in dataset order, columns in target code order) next to the labels,
+    the fold of each row and a summary.json of the fold scores.
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    with open(os.path.join(directory, "folds.json")) as f:
+        n_folds = json.load(f)["folds"]
+    y = np.load(os.path.join(directory, "y.npy"))
+    fold_of_row = np.load(os.path.join(directory, "fold_of_row.npy"))
+    test_rows = [np.load(os.path.join(directory, f"fold{fold}_test_rows.npy")) for fold in range(n_folds)]
+
+    print(f"\n🔁 Cross-validating {list(model_names)} on {n_folds} folds with {cores} processes...")
+    oof = {name: np.zeros((len(y), len(trainer.classes))) for name in model_names}
+    fit_seconds = {name: [0.0] * n_folds for name in model_names}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=cores, mp_context=context) as pool:
+        futures = {
+            pool.submit(_fit_fold, trainer, name, directory, fold): (name, fold)
+            for name in model_names for fold in range(n_folds)
+        }
+        for future in as_completed(futures):
+            name, fold = futures[future]
+            result = future.result()
+            oof[name][test_rows[fold]] = result["probabilities"]
+            fit_seconds[name][fold] = result["fit_seconds"]
+            print(f"   ✅ {name} fold {fold} fitted in {result['fit_seconds']:.1f}s")
+
+    os.makedirs(output_dir, exist_ok=True)
+    np.save(os.path.join(output_dir, "y.npy"), y)
+    np.save(os.path.join(output_dir, "fold_of_row.npy"), fold_of_row)
+    summary = {"folds": n_folds, "rows": int(len(y)), "classes": list(trainer.classes), "models": {}}
+    for name in model_names:
+        np.save(os.path.join(output_dir, f"oof_{name}.npy"), oof[name])
+        predictions = oof[name].argmax(axis=1)
+        fold_scores = [float(accuracy_score(y[rows], predictions[rows])) for rows in test_rows]
+        summary["models"][name] = {
+            "fold_accuracy": fold_scores,
+            "mean_accuracy": float(np.mean(fold_scores)),
+            "std_accuracy": float(np.std(fold_scores)),
+            "oof_log_loss": float(log_loss(y, np.clip(oof[name], 1e-15, 1), labels=range(len(trainer.classes)))),
+            "fit_seconds": fit_seconds[name]
+        }
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def print_cv_summary(summary: Dict):
+    print(f"\n🏁 {summary['folds']}-fold cross-validation ({summary['rows']} rows):")
+    print(f"   {'model':<10} {'accuracy':>9} {'± std':>7} {'log loss':>9} {'fit s/fold':>11}")
+    for name, scores in sorted(summary["models"].items(), key=lambda item: -item[1]["mean_accuracy"]):
+        print(
+            f"   {name:<10} {scores['mean_accuracy']:>9.4f} {scores['std_accuracy']:>7.4f} "
+            f"{scores['oof_log_loss']:>9.4f} {np.mean(scores['fit_seconds']):>11.2f}"
+        )
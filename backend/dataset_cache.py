@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from model_registry import file_checksum
+
+DEFAULT_CACHE_DIR = 'dataset_cache'
+CACHE_FORMAT = 1  # Bump when the layout of a cache entry changes
+
+def dataset_key(data_path: str, cleaning_source: str) -> str:
+    """Fingerprint of the source file contents and the cleaning code that produced the entry"""
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_FORMAT}:{file_checksum(data_path)}:".encode())
+    digest.update(cleaning_source.encode())
+    return digest.hexdigest()[:16]
+
+def load_cached_dataset(cache_dir: str, key: str) -> Optional[Tuple[pd.DataFrame, pd.Series, List[str]]]:
+    """Memory-mapped features and target of a cache entry, or None when it does not exist"""
+    entry = os.path.join(cache_dir, key)
+    try:
+        with open(os.path.join(entry, "meta.json")) as f:
+            meta = json.load(f)
+        X = np.load(os.path.join(entry, "X.npy"), mmap_mode='r')
+        y = np.load(os.path.join(entry, "y.npy"), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    feature_names = meta['feature_names']
+    return pd.DataFrame(X, columns=feature_names, copy=False), pd.Series(y, name=meta['target']), feature_names
+
+def store_dataset(cache_dir: str, key: str, X: pd.DataFrame, y: pd.Series, data_path: str):
+    """Write a cache entry atomically and drop older entries built from the same file"""
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir, prefix=".staging-")
+    try:
+        np.save(os.path.join(staging, "X.npy"), np.ascontiguousarray(X.to_numpy(dtype=np.float64)))
+        np.save(os.path.join(staging, "y.npy"), y.to_numpy(dtype=np.int64))
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({
+                "source": os.path.abspath(data_path),
+                "feature_names": list(X.columns),
+                "target": y.name,
+                "rows": len(X),
+                "created_at": time.time()
+            }, f)
+        os.replace(staging, os.path.join(cache_dir, key))
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    for name in os.listdir(cache_dir):
+        if name == key or name.startswith("."):
+            continue
+        try:
+            with open(os.path.join(cache_dir, name, "meta.json")) as f:
+                stale = json.load(f)['source'] == os.path.abspath(data_path)
+        except (OSError, ValueError, KeyError):
+            continue
+        if stale:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from model_bundle import BundleModel
+from tree_compiler import RoutedTreeModel
+
+try:
+    import xgboost as xgb
+except ImportError:
+    xgb = None
+
+try:
+    import catboost
+except ImportError:
+    catboost = None
+
+EXPLAINABLE_LIBRARIES = ('xgboost', 'lightgbm', 'catboost')
+
+class ExplanationError(Exception):
+    """The model has no native per-row contribution method"""
+
+def unwrap_model(model) -> Tuple[Optional[np.ndarray], list, object]:
+    """(bundle column selection, preprocessing steps, final estimator) of a served model"""
+    columns = None
+    if isinstance(model, BundleModel):
+        columns, model = model.columns, model.model
+    if isinstance(model, RoutedTreeModel):
+        model = model.pipeline
+    steps = getattr(model, 'steps', None)
+    if steps is None:
+        return columns, [], model
+    return columns, [step for _, step in steps[:-1]], steps[-1][1]
+
+def estimator_library(estimator) -> str:
+    return type(estimator).__module__.split('.')[0]
+
+def is_explainable(model) -> bool:
+    return estimator_library(unwrap_model(model)[2]) in EXPLAINABLE_LIBRARIES
+
+def native_contributions(estimator, X: np.ndarray) -> np.ndarray:
+    """TreeSHAP contributions in margin space, shaped (rows, outputs, features + 1)
+
+    The last column is the expected value (bias); each row sums to the raw
+    margin of the output. Binary models have a single output, the margin of
+    their positive class.
+    """
+    library = estimator_library(estimator)
+    if library == 'xgboost':
+        booster = estimator.get_booster()
+        contributions = booster.predict(xgb.DMatrix(X, missing=np.nan), pred_contribs=True, validate_features=False)
+    elif library == 'lightgbm':
+        contributions = estimator.predict(X, pred_contrib=True)
+    elif library == 'catboost':
+        contributions = estimator.get_feature_importance(catboost.Pool(X), type='ShapValues')
+    else:
+        raise ExplanationError(f"{type(estimator).__name__} has no native tree contributions")
+    contributions = np.asarray(contributions, dtype=np.float64)
+    return contributions.reshape(len(X), -1, X.shape[1] + 1)
+
+def explain_rows(model, features: np.ndarray, feature_names: Sequence[str]) -> Dict:
+    """Predicted classes and per-feature contributions to each row's predicted class
+
+    `features` is the serving feature matrix; the model's own columns and
+    preprocessing are applied before its trees are evaluated, and the
+    contributions are reported against the untransformed feature values.
+    """
+    columns, preprocessing, estimator = unwrap_model(model)
+    if estimator_library(estimator) not in EXPLAINABLE_LIBRARIES:
+        raise ExplanationError(f"{type(estimator).__name__} has no native tree contributions")
+    if columns is not None:
+        features = features[:, columns]
+    X = features
+    for step in preprocessing:
+        X = step.transform(X)
+
+    contributions = native_contributions(estimator, np.asarray(X))
+    if contributions.shape[1] == 1:
+        # Binary margin explains the positive class; the negative class is its mirror image
+        contributions = np.concatenate([-contributions, contributions], axis=1)
+
+    margins = contributions.sum(axis=2)
+    explained = margins.argmax(axis=1)  # Same argmax as the probabilities
+    row_contributions = contributions[np.arange(len(X)), explained]
+    return {
+        "feature_names": list(feature_names),
+        "values": features,
+        "classes": np.asarray(model.classes_)[explained],
+        "contributions": row_contributions[:, :-1],
+        "base_values": row_contributions[:, -1],
+        "margins": margins[np.arange(len(X)), explained]
+    }
+
+def top_contributions(explanation: Dict, top_k: int) -> List[Dict]:
+    """Per-row contributions truncated to the `top_k` largest in magnitude (0 keeps all)
+
+    The dropped contributions are summed into `other_contribution`, so
+    base value + contributions + other still adds up to the margin.
+    """
+    contributions = explanation["contributions"]
+    n_features = contributions.shape[1]
+    k = n_features if top_k <= 0 else min(top_k, n_features)
+    order = np.argsort(-np.abs(contributions), axis=1, kind='stable')[:, :k]
+    kept = np.take_along_axis(contributions, order, axis=1)
+    values = np.take_along_axis(explanation["values"], order, axis=1)
+    other = contributions.sum(axis=1) - kept.sum(axis=1)
+
+    names = explanation["feature_names"]
+    rows = []
+    for i in range(len(contributions)):
+        rows.append({
+            "contributions": [
+                {"feature": names[j], "value": None if np.isnan(value) else value, "contribution": contribution}
+                for j, value, contribution in zip(order[i].tolist(), values[i].tolist(), kept[i].tolist())
+            ],
+            "other_contribution": float(other[i])
+        })
+    return rows
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.metrics import accuracy_score
+
+DEFAULT_STORE = os.path.join('search_results', 'trials.db')
+DEFAULT_TRIALS = 27
+DEFAULT_ETA = 3
+MIN_TRIAL_ROWS = 250  # Smallest training subset a first-rung trial is fitted on
+
+# Candidate values per hyperparameter; ensemble keys use VotingClassifier's
+# nested "<member>__<param>" names
+SEARCH_SPACES = {
+    'xgboost': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [4, 6, 8, 10],
+        'learning_rate': [0.03, 0.05, 0.1, 0.2],
+        'subsample': [0.7, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'min_child_weight': [1, 3, 5]
+    },
+    'ensemble': {
+        'xgboost__n_estimators': [50, 100, 200],
+        'xgboost__max_depth': [4, 6, 8],
+        'random_forest__n_estimators': [100, 200, 400],
+        'random_forest__max_depth': [None, 10, 20],
+        'random_forest__min_samples_leaf': [1, 2, 5],
+        'svm__C': [0.3, 1.0, 3.0]
+    }
+}
+
+# ===== TRIAL STORE =====
+class TrialStore:
+    """SQLite record of finished trials, keyed by search, configuration and training rows
+
+    A trial is written as soon as it finishes, so an interrupted search that is
+    started again with the same data and settings skips every trial it already ran.
+    """
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS trials (
+                    search_key TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    rows INTEGER NOT NULL,
+                    score REAL NOT NULL,
+                    fit_seconds REAL NOT NULL,
+                    finished_at REAL NOT NULL,
+                    PRIMARY KEY (search_key, params, rows)
+                )
+            """)
+
+    def finished(self, search_key: str) -> Dict[tuple, Dict]:
+        """Finished trials of one search by (params JSON, rows)"""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM trials WHERE search_key = ?", (search_key,)).fetchall()
+        return {(row['params'], row['rows']): dict(row) for row in rows}
+
+    def record(self, search_key: str, params: str, rows: int, score: float, fit_seconds: float):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?)",
+                (search_key, params, rows, score, fit_seconds, time.time())
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ===== TRIALS =====
+_worker_state = {}
+
+def _init_worker(trainer, X_fit, y_fit, X_val, y_val):
+    """Keep the trainer and the search data in the worker for all its trials"""
+    _worker_state.update(trainer=trainer, X_fit=X_fit, y_fit=y_fit, X_val=X_val, y_val=y_val)
+
+def _run_trial(model_name: str, params: Dict, rows: int) -> Dict:
+    """Fit one configuration on the first `rows` search rows and score it on the validation rows"""
+    trainer = _worker_state['trainer']
+    X_fit, y_fit = _worker_state['X_fit'][:rows], _worker_state['y_fit'][:rows]
+    model = trainer.build_model(model_name, X_fit.shape[1], params, n_jobs=1)
+    started = time.perf_counter()
+    model.fit(X_fit, y_fit)
+    fit_seconds = time.perf_counter() - started
+    score = accuracy_score(_worker_state['y_val'], model.predict(_worker_state['X_val']))
+    return {"score": float(score), "fit_seconds": fit_seconds}
+
+def sample_candidates(space: Dict[str, list], n_trials: int, seed: int) -> List[Dict]:
+    """Distinct random configurations, reproducible for a given seed"""
+    total = math.prod(len(values) for values in space.values())
+    rng = random.Random(seed)
+    candidates, seen = [], set()
+    while len(candidates) < min(n_trials, total):
+        params = {name: rng.choice(values) for name, values in space.items()}
+        key = params_key(params)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+def params_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+def rung_sizes(n_rows: int, n_trials: int, eta: int) -> List[int]:
+    """Training rows per rung: each rung uses `eta` times the rows of the previous one"""
+    rungs = 1 + int(math.log(max(n_trials, 1), eta) + 1e-9)
+    while rungs > 1 and n_rows / eta ** (rungs - 1) < MIN_TRIAL_ROWS:
+        rungs -= 1
+    return [int(n_rows / eta ** (rungs - 1 - rung)) for rung in range(rungs)]
+
+def search_fingerprint(model_name: str, X_fit: np.ndarray, y_fit: np.ndarray, X_val: np.ndarray,
+                       settings: Dict) -> str:
+    """Identify a search by its data and the trainer settings trial scores depend on"""
+    digest = hashlib.sha1(model_name.encode())
+    for array in (X_fit, y_fit, X_val):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+# ===== SUCCESSIVE HALVING =====
+def successive_halving(trainer, model_name: str, X_fit: np.ndarray, y_fit: np.ndarray,
+                       X_val: np.ndarray, y_val: np.ndarray, store: TrialStore,
+                       space: Optional[Dict[str, list]] = None, n_trials: int = DEFAULT_TRIALS,
+                       eta: int = DEFAULT_ETA, cpus: Optional[int] = None, seed: int = 42) -> Dict:
+    """Successive-halving search over `space` run on a process pool of `cpus` workers
+
+    Every candidate is fitted on a small subset of the rows; only the best
+    1/eta of each rung are refitted on eta times more rows, until the
+    survivors train on the full search set. Trials run single-threaded so
+    the pool size is the CPU budget.
+    """
+    space = space or SEARCH_SPACES[model_name]
+    cpus = max(1, cpus or os.cpu_count() or 1)
+    search_key = search_fingerprint(model_name, X_fit, y_fit, X_val, trainer.search_settings())
+    finished = store.finished(search_key)
+    candidates = sample_candidates(space, n_trials, seed)
+    rungs = rung_sizes(len(X_fit), len(candidates), eta)
+
+    print(f"\n🔎 Searching {model_name}: {len(candidates)} candidates, rungs of {rungs} rows, {cpus} CPUs")
+    if finished:
+        print(f"   ♻️ Resuming with {len(finished)} finished trials")
+
+    leaderboard = []
+    with ProcessPoolExecutor(max_workers=cpus, initializer=_init_worker,
+                             initargs=(trainer, X_fit, y_fit, X_val, y_val)) as pool:
+        for rung, rows in enumerate(rungs):
+            keys = [params_key(params) for params in candidates]
+            futures = {
+                pool.submit(_run_trial, model_name, params, rows): key
+                for params, key in zip(candidates, keys)
+                if (key, rows) not in finished
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                store.record(search_key, futures[future], rows, result['score'], result['fit_seconds'])
+                finished[(futures[future], rows)] = {"rows": rows, **result}
+
+            scored = sorted(
+                zip(candidates, keys),
+                key=lambda candidate: -finished[(candidate[1], rows)]['score']
+            )
+            best_score = finished[(scored[0][1], rows)]['score']
+            print(f"   Rung {rung}: {len(candidates)} trials on {rows} rows, best accuracy {best_score:.4f} "
+                  f"({len(futures)} run, {len(candidates) - len(futures)} from store)")
+            leaderboard = [
+                {"params": params, "rows": rows, **{k: finished[(key, rows)][k] for k in ("score", "fit_seconds")}}
+                for params, key in scored
+            ]
+            candidates = [params for params, _ in scored[:max(1, len(candidates) // eta)]]
+
+    return {
+        "model": model_name,
+        "best_params": leaderboard[0]["params"],
+        "best_score": leaderboard[0]["score"],
+        "rungs": rungs,
+        "leaderboard": leaderboard
+    }
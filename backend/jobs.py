@@ -0,0 +1,475 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_POLL_SECONDS = 2.0
+
+# Added after the first release; older stores get them on open
+LEASE_COLUMNS = {"owner_pid": "INTEGER", "lease_expires": "REAL"}
+
+class LeaseLost(Exception):
+    """Another process took over a job whose lease expired"""
+
+def process_alive(pid: Optional[int]) -> bool:
+    """Whether a process with this pid exists on this host"""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+# ===== JOB STORE =====
+class JobStore:
+    """SQLite persistence for batch jobs and their committed result chunks
+
+    A chunk is only recorded once its predictions have been flushed to the
+    job's results file, so `rows_processed` / `results_bytes` always describe
+    a consistent prefix of the output that an interrupted job can resume from.
+    A running job is owned by one process (`owner_pid`) until its lease
+    (`lease_expires`) runs out; progress is only recorded by the owner.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    model_type TEXT NOT NULL,
+                    filename TEXT,
+                    upload_format TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    results_path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    chunk_size INTEGER NOT NULL,
+                    total_rows INTEGER,
+                    rows_processed INTEGER NOT NULL DEFAULT 0,
+                    chunks_done INTEGER NOT NULL DEFAULT 0,
+                    results_bytes INTEGER NOT NULL DEFAULT 0,
+                    counts TEXT NOT NULL DEFAULT '{}',
+                    statistics TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner_pid INTEGER,
+                    lease_expires REAL
+                )
+            """)
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in LEASE_COLUMNS.items():
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_chunks (
+                    job_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    row_start INTEGER NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    byte_offset INTEGER NOT NULL,
+                    PRIMARY KEY (job_id, chunk_index)
+                )
+            """)
+
+    def create(self, job: Dict):
+        with self.lock, self.conn:
+            columns = ", ".join(job)
+            placeholders = ", ".join("?" for _ in job)
+            self.conn.execute(f"INSERT INTO jobs ({columns}) VALUES ({placeholders})", list(job.values()))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def update(self, job_id: str, **fields):
+        with self.lock, self.conn:
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            self.conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+
+    def commit_chunk(self, job_id: str, owner_pid: int, chunk_index: int, row_start: int, row_count: int,
+                     byte_offset: int, results_bytes: int, counts: Dict[str, int], lease_seconds: float):
+        """Record a flushed chunk, advance the job's progress and renew its lease atomically"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET rows_processed = ?, chunks_done = ?, results_bytes = ?, counts = ?, "
+                "lease_expires = ? WHERE id = ? AND owner_pid = ?",
+                (row_start + row_count, chunk_index + 1, results_bytes, json.dumps(counts),
+                 time.time() + lease_seconds, job_id, owner_pid)
+            )
+            if cursor.rowcount != 1:
+                raise LeaseLost(f"Job {job_id} is no longer owned by pid {owner_pid}")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO job_chunks VALUES (?, ?, ?, ?, ?)",
+                (job_id, chunk_index, row_start, row_count, byte_offset)
+            )
+    
+    # ----- Ownership -----
+    def claim_next(self, owner_pid: int, lease_seconds: float, max_running: int) -> Optional[Dict]:
+        """Claim the oldest queued job for `owner_pid` unless `max_running` jobs are already running
+        
+        The count and the claim happen in one write transaction, so the limit
+        holds across every process that shares the store.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            running = self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0]
+            if running >= max_running:
+                return None
+            queued = self.conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND cancel_requested = 0 ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if queued is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', owner_pid = ?, lease_expires = ?, "
+                "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (owner_pid, now + lease_seconds, now, queued['id'])
+            )
+            claimed = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (queued['id'],)).fetchone()
+        return dict(claimed)
+    
+    def renew_lease(self, job_id: str, owner_pid: int, lease_seconds: float) -> bool:
+        """Extend a running job's lease; False if `owner_pid` no longer owns it"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner_pid = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, owner_pid)
+            )
+        return cursor.rowcount == 1
+    
+    def release(self, job_id: str, owner_pid: int, **fields) -> bool:
+        """Update an owned job and give up its lease; False if `owner_pid` no longer owns it"""
+        with self.lock, self.conn:
+            assignments = "".join(f"{name} = ?, " for name in fields)
+            cursor = self.conn.execute(
+                f"UPDATE jobs SET {assignments}owner_pid = NULL, lease_expires = NULL WHERE id = ? AND owner_pid = ?",
+                [*fields.values(), job_id, owner_pid]
+            )
+        return cursor.rowcount == 1
+    
+    def requeue_owned(self, owner_pid: int) -> List[str]:
+        """Put the running jobs of a (stopped or dead) process back in the queue"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, owner_pid, lease_expires FROM jobs WHERE status = 'running' AND owner_pid = ?",
+                (owner_pid,)
+            ).fetchall()
+        return self._requeue(rows)
+    
+    def requeue_orphaned(self, is_alive: Callable[[Optional[int]], bool] = process_alive) -> List[str]:
+        """Put running jobs whose lease expired or whose owner process is gone back in the queue"""
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, owner_pid, lease_expires FROM jobs WHERE status = 'running'"
+            ).fetchall()
+        orphaned = [
+            row for row in rows
+            if row['lease_expires'] is None or row['lease_expires'] < now or not is_alive(row['owner_pid'])
+        ]
+        return self._requeue(orphaned) if orphaned else []
+    
+    def _requeue(self, rows) -> List[str]:
+        # Only if neither owner nor lease changed since the rows were read, so a
+        # job whose owner renewed its lease meanwhile is left alone
+        requeued = []
+        with self.lock, self.conn:
+            for row in rows:
+                cursor = self.conn.execute(
+                    "UPDATE jobs SET status = 'queued', owner_pid = NULL, lease_expires = NULL "
+                    "WHERE id = ? AND status = 'running' AND owner_pid IS ? AND lease_expires IS ?",
+                    (row['id'], row['owner_pid'], row['lease_expires'])
+                )
+                if cursor.rowcount == 1:
+                    requeued.append(row['id'])
+        return requeued
+
+    def chunk_for_row(self, job_id: str, row: int) -> Optional[Dict]:
+        """The committed chunk containing a 0-based result row"""
+        with self.lock:
+            found = self.conn.execute(
+                "SELECT * FROM job_chunks WHERE job_id = ? AND row_start <= ? "
+                "ORDER BY row_start DESC LIMIT 1",
+                (job_id, row)
+            ).fetchone()
+        return dict(found) if found is not None else None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ===== JOB MANAGER =====
+class JobManager:
+    """Run stored uploads through the model in the background, chunk by chunk
+
+    `iter_chunks(path, upload_format, chunk_size)` yields DataFrames,
+    `score_chunk(model_type, chunk, row_offset)` is awaited for each of them and
+    returns row-format predictions plus per-class counts, and
+    `summarize(counts, rows)` builds the final statistics.
+
+    Jobs are claimed from the shared store, so at most `max_concurrent` run at
+    once across every process using it; the rest wait in the queued state. A
+    running job holds a lease that its process renews while it works. Jobs
+    whose lease expires or whose process dies go back to the queue and resume
+    from their last committed chunk in whichever process claims them next.
+    """
+
+    def __init__(self, store: JobStore, jobs_dir: str, max_concurrent: int,
+                 iter_chunks: Callable[..., Iterator], score_chunk: Callable, summarize: Callable,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_seconds: float = DEFAULT_POLL_SECONDS):
+        self.store = store
+        self.jobs_dir = jobs_dir
+        self.max_concurrent = max_concurrent
+        self.iter_chunks = iter_chunks
+        self.score_chunk = score_chunk
+        self.summarize = summarize
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.wakeup: Optional[asyncio.Event] = None
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self):
+        """Start claiming queued jobs, including interrupted ones whose owner is gone"""
+        self.wakeup = asyncio.Event()
+        self.dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        """Stop running jobs and put them back in the queue to resume from their last chunk"""
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+            await asyncio.gather(self.dispatcher, return_exceptions=True)
+            self.dispatcher = None
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks.clear()
+        for job_id in self.store.requeue_owned(os.getpid()):
+            logger.info(f"⏸️ Job {job_id} paused; it resumes from its last committed chunk")
+
+    def wake(self):
+        """Look for claimable jobs now instead of at the next poll"""
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def create_job(self, model_type: str, filename: str, upload_format: str, source, chunk_size: int,
+                   total_rows: Optional[int] = None) -> Dict:
+        """Persist an upload to disk and register it as a queued job (blocking I/O)"""
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        input_path = os.path.join(job_dir, f"input.{upload_format}")
+        with open(input_path, "wb") as f:
+            shutil.copyfileobj(source, f, 1 << 20)
+        results_path = os.path.join(job_dir, "results.ndjson")
+        open(results_path, "wb").close()
+
+        self.store.create({
+            "id": job_id,
+            "model_type": model_type,
+            "filename": filename,
+            "upload_format": upload_format,
+            "input_path": input_path,
+            "results_path": results_path,
+            "status": "queued",
+            "chunk_size": chunk_size,
+            "total_rows": total_rows,
+            "created_at": time.time()
+        })
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Request cancellation; a running job stops after its current chunk"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if job['status'] not in FINISHED_STATUSES:
+            self.store.update(job_id, cancel_requested=1)
+            if job['status'] == "queued":
+                self.store.update(job_id, status="cancelled", finished_at=time.time())
+        return self.store.get(job_id)
+
+    async def _dispatch(self):
+        """Claim jobs while the global limit allows, on every wake-up and poll interval"""
+        while True:
+            self.wakeup.clear()
+            try:
+                for job_id in self.store.requeue_orphaned():
+                    logger.info(f"🔁 Job {job_id} lost its worker; requeued to resume from its last chunk")
+                while True:
+                    job = self.store.claim_next(os.getpid(), self.lease_seconds, self.max_concurrent)
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self._run(job))
+                    self.tasks[job['id']] = task
+                    task.add_done_callback(lambda _, job_id=job['id']: self.tasks.pop(job_id, None))
+            except sqlite3.Error as e:
+                logger.error(f"❌ Claiming jobs failed: {e}")
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat(self, job_id: str, task: asyncio.Task):
+        """Renew a job's lease while it runs; stop it if another process took it over"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not self.store.renew_lease(job_id, os.getpid(), self.lease_seconds):
+                logger.warning(f"⚠️ Job {job_id} lost its lease; stopping it here")
+                task.cancel()
+                return
+
+    async def _run(self, job: Dict):
+        job_id = job['id']
+        logger.info(f"🛰️ Job {job_id} started ({job['model_type']}, {job['filename']}) at row {job['rows_processed']}")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, asyncio.current_task()))
+        try:
+            await self._process(job)
+        except asyncio.CancelledError:
+            raise  # Shutdown or lost lease: the job resumes from its last committed chunk
+        except LeaseLost as e:
+            logger.warning(f"⚠️ {e}; stopping it here")
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} failed: {e}")
+            self.store.release(job_id, os.getpid(), status="failed", error=str(e), finished_at=time.time())
+        finally:
+            heartbeat.cancel()
+            self.wake()  # A slot is free for the next queued job
+
+    async def _process(self, job: Dict):
+        job_id = job['id']
+        owner_pid = os.getpid()
+        rows_done = job['rows_processed']
+        chunk_index = job['chunks_done']
+        counts = json.loads(job['counts']) or {}
+
+        # Drop any partially written chunk from before an interruption
+        with open(job['results_path'], "r+b") as f:
+            f.truncate(job['results_bytes'])
+
+        chunks = self.iter_chunks(job['input_path'], job['upload_format'], job['chunk_size'])
+        row_offset = 0
+        with open(job['results_path'], "ab") as results:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                if row_offset < rows_done:
+                    # Already committed before a restart; chunk boundaries are stable
+                    row_offset += len(chunk)
+                    continue
+
+                if self.store.get(job_id)['cancel_requested']:
+                    self.store.release(job_id, owner_pid, status="cancelled", finished_at=time.time())
+                    logger.info(f"🛑 Job {job_id} cancelled at row {row_offset}")
+                    return
+
+                scored = await self.score_chunk(job['model_type'], chunk, row_offset)
+                for label, count in scored['counts'].items():
+                    counts[label] = counts.get(label, 0) + count
+
+                # Never append to a results file another process has taken over
+                if not self.store.renew_lease(job_id, owner_pid, self.lease_seconds):
+                    raise LeaseLost(f"Job {job_id} is no longer owned by pid {owner_pid}")
+                byte_offset = results.tell()
+                results.write("".join(json.dumps(p) + "\n" for p in scored['predictions']).encode())
+                results.flush()
+                self.store.commit_chunk(
+                    job_id, owner_pid, chunk_index, row_offset, len(chunk), byte_offset, results.tell(), counts,
+                    self.lease_seconds
+                )
+                row_offset += len(chunk)
+                chunk_index += 1
+
+        statistics = self.summarize(counts, row_offset)
+        released = self.store.release(
+            job_id,
+            owner_pid,
+            status="completed",
+            total_rows=row_offset,
+            statistics=json.dumps(statistics),
+            finished_at=time.time()
+        )
+        if not released:
+            raise LeaseLost(f"Job {job_id} is no longer owned by pid {owner_pid}")
+        logger.info(f"✅ Job {job_id} completed: {row_offset} rows in {chunk_index} chunks")
+
+    def read_results(self, job: Dict, offset: int, limit: int) -> List[Dict]:
+        """Page through committed predictions using the chunk index to seek (blocking I/O)"""
+        if offset >= job['rows_processed'] or limit <= 0:
+            return []
+
+        chunk = self.store.chunk_for_row(job['id'], offset)
+        if chunk is None:
+            return []
+
+        predictions = []
+        with open(job['results_path'], "rb") as f:
+            f.seek(chunk['byte_offset'])
+            for _ in range(offset - chunk['row_start']):
+                f.readline()
+            while len(predictions) < limit and f.tell() < job['results_bytes']:
+                predictions.append(json.loads(f.readline()))
+        return predictions
+
+    def iter_results(self, job: Dict, block_size: int = 1 << 20) -> Iterator[bytes]:
+        """Stream the committed part of the results file as NDJSON"""
+        remaining = job['results_bytes']
+        with open(job['results_path'], "rb") as f:
+            while remaining > 0:
+                block = f.read(min(block_size, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+
+def describe_job(job: Dict) -> Dict:
+    """Public view of a job row"""
+    total_rows = job['total_rows']
+    return {
+        "job_id": job['id'],
+        "status": job['status'],
+        "model_type": job['model_type'],
+        "filename": job['filename'],
+        "format": job['upload_format'],
+        "chunk_size": job['chunk_size'],
+        "rows_processed": job['rows_processed'],
+        "total_rows": total_rows,
+        "progress": min(1.0, job['rows_processed'] / total_rows) if total_rows else None,
+        "chunks_done": job['chunks_done'],
+        "cancel_requested": bool(job['cancel_requested']),
+        "statistics": json.loads(job['statistics']) if job['statistics'] else None,
+        "error": job['error'],
+        "created_at": job['created_at'],
+        "started_at": job['started_at'],
+        "finished_at": job['finished_at']
+    }
@@ -0,0 +1,199 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+
+from model_registry import file_checksum
+
+BUNDLE_FORMAT = 1
+DEFAULT_BUNDLE_DIR = os.path.join('ml_models', 'bundles')
+CURRENT_FILE = 'CURRENT'  # Name of the active bundle, replaced atomically
+MANIFEST_FILE = 'manifest.json'
+
+class BundleError(Exception):
+    """A bundle is missing, malformed, corrupted or incompatible with the server"""
+
+# ===== WRITING =====
+def write_bundle(root: str, models: Dict[str, object], scaler, feature_names: Sequence[str],
+                 class_labels: Sequence[str], training: Optional[Dict] = None, activate: bool = True,
+                 medians: Optional[Dict[str, float]] = None, nan_policy: Optional[Dict[str, str]] = None,
+                 force: bool = False) -> str:
+    """Write models, scaler and manifest as a new bundle version and return its directory
+
+    Models must take raw features in `feature_names` order (e.g. a scaler +
+    estimator pipeline) and predict codes indexing `class_labels`. `medians`
+    are the per-feature values missing inputs were filled with in training;
+    the server fills them the same way. `nan_policy` maps features to the
+    server's missing-value rules (route, median, reject or a constant). The
+    bundle is assembled in a staging directory and renamed into place, so a
+    reader never sees a partial bundle; with `activate` it also becomes
+    CURRENT (see `set_current` for `force`).
+    """
+    os.makedirs(root, exist_ok=True)
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    staging = tempfile.mkdtemp(dir=root, prefix=".staging-")
+    try:
+        entries = {}
+        for name, model in models.items():
+            filename = f"{name}.pkl"
+            joblib.dump(model, os.path.join(staging, filename))
+            entries[name] = {"file": filename, "checksum": file_checksum(os.path.join(staging, filename))}
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "feature_names": list(feature_names),
+            "class_mapping": {str(code): label for code, label in enumerate(class_labels)},
+            "models": entries,
+            "training": training or {}
+        }
+        if medians is not None:
+            manifest["medians"] = {name: float(medians[name]) for name in feature_names if name in medians}
+        if nan_policy:
+            manifest["nan_policy"] = dict(nan_policy)
+        if scaler is not None:
+            joblib.dump(scaler, os.path.join(staging, "scaler.pkl"))
+            manifest["scaler"] = {"file": "scaler.pkl", "checksum": file_checksum(os.path.join(staging, "scaler.pkl"))}
+
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(staging, os.path.join(root, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if activate:
+        set_current(root, version, force=force)
+    return os.path.join(root, version)
+
+def set_current(root: str, version: str, force: bool = False):
+    """Point CURRENT at an existing bundle version
+
+    Unless `force`, a bundle that lacks models of the active one is refused,
+    since activating it would stop serving them.
+    """
+    manifest = read_manifest(os.path.join(root, version))
+    dropped = dropped_models(root, manifest)
+    if dropped and not force:
+        raise BundleError(
+            f"Bundle {version} does not include {dropped} served by bundle {current_version(root)}; "
+            f"activate it with force to drop them"
+        )
+    pointer = os.path.join(root, f".{CURRENT_FILE}.{uuid.uuid4().hex[:6]}")
+    with open(pointer, "w") as f:
+        f.write(version + "\n")
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+
+# ===== READING =====
+def current_version(root: str) -> Optional[str]:
+    """Version named by CURRENT, or None when no bundle has been activated"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def dropped_models(root: str, manifest: Dict) -> List[str]:
+    """Models of the active bundle that `manifest` does not include"""
+    active = current_version(root)
+    if active is None or active == manifest["version"]:
+        return []
+    try:
+        current = read_manifest(os.path.join(root, active))
+    except BundleError:
+        return []
+    return [name for name in current["models"] if name not in manifest["models"]]
+
+def read_manifest(bundle_dir: str) -> Dict:
+    try:
+        with open(os.path.join(bundle_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BundleError(f"No readable manifest in {bundle_dir}: {e}")
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"Bundle {bundle_dir} has format {manifest.get('format')}, expected {BUNDLE_FORMAT}")
+    for key in ("version", "feature_names", "class_mapping", "models"):
+        if key not in manifest:
+            raise BundleError(f"Bundle manifest {bundle_dir} has no '{key}'")
+    return manifest
+
+def list_bundles(root: str) -> List[Dict]:
+    """Manifests of every complete bundle under `root`, newest first"""
+    bundles = []
+    if not os.path.isdir(root):
+        return bundles
+    for name in os.listdir(root):
+        if name.startswith(".") or not os.path.isdir(os.path.join(root, name)):
+            continue
+        try:
+            bundles.append(read_manifest(os.path.join(root, name)))
+        except BundleError:
+            continue
+    return sorted(bundles, key=lambda manifest: manifest["created_at"], reverse=True)
+
+def verify_artifact(path: str, checksum: str):
+    """Raise BundleError if a bundle file does not match its manifest checksum"""
+    actual = file_checksum(path)
+    if actual != checksum:
+        raise BundleError(f"Checksum mismatch for {path}: manifest {checksum}, file {actual}")
+
+# ===== SERVING =====
+class BundleModel:
+    """Bundle model seen through the server's feature order and class codes
+
+    The server builds one feature matrix for all models; this wrapper selects
+    the bundle's columns and translates its class codes, so a request that
+    holds a model from an older bundle keeps scoring it consistently while a
+    newer bundle is swapped in.
+    """
+
+    def __init__(self, model, feature_names: Sequence[str], serving_features: Sequence[str],
+                 class_codes: np.ndarray, medians: Optional[Dict[str, float]] = None):
+        self.model = model
+        self.medians = medians
+        self.bundle_feature_names = list(feature_names)
+        columns = np.array([list(serving_features).index(name) for name in feature_names], dtype=np.intp)
+        self.columns = None if np.array_equal(columns, np.arange(len(serving_features))) else columns
+        self.class_codes = class_codes  # Bundle class code -> serving class code
+        self.classes_ = class_codes[np.asarray(model.classes_, dtype=np.intp)]
+
+    def _select(self, X):
+        return X if self.columns is None else X[:, self.columns]
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self._select(X))
+
+    def predict(self, X):
+        return self.class_codes[np.asarray(self.model.predict(self._select(X)), dtype=np.intp).ravel()]
+
+    def feature_means(self, n_features: int) -> Optional[np.ndarray]:
+        """Training means in serving feature order (0 for columns the bundle does not use)"""
+        steps = getattr(self.model, 'steps', None)
+        mean = getattr(steps[0][1], 'mean_', None) if steps else None
+        if mean is None or len(mean) != len(self.bundle_feature_names):
+            return None
+        means = np.zeros(n_features, dtype=np.float32)
+        means[self.columns if self.columns is not None else slice(None)] = mean
+        return means
+
+    def feature_medians(self, n_features: int) -> Optional[np.ndarray]:
+        """Training medians in serving feature order, if the bundle recorded them"""
+        if self.medians is None:
+            return None
+        medians = np.zeros(n_features, dtype=np.float32)
+        medians[self.columns if self.columns is not None else slice(None)] = [
+            self.medians.get(name, np.nan) for name in self.bundle_feature_names
+        ]
+        return medians
+
+    def __getattr__(self, name):
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+import joblib
+
+try:
+    import psutil
+except ImportError:  # Resident size falls back to the artifact size
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+MODEL_STATES = ("unloaded", "loading", "ready", "failed")
+
+def file_checksum(file_path: str) -> str:
+    """Short SHA-256 of a file, used as the artifact version"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def load_pipeline(file_path: str):
+    """Load a pickled pipeline, unwrapping (pipeline, metadata) tuples"""
+    pipeline_data = joblib.load(file_path)
+    if isinstance(pipeline_data, tuple) and len(pipeline_data) == 2:
+        return pipeline_data[0]  # Extract pipeline
+    return pipeline_data
+
+def _current_rss() -> Optional[int]:
+    if psutil is None:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss
+
+# ===== MODEL REGISTRY =====
+class ModelRegistry:
+    """Load models on first use and keep the resident set within a memory budget
+
+    Each registered model is `unloaded` until something asks for it, then
+    `loading` while its artifact is read, then `ready`. Load time, artifact
+    version and approximate resident size are recorded per model. When the
+    total resident size exceeds `memory_budget_bytes` (0 = unlimited) the
+    least recently used ready models are evicted; requests already holding a
+    reference keep working and the model is simply reloaded on next use.
+    """
+
+    def __init__(self, model_files: Dict[str, str], memory_budget_bytes: int = 0,
+                 loader: Callable[[str], object] = load_pipeline):
+        self.model_files = dict(model_files)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loader = loader
+        self.lock = threading.RLock()
+        self.load_lock = threading.Lock()  # One load at a time keeps RSS deltas meaningful
+        self.models: "OrderedDict[str, object]" = OrderedDict()  # Ready models in LRU order
+        self.info: Dict[str, Dict] = {
+            name: self._empty_info(path) for name, path in self.model_files.items()
+        }
+        self.load_listeners: List[Callable[[str, object], None]] = []
+
+    @staticmethod
+    def _empty_info(path: str) -> Dict:
+        return {
+            "state": "unloaded",
+            "path": path,
+            "version": None,
+            "load_seconds": None,
+            "resident_bytes": None,
+            "loads": 0,
+            "evictions": 0,
+            "last_used": None,
+            "error": None
+        }
+
+    def names(self) -> List[str]:
+        """Models that can be served: registered and present on disk"""
+        return [name for name, path in self.model_files.items() if os.path.exists(path)]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.model_files and os.path.exists(self.model_files[name])
+
+    def is_ready(self, name: str) -> bool:
+        with self.lock:
+            return name in self.models
+
+    def add_load_listener(self, listener: Callable[[str, object], None]):
+        """Call `listener(name, model)` every time a model becomes ready"""
+        self.load_listeners.append(listener)
+
+    def get(self, name: str):
+        """Return a ready model, loading it on first use"""
+        with self.lock:
+            model = self.models.get(name)
+            if model is not None:
+                self.models.move_to_end(name)
+                self.info[name]["last_used"] = time.time()
+                return model
+        if name not in self.model_files:
+            raise KeyError(f"Model '{name}' is not registered")
+        return self._load(name)
+
+    def version(self, name: str) -> Optional[str]:
+        return self.info[name]["version"] if name in self.info else None
+
+    def preload(self, names: Iterable[str]):
+        for name in names:
+            self.get(name)
+
+    def _load(self, name: str):
+        with self.load_lock:
+            with self.lock:
+                if name in self.models:  # Loaded by another thread while we waited
+                    self.models.move_to_end(name)
+                    return self.models[name]
+                self.info[name]["state"] = "loading"
+                self.info[name]["error"] = None
+
+            path = self.model_files[name]
+            logger.info(f"🔄 Loading model {name} from {path}")
+            rss_before = _current_rss()
+            started = time.perf_counter()
+            try:
+                version = file_checksum(path)
+                model = self.loader(path)
+            except Exception as e:
+                with self.lock:
+                    self.info[name]["state"] = "failed"
+                    self.info[name]["error"] = str(e)
+                logger.error(f"❌ Loading model {name} failed: {e}")
+                raise
+            load_seconds = time.perf_counter() - started
+
+            rss_after = _current_rss()
+            resident_bytes = os.path.getsize(path)
+            if rss_before is not None and rss_after - rss_before > 0:
+                resident_bytes = rss_after - rss_before
+
+            with self.lock:
+                self.models[name] = model
+                info = self.info[name]
+                info.update(
+                    state="ready",
+                    version=version,
+                    load_seconds=load_seconds,
+                    resident_bytes=resident_bytes,
+                    last_used=time.time()
+                )
+                info["loads"] += 1
+                self._evict_over_budget(keep=name)
+
+            logger.info(f"✅ Model {name} ready in {load_seconds:.2f}s (~{resident_bytes / 1e6:.1f} MB)")
+
+        for listener in self.load_listeners:
+            try:
+                listener(name, model)
+            except Exception as e:
+                logger.error(f"Model load listener failed for {name}: {e}")
+        return model
+
+    def resident_bytes(self) -> int:
+        with self.lock:
+            return sum(self.info[name]["resident_bytes"] or 0 for name in self.models)
+
+    def _evict_over_budget(self, keep: str):
+        if self.memory_budget_bytes <= 0:
+            return
+        for name in list(self.models):
+            if self.resident_bytes() <= self.memory_budget_bytes:
+                break
+            if name != keep:
+                self.evict(name)
+
+    def evict(self, name: str) -> bool:
+        """Drop a ready model; it is reloaded on next use"""
+        with self.lock:
+            if self.models.pop(name, None) is None:
+                return False
+            self.info[name]["state"] = "unloaded"
+            self.info[name]["evictions"] += 1
+        logger.info(f"♻️ Evicted model {name}")
+        return True
+
+    def status(self) -> Dict[str, Dict]:
+        """State, version, load time and resident size of every registered model"""
+        with self.lock:
+            return {
+                name: {**info, "available": os.path.exists(info["path"])}
+                for name, info in self.info.items()
+            }
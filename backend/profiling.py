@@ -0,0 +1,39 @@
+import os
+import resource
+import threading
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:  # Peak RSS falls back to the process high-water mark
+    psutil = None
+
+class RSSSampler:
+    """Track the peak resident set size while a block runs"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def current() -> int:
+        if psutil is not None:
+            return psutil.Process(os.getpid()).memory_info().rss
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # High-water mark on Linux
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def __enter__(self) -> 'RSSSampler':
+        self.start = self.peak = self.current()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        self.peak = max(self.peak, self.current())
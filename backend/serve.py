@@ -0,0 +1,200 @@
+import argparse
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("serve")
+
+RESPAWN_DELAY = 1.0  # Seconds before replacing a worker that died
+SHUTDOWN_TIMEOUT = 30.0
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket created once in the parent and inherited by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def preload_models(service):
+    """Load every model in the parent and freeze the heap before forking
+
+    Model weights live in NumPy buffers, native booster memory and the
+    memory-mapped compiled tree arrays, none of which are written by
+    refcounting, so forked workers share those pages copy-on-write.
+    gc.freeze() moves the loaded objects out of the collector's generations
+    so collections in the workers do not touch (and copy) their headers.
+    """
+    if service.INFERENCE_EXECUTOR == "process":
+        # Models load in the spawned inference processes of each worker instead
+        service.load_ml_models()
+        return
+    service.PRELOAD_MODELS = ["all"]
+    service.load_ml_models()
+    gc.collect()
+    gc.freeze()
+
+# ===== WORKERS =====
+def run_worker(service, worker_id: int, sock: socket.socket, ready_fd: int, args):
+    """Body of a forked worker; reports readiness on `ready_fd` once startup completed"""
+    service.WORKER_ID = worker_id
+
+    def notify_ready():
+        os.write(ready_fd, b"1")
+        os.close(ready_fd)
+
+    # Runs after the app's own startup handler
+    service.app.router.add_event_handler("startup", notify_ready)
+    config = uvicorn.Config(
+        service.app,
+        log_level=args.log_level,
+        timeout_keep_alive=args.keep_alive
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+class Supervisor:
+    """Fork workers from the preloaded parent, track their readiness and replace dead ones"""
+
+    def __init__(self, service, sock: socket.socket, workers: int, args):
+        self.service = service
+        self.sock = sock
+        self.workers = workers
+        self.args = args
+        self.pids: Dict[int, int] = {}           # pid -> worker id
+        self.ready_pipes: Dict[int, int] = {}    # read fd -> worker id
+        self.ready: Dict[int, bool] = {}
+        self.stopping = False
+
+    def spawn(self, worker_id: int):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                run_worker(self.service, worker_id, self.sock, write_fd, self.args)
+            except BaseException:
+                logger.exception(f"❌ Worker {worker_id} crashed")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        os.close(write_fd)
+        self.pids[pid] = worker_id
+        self.ready_pipes[read_fd] = worker_id
+        self.ready[worker_id] = False
+        logger.info(f"🍴 Forked worker {worker_id} (pid {pid})")
+
+    def _collect_readiness(self, timeout: float):
+        if not self.ready_pipes:
+            time.sleep(timeout)
+            return
+        try:
+            readable, _, _ = select.select(list(self.ready_pipes), [], [], timeout)
+        except InterruptedError:
+            return
+        for fd in readable:
+            worker_id = self.ready_pipes.pop(fd)
+            signalled = os.read(fd, 1)
+            os.close(fd)
+            if signalled:
+                self.ready[worker_id] = True
+                logger.info(f"✅ Worker {worker_id} ready")
+                if all(self.ready.values()):
+                    logger.info(f"🚀 All {self.workers} workers ready on http://{self.args.host}:{self.args.port}")
+
+    def _reap(self):
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker_id = self.pids.pop(pid)
+            self.ready[worker_id] = False
+            for fd, owner in list(self.ready_pipes.items()):
+                if owner == worker_id:
+                    del self.ready_pipes[fd]
+                    os.close(fd)
+            if not self.stopping:
+                logger.error(f"❌ Worker {worker_id} (pid {pid}) exited with status {status}; restarting")
+            self.requeue_jobs(worker_id, pid)
+            if not self.stopping:
+                time.sleep(RESPAWN_DELAY)
+                self.spawn(worker_id)
+
+    def requeue_jobs(self, worker_id: int, pid: int):
+        """Hand the batch jobs a dead worker was running back to the queue for the others"""
+        try:
+            requeued = self.service.requeue_worker_jobs(pid)
+        except Exception as e:
+            logger.error(f"❌ Could not requeue the jobs of worker {worker_id}: {e}")
+            return
+        if requeued:
+            logger.info(f"🔁 Requeued {len(requeued)} jobs of worker {worker_id} (pid {pid}): {requeued}")
+
+    def shutdown(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("🛑 Stopping workers...")
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.shutdown)
+        signal.signal(signal.SIGINT, self.shutdown)
+        for worker_id in range(self.workers):
+            self.spawn(worker_id)
+
+        deadline = None
+        while self.pids:
+            self._collect_readiness(0.5)
+            self._reap()
+            if self.stopping:
+                deadline = deadline or time.monotonic() + SHUTDOWN_TIMEOUT
+                if time.monotonic() > deadline:
+                    for pid in list(self.pids):
+                        os.kill(pid, signal.SIGKILL)
+        logger.info("👋 All workers stopped")
+        return 0
+
+# ===== CLI =====
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve SpaceEx with preloaded models shared by forked workers")
+    parser.add_argument('--host', default=os.getenv("SPACEEX_HOST", "0.0.0.0"))
+    parser.add_argument('--port', type=int, default=int(os.getenv("SPACEEX_PORT", "8000")))
+    parser.add_argument('--workers', type=int, default=int(os.getenv("SPACEEX_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument('--keep-alive', type=int, default=5, help="Keep-alive timeout in seconds")
+    parser.add_argument('--log-level', default="info")
+    args = parser.parse_args(argv)
+
+    import app as service
+
+    logger.info(f"🔄 Preloading models for {args.workers} workers...")
+    started = time.perf_counter()
+    preload_models(service)
+    logger.info(f"✅ Models preloaded in {time.perf_counter() - started:.1f}s")
+
+    sock = bind_socket(args.host, args.port)
+    return Supervisor(service, sock, max(1, args.workers), args).run()
+
+if __name__ == "__main__":
+    sys.exit(main())
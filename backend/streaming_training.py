@@ -0,0 +1,203 @@
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+DEFAULT_CHUNK_SIZE = 100_000
+MEDIAN_SAMPLE_SIZE = 100_000  # Values per column kept to estimate the median
+EXCLUDE_COLUMNS = ['label', 'target', 'source']
+
+# ExtMemQuantileDMatrix (xgboost >= 3.0) keeps quantized pages in the cache;
+# older releases take the iterator through a plain DMatrix
+ExtMemQuantileDMatrix = getattr(xgb, 'ExtMemQuantileDMatrix', None)
+
+def test_mask(chunk_index: int, rows: int, test_size: float, seed: int) -> np.ndarray:
+    """Rows of a chunk held out for evaluation; identical on every pass over the file"""
+    return np.random.default_rng([seed, chunk_index]).random(rows) < test_size
+
+# ===== FIRST PASS: STATISTICS =====
+class ColumnStatistics:
+    """Streaming per-column statistics for median imputation and standard scaling
+
+    Means and variances of the observed values are merged chunk by chunk
+    (Chan et al.), so they do not depend on the chunk size. Medians come from
+    a bottom-k random sample of MEDIAN_SAMPLE_SIZE values per column, so the
+    memory used is fixed no matter how many rows are read.
+    """
+
+    def __init__(self, n_columns: int, sample_size: int = MEDIAN_SAMPLE_SIZE, seed: int = 42):
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.count = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.missing = np.zeros(n_columns)
+        self.samples = [(np.empty(0), np.empty(0)) for _ in range(n_columns)]  # (priorities, values)
+
+    def update(self, X: np.ndarray, for_scaler: np.ndarray):
+        """Add a chunk; only rows flagged in `for_scaler` count towards the scaler"""
+        observed = ~np.isnan(X)
+        for j in range(X.shape[1]):
+            values = X[observed[:, j], j]
+            priorities = self.rng.random(len(values))
+            kept_priorities, kept_values = self.samples[j]
+            priorities = np.concatenate([kept_priorities, priorities])
+            values = np.concatenate([kept_values, values])
+            if len(values) > self.sample_size:
+                keep = np.argpartition(priorities, self.sample_size)[:self.sample_size]
+                priorities, values = priorities[keep], values[keep]
+            self.samples[j] = (priorities, values)
+
+        scaled = X[for_scaler]
+        chunk_observed = ~np.isnan(scaled)
+        chunk_count = chunk_observed.sum(axis=0)
+        chunk_mean = np.divide(np.nansum(scaled, axis=0), chunk_count, out=np.zeros(X.shape[1]), where=chunk_count > 0)
+        chunk_m2 = np.nansum((scaled - chunk_mean) ** 2, axis=0)
+        self._merge(chunk_count, chunk_mean, chunk_m2)
+        self.missing += len(scaled) - chunk_count
+
+    def _merge(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray):
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = np.where(total > 0, self.mean + delta * count / total, 0.0)
+            self.m2 = np.where(total > 0, self.m2 + m2 + delta ** 2 * self.count * count / total, 0.0)
+        self.count = total
+
+    def medians(self) -> np.ndarray:
+        return np.array([np.median(values) if len(values) else 0.0 for _, values in self.samples])
+
+    def scaler(self, feature_names: List[str]) -> StandardScaler:
+        """StandardScaler fitted to the median-imputed training rows"""
+        medians = self.medians()
+        count, mean, m2 = self.count.copy(), self.mean.copy(), self.m2.copy()
+        # Imputed values are `missing` copies of the median
+        total = count + self.missing
+        delta = medians - mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(total > 0, mean + delta * self.missing / total, 0.0)
+            m2 = np.where(total > 0, m2 + delta ** 2 * count * self.missing / total, 0.0)
+            variance = np.where(total > 0, m2 / total, 0.0)
+
+        scaler = StandardScaler()
+        scaler.mean_ = mean
+        scaler.var_ = variance
+        scaler.scale_ = np.where(variance > np.finfo(np.float64).eps, np.sqrt(variance), 1.0)
+        scaler.n_samples_seen_ = int(total.max()) if len(total) else 0
+        scaler.n_features_in_ = len(feature_names)
+        scaler.feature_names_in_ = np.array(feature_names, dtype=object)
+        return scaler
+
+# ===== SECOND PASS: EXTERNAL-MEMORY TRAINING =====
+class CatalogChunks(xgb.DataIter):
+    """Feeds one split of a CSV to XGBoost chunk by chunk"""
+
+    def __init__(self, path: str, chunk_size: int, prepare: Callable, cache_prefix: str):
+        super().__init__(cache_prefix=cache_prefix)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.prepare = prepare  # (chunk, chunk_index) -> (X, y) or None
+        self.reader = None
+        self.chunk_index = 0
+
+    def next(self, input_data: Callable) -> bool:
+        if self.reader is None:
+            self.reader = pd.read_csv(self.path, chunksize=self.chunk_size)
+            self.chunk_index = 0
+        for chunk in self.reader:
+            prepared = self.prepare(chunk, self.chunk_index)
+            self.chunk_index += 1
+            if prepared is not None:
+                X, y = prepared
+                input_data(data=X, label=y)
+                return True
+        return False
+
+    def reset(self):
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = None
+
+def train_xgboost_out_of_core(trainer, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                              test_size: float = 0.2, seed: int = 42, cache_dir: Optional[str] = None) -> Dict:
+    """Two streaming passes over `path`: statistics, then external-memory XGBoost training
+
+    Only one chunk, the median samples and XGBoost's on-disk page cache are
+    held at a time, so peak memory does not grow with the dataset.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    if 'label' not in header:
+        raise ValueError("❌ 'label' column not found in dataset!")
+    feature_cols = [col for col in header if col not in EXCLUDE_COLUMNS]
+
+    def features(chunk: pd.DataFrame) -> np.ndarray:
+        return chunk[feature_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+
+    print(f"📊 Pass 1: statistics over {path} in chunks of {chunk_size} rows...")
+    started = time.perf_counter()
+    statistics = ColumnStatistics(len(feature_cols), seed=seed)
+    total_rows = test_rows = 0
+    for chunk_index, chunk in enumerate(pd.read_csv(path, chunksize=chunk_size)):
+        held_out = test_mask(chunk_index, len(chunk), test_size, seed)
+        known = trainer.encode_target(chunk['label']).to_numpy() >= 0
+        statistics.update(features(chunk), ~held_out & known)
+        total_rows += len(chunk)
+        test_rows += int(held_out.sum())
+    medians = statistics.medians()
+    scaler = statistics.scaler(feature_cols)
+    print(f"   ✅ {total_rows} rows ({total_rows - test_rows} train / {test_rows} test) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    def prepare(chunk: pd.DataFrame, chunk_index: int, held_out_rows: bool) -> Optional[Tuple]:
+        labels = trainer.encode_target(chunk['label']).to_numpy()
+        rows = (test_mask(chunk_index, len(chunk), test_size, seed) == held_out_rows) & (labels >= 0)
+        if not rows.any():
+            return None
+        X = features(chunk)[rows]
+        X = np.where(np.isnan(X), medians, X)
+        X = ((X - scaler.mean_) / scaler.scale_).astype(np.float32)
+        return X, labels[rows].astype(np.float32)
+
+    model = trainer.build_xgboost(trainer.params['xgboost'])
+    params = {**model.get_xgb_params(), 'tree_method': 'hist'}
+    params.pop('n_jobs', None)
+    n_classes = len(trainer.classes)
+    if n_classes > 2:
+        params.update(objective='multi:softprob', num_class=n_classes)
+
+    print(f"🎯 Pass 2: external-memory XGBoost training ({model.n_estimators} rounds)...")
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=cache_dir) as cache:
+        chunks = CatalogChunks(
+            path, chunk_size, lambda chunk, index: prepare(chunk, index, False), os.path.join(cache, "train")
+        )
+        if ExtMemQuantileDMatrix is not None:
+            dtrain = ExtMemQuantileDMatrix(chunks, max_bin=params.get('max_bin') or 256)
+        else:
+            dtrain = xgb.DMatrix(chunks)
+        booster = xgb.train(params, dtrain, num_boost_round=model.n_estimators)
+        del dtrain
+    print(f"   ✅ Trained in {time.perf_counter() - started:.1f}s")
+    model.load_model(booster.save_raw())
+
+    # Streamed evaluation on the held-out rows
+    confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+    for chunk_index, chunk in enumerate(pd.read_csv(path, chunksize=chunk_size)):
+        prepared = prepare(chunk, chunk_index, True)
+        if prepared is not None:
+            X, y = prepared
+            np.add.at(confusion, (y.astype(np.int64), model.predict(X).astype(np.int64)), 1)
+
+    return {
+        "model": model,
+        "scaler": scaler,
+        "medians": dict(zip(feature_cols, medians.tolist())),
+        "feature_names": feature_cols,
+        "rows": total_rows,
+        "confusion_matrix": confusion
+    }
@@ -0,0 +1,98 @@
+import importlib
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend modules are imported flat, as when the server runs from backend/
+sys.path.insert(0, BACKEND_DIR)
+
+BASE_COLUMNS = [
+    'period', 'planet_radius', 'depth', 'equilibrium_temp', 'insolation',
+    'impact', 'duration', 'star_radius', 'star_mass', 'star_teff', 'kepmag'
+]
+
+def make_catalog(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic upload with the base columns of merged_unified_dataset.csv"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'period': rng.lognormal(2.0, 1.0, rows),
+        'planet_radius': rng.lognormal(0.5, 0.8, rows),
+        'depth': rng.lognormal(6.0, 1.5, rows),
+        'equilibrium_temp': rng.normal(900, 300, rows).clip(100),
+        'insolation': rng.lognormal(4.0, 2.0, rows),
+        'impact': rng.uniform(0, 1.2, rows),
+        'duration': rng.lognormal(1.2, 0.5, rows),
+        'star_radius': rng.lognormal(0.0, 0.3, rows),
+        'star_mass': rng.normal(1.0, 0.2, rows).clip(0.1),
+        'star_teff': rng.normal(5700, 600, rows),
+        'kepmag': rng.normal(14, 1.5, rows)
+    })
+
+def catalog_labels(catalog: pd.DataFrame) -> np.ndarray:
+    labels = np.ones(len(catalog), dtype=np.int64)  # Candidate
+    labels[(catalog['impact'] > 0.9) | (catalog['planet_radius'] > 6)] = 0
+    labels[(catalog['depth'] > 600) & (catalog['period'] < 15) & (labels == 1)] = 2
+    return labels
+
+def train_service_models(service) -> dict:
+    """Small pipelines of every served model type, fitted on a synthetic catalog"""
+    from catboost import CatBoostClassifier
+    from lightgbm import LGBMClassifier
+    from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBClassifier
+
+    catalog = make_catalog(1500, seed=1)
+    service.feature_names = list(service.SERVING_FEATURES)
+    X = service.build_feature_matrix(catalog)
+    y = catalog_labels(catalog)
+
+    def pipeline(model):
+        return Pipeline([('scaler', StandardScaler()), ('model', model)]).fit(X, y)
+
+    return {
+        'xgboost': pipeline(XGBClassifier(n_estimators=20, max_depth=3, n_jobs=1)),
+        'lightgbm': pipeline(LGBMClassifier(n_estimators=20, n_jobs=1, verbose=-1)),
+        'catboost': pipeline(CatBoostClassifier(iterations=20, verbose=0, thread_count=1, allow_writing_files=False)),
+        'votingensemble': pipeline(VotingClassifier(
+            [('lr', LogisticRegression(max_iter=500)), ('rf', RandomForestClassifier(n_estimators=20, random_state=0))],
+            voting='soft'
+        ))
+    }
+
+@pytest.fixture(scope="session")
+def service(tmp_path_factory):
+    """The app module serving small synthetic models from a scratch working directory"""
+    workdir = tmp_path_factory.mktemp("service")
+    for name in ("static", "templates"):
+        os.symlink(os.path.join(BACKEND_DIR, name), workdir / name)
+    os.makedirs(workdir / "ml_models")
+
+    previous_dir = os.getcwd()
+    os.chdir(workdir)  # The app resolves static files, models and jobs relative to it
+    try:
+        service = importlib.import_module("app")
+        service.BUNDLE_POLL_SECONDS = 0
+        for name, model in train_service_models(service).items():
+            joblib.dump(model, service.MODEL_FILES[name])
+        yield service
+    finally:
+        os.chdir(previous_dir)
+
+@pytest.fixture(scope="session")
+def client(service):
+    from fastapi.testclient import TestClient
+
+    with TestClient(service.app) as test_client:
+        yield test_client
+
+def csv_upload(catalog: pd.DataFrame, name: str = "catalog.csv") -> dict:
+    return {'file': (name, catalog.to_csv(index=False).encode())}
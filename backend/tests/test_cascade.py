@@ -0,0 +1,43 @@
+import numpy as np
+
+from conftest import csv_upload, make_catalog
+
+def cascade_features(service, rows=200, seed=40):
+    return service.preprocess_data(make_catalog(rows, seed=seed))
+
+def test_threshold_zero_keeps_the_first_stage(service, client):
+    features = cascade_features(service)
+    cascade = service.predict_cascade(features, 'xgboost', 'votingensemble', 0.0)
+    first = service.predict_rows('xgboost', features)
+    assert not cascade['escalated'].any()
+    np.testing.assert_array_equal(cascade['predictions'], first['predictions'])
+
+def test_threshold_above_one_escalates_every_row(service, client):
+    features = cascade_features(service)
+    cascade = service.predict_cascade(features, 'xgboost', 'votingensemble', 1.01)
+    second = service.predict_rows('votingensemble', features)
+    assert cascade['escalated'].all()
+    np.testing.assert_array_equal(cascade['predictions'], second['predictions'])
+    np.testing.assert_allclose(cascade['probabilities'], second['probabilities'])
+
+def test_only_low_confidence_rows_are_escalated(service, client):
+    features = cascade_features(service)
+    first = service.predict_rows('xgboost', features)
+    second = service.predict_rows('votingensemble', features)
+    threshold = float(np.median(first['confidence_scores']))
+    cascade = service.predict_cascade(features, 'xgboost', 'votingensemble', threshold)
+
+    low = first['confidence_scores'] < threshold
+    np.testing.assert_array_equal(cascade['escalated'], low)
+    np.testing.assert_allclose(cascade['probabilities'][low], second['probabilities'][low])
+    np.testing.assert_allclose(cascade['probabilities'][~low], first['probabilities'][~low])
+
+def test_cascade_response_reports_escalation(service, client):
+    response = client.post('/api/predict', data={'model_type': 'cascade', 'include_plot': 'false'},
+                           files=csv_upload(make_catalog(150, seed=41)))
+    assert response.status_code == 200
+    summary = response.json()['cascade']
+    assert [summary['first_stage'], summary['second_stage']] == list(service.CASCADE_STAGES)
+    assert summary['threshold'] == service.CASCADE_THRESHOLD
+    assert 0 <= summary['escalated_rows'] <= 150
+    assert summary['escalation_rate'] == summary['escalated_rows'] / 150
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from conftest import csv_upload, make_catalog
+
+def explain(client, catalog, **form):
+    return client.post('/api/explain', data={'model_type': 'xgboost', **form}, files=csv_upload(catalog))
+
+def test_contributions_add_up_to_the_margin(client):
+    response = explain(client, make_catalog(25, seed=50), top_k='3')
+    assert response.status_code == 200
+    body = response.json()
+    assert body['rows_processed'] == 25
+    for row in body['explanations']:
+        assert len(row['contributions']) == 3
+        total = row['base_value'] + sum(item['contribution'] for item in row['contributions'])
+        assert total + row['other_contribution'] == pytest.approx(row['margin'], abs=1e-4)
+        magnitudes = [abs(item['contribution']) for item in row['contributions']]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+
+def test_explained_class_matches_the_prediction(client):
+    catalog = make_catalog(40, seed=51)
+    explained = explain(client, catalog, top_k='0').json()
+    predicted = client.post('/api/predict', data={'model_type': 'xgboost', 'include_plot': 'false'},
+                            files=csv_upload(catalog)).json()
+    assert [row['prediction_code'] for row in explained['explanations']] == \
+        [row['prediction_code'] for row in predicted['predictions']]
+    assert all(len(row['contributions']) == len(explained['feature_names']) for row in explained['explanations'])
+    assert all(row['other_contribution'] == pytest.approx(0, abs=1e-6) for row in explained['explanations'])
+
+@pytest.mark.parametrize("model_type", ['lightgbm', 'catboost'])
+def test_other_tree_libraries_are_additive(service, client, model_type):
+    model = service.registry.get(model_type)
+    features = service.preprocess_data(make_catalog(20, seed=52))
+    explanation = service.explain_rows(model, features, service.feature_names)
+
+    margins = explanation['base_values'] + explanation['contributions'].sum(axis=1)
+    np.testing.assert_allclose(margins, explanation['margins'], atol=1e-6)
+    np.testing.assert_array_equal(explanation['classes'], model.predict(features).ravel())
+
+def test_models_without_tree_contributions_are_rejected(client):
+    response = explain(client, make_catalog(5, seed=53), model_type='votingensemble')
+    assert response.status_code == 400
+    assert 'native tree contributions' in response.json()['error']
+
+def test_upload_size_and_top_k_are_checked(service, client, monkeypatch):
+    assert explain(client, make_catalog(5), top_k='-1').status_code == 400
+    monkeypatch.setattr(service, "EXPLAIN_MAX_ROWS", 10)
+    response = explain(client, make_catalog(11))
+    assert response.status_code == 400
+    assert 'limited to 10 rows' in response.json()['error']
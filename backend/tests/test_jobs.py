@@ -0,0 +1,159 @@
+import asyncio
+import io
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+from jobs import JobManager, JobStore, LeaseLost
+
+ROWS = 10
+CHUNK_SIZE = 3
+
+def iter_chunks(path, upload_format, chunk_size):
+    rows = list(range(ROWS))
+    for start in range(0, ROWS, chunk_size):
+        yield rows[start:start + chunk_size]
+
+def summarize(counts, rows):
+    return {"rows": rows, "counts": counts}
+
+async def score_all(model_type, chunk, row_offset):
+    return {"predictions": [{"row": row} for row in chunk], "counts": {"A": len(chunk)}}
+
+def make_manager(tmp_path, score_chunk, max_concurrent=1):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    return JobManager(store, str(tmp_path), max_concurrent=max_concurrent, iter_chunks=iter_chunks,
+                      score_chunk=score_chunk, summarize=summarize, lease_seconds=30, poll_seconds=0.05)
+
+def create_job(manager):
+    return manager.create_job("xgboost", "upload.csv", "csv", io.BytesIO(b"rows"), CHUNK_SIZE)
+
+async def wait_for_status(store, job_id, status, timeout=10):
+    deadline = time.monotonic() + timeout
+    while store.get(job_id)['status'] != status:
+        assert time.monotonic() < deadline, store.get(job_id)
+        await asyncio.sleep(0.01)
+
+def read_rows(path):
+    with open(path) as f:
+        return [json.loads(line)["row"] for line in f]
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def test_resume_drops_partial_chunk_and_skips_committed_rows(tmp_path):
+    scored_offsets = []
+
+    async def interrupted():
+        blocked = asyncio.Event()
+
+        async def score_chunk(model_type, chunk, row_offset):
+            if row_offset >= 2 * CHUNK_SIZE:
+                blocked.set()
+                await asyncio.Event().wait()  # Interrupted while scoring the third chunk
+            return await score_all(model_type, chunk, row_offset)
+
+        manager = make_manager(tmp_path, score_chunk)
+        manager.start()
+        job = create_job(manager)
+        manager.wake()
+        await blocked.wait()
+        await manager.stop()
+        manager.store.close()
+        return job['id']
+
+    job_id = asyncio.run(interrupted())
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job = store.get(job_id)
+    assert job['status'] == "queued"
+    assert job['owner_pid'] is None
+    assert job['rows_processed'] == 2 * CHUNK_SIZE
+    # A crash after writing but before committing leaves a partial chunk behind
+    with open(job['results_path'], "ab") as f:
+        f.write(b'{"row": 6}\n{"ro')
+    store.close()
+
+    async def resumed():
+        async def score_chunk(model_type, chunk, row_offset):
+            scored_offsets.append(row_offset)
+            return await score_all(model_type, chunk, row_offset)
+
+        manager = make_manager(tmp_path, score_chunk)
+        manager.start()
+        await wait_for_status(manager.store, job_id, "completed")
+        await manager.stop()
+        return manager
+
+    manager = asyncio.run(resumed())
+    job = manager.store.get(job_id)
+    assert scored_offsets == [6, 9]
+    assert read_rows(job['results_path']) == list(range(ROWS))
+    assert job['rows_processed'] == ROWS
+    assert job['owner_pid'] is None
+    assert json.loads(job['statistics']) == {"rows": ROWS, "counts": {"A": ROWS}}
+    assert [p["row"] for p in manager.read_results(job, 4, 4)] == [4, 5, 6, 7]
+    assert b"".join(manager.iter_results(job)).count(b"\n") == ROWS
+    manager.store.close()
+
+def test_concurrency_limit_holds_across_processes_sharing_the_store(tmp_path):
+    first = JobStore(str(tmp_path / "jobs.db"))
+    second = JobStore(str(tmp_path / "jobs.db"))
+    manager = JobManager(first, str(tmp_path), 1, iter_chunks, score_all, summarize)
+    jobs = [create_job(manager) for _ in range(3)]
+
+    claimed = first.claim_next(1001, 30, max_running=2)
+    assert claimed['id'] == jobs[0]['id'] and claimed['owner_pid'] == 1001
+    assert second.claim_next(1002, 30, max_running=2)['id'] == jobs[1]['id']
+    assert second.claim_next(1002, 30, max_running=2) is None
+    assert first.claim_next(1001, 30, max_running=2) is None
+
+    first.release(jobs[0]['id'], 1001, status="completed")
+    assert second.claim_next(1002, 30, max_running=2)['id'] == jobs[2]['id']
+    first.close()
+    second.close()
+
+def test_only_orphaned_jobs_are_requeued(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    manager = JobManager(store, str(tmp_path), 1, iter_chunks, score_all, summarize)
+    live, dead, expired = [create_job(manager)['id'] for _ in range(3)]
+    store.claim_next(1001, 30, max_running=3)
+    store.claim_next(dead_pid(), 30, max_running=3)
+    store.claim_next(1003, -1, max_running=3)  # Lease already expired
+
+    alive = {1001, 1003}.__contains__
+    assert store.requeue_orphaned(alive) == [dead, expired]
+    assert store.get(live)['status'] == "running"
+    assert store.get(dead)['status'] == "queued"
+    assert store.requeue_owned(1001) == [live]
+    assert store.get(live)['status'] == "queued"
+    store.close()
+
+def test_lost_lease_stops_progress(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    manager = JobManager(store, str(tmp_path), 1, iter_chunks, score_all, summarize)
+    job_id = create_job(manager)['id']
+    store.claim_next(1001, 30, max_running=1)
+    store.requeue_owned(1001)
+    store.claim_next(1002, 30, max_running=1)
+
+    assert not store.renew_lease(job_id, 1001, 30)
+    with pytest.raises(LeaseLost):
+        store.commit_chunk(job_id, 1001, 0, 0, CHUNK_SIZE, 0, 10, {"A": 3}, 30)
+    assert not store.release(job_id, 1001, status="failed")
+    assert store.get(job_id)['rows_processed'] == 0
+    assert store.get(job_id)['owner_pid'] == 1002
+    store.close()
+
+def test_cancel_queued_job(tmp_path):
+    manager = make_manager(tmp_path, score_all)
+    job = create_job(manager)
+    job = manager.cancel(job['id'])
+    assert job['status'] == "cancelled"
+    assert manager.store.claim_next(1001, 30, max_running=1) is None
+    assert manager.cancel("missing") is None
+    manager.store.close()
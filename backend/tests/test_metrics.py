@@ -0,0 +1,78 @@
+import time
+
+from conftest import csv_upload, make_catalog
+from metrics import MetricsRegistry, StageTimer, merge_timings, server_timing_header
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value, route='/a"b')
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+    assert lines[2:] == [
+        'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a\\"b",le="1"} 3',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a\\"b"} 4.25',
+        'latency_seconds_count{route="/a\\"b"} 4'
+    ]
+
+def test_gauge_tracks_in_flight_work():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("in_flight", "In flight")
+    with gauge.track():
+        assert gauge.values[()] == 1
+    assert gauge.values[()] == 0
+    counter = registry.counter("rows_total", "Rows", ("model",))
+    counter.inc(5, model="xgboost")
+    counter.inc(2, model="xgboost")
+    assert 'rows_total{model="xgboost"} 7' in registry.render()
+
+def test_stage_timings_merge_into_a_server_timing_header():
+    timer = StageTimer()
+    with timer.stage("parse"):
+        time.sleep(0.01)
+    with timer.stage("parse"):
+        pass
+    assert timer.timings["parse"] >= 0.01
+    total = merge_timings({"parse": 1.0}, {"parse": 0.5, "predict": 0.25})
+    assert total == {"parse": 1.5, "predict": 0.25}
+    assert server_timing_header(total) == "parse;dur=1500.00, predict;dur=250.00"
+
+def test_prediction_records_stage_and_throughput_metrics(client):
+    response = client.post('/api/predict', data={'model_type': 'votingensemble', 'include_plot': 'false'},
+                           files=csv_upload(make_catalog(64, seed=60)))
+    assert response.status_code == 200
+    text = client.get('/api/metrics').text
+    for stage in ("parse", "preprocess", "predict", "decode", "serialize"):
+        assert f'spaceex_stage_duration_seconds_count{{stage="{stage}",model="votingensemble"}}' in text
+    assert 'spaceex_rows_processed_total{model="votingensemble"}' in text
+    assert 'spaceex_request_duration_seconds_count{route="/api/predict",method="POST",status="200"}' in text
+    assert 'spaceex_model_ready{model="votingensemble"} 1' in text
+
+def test_streamed_request_is_timed_until_the_last_chunk(service, client, monkeypatch):
+    score_chunk = service.score_chunk
+
+    def slow_score_chunk(*args, **kwargs):
+        time.sleep(0.2)
+        return score_chunk(*args, **kwargs)
+
+    monkeypatch.setattr(service, "score_chunk", slow_score_chunk)
+    key = ('/api/predict', 'POST', '200')
+    before = service.REQUEST_DURATION.series.get(key, [0.0])[-1]
+    response = client.post('/api/predict', data={'model_type': 'xgboost', 'stream': 'true', 'chunk_size': '10'},
+                           files=csv_upload(make_catalog(30, seed=61)))
+    assert len(response.text.splitlines()) == 4
+    assert service.REQUEST_DURATION.series[key][-1] - before >= 0.6
+
+def test_server_timing_header_is_optional(service, client, monkeypatch):
+    upload = csv_upload(make_catalog(10, seed=62))
+    data = {'model_type': 'xgboost', 'include_plot': 'false'}
+    assert 'server-timing' not in client.post('/api/predict', data=data, files=upload).headers
+
+    monkeypatch.setattr(service, "SERVER_TIMING", True)
+    header = client.post('/api/predict', data=data, files=upload).headers['server-timing']
+    names = [entry.split(";")[0] for entry in header.split(", ")]
+    assert "predict" in names and names[-1] == "total"
+    assert all(float(entry.split("dur=")[1]) >= 0 for entry in header.split(", "))
@@ -0,0 +1,60 @@
+import asyncio
+
+import numpy as np
+
+from conftest import make_catalog
+
+def catalog_records(rows, seed):
+    return make_catalog(rows, seed=seed).to_dict(orient='records')
+
+def test_concurrent_objects_are_batched(service, client):
+    records = catalog_records(20, seed=30)
+
+    async def submit_all():
+        batcher = service.MicroBatcher('xgboost', max_batch_size=8, max_wait=0.05, max_in_flight=1)
+        try:
+            results = await asyncio.gather(*(batcher.submit(record) for record in records))
+        finally:
+            await batcher.stop()
+        return results, batcher
+
+    results, batcher = asyncio.run(submit_all())
+    assert batcher.objects == 20
+    assert batcher.batches < 20
+    assert all(1 <= result['batch_size'] <= 8 for result in results)
+    assert max(result['batch_size'] for result in results) > 1
+
+    # Each object gets its own prediction back, as if scored alone
+    expected = service.score_records('xgboost', records)['predictions']
+    assert [result['prediction_code'] for result in results] == [row['prediction_code'] for row in expected]
+    np.testing.assert_allclose([result['confidence'] for result in results],
+                               [row['confidence'] for row in expected], rtol=1e-6)
+
+def test_model_failure_fails_every_object_of_the_batch(service, client, monkeypatch):
+    def broken_score_records(model_type, records):
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(service, "score_records", broken_score_records)
+
+    async def submit_all():
+        batcher = service.MicroBatcher('xgboost', max_batch_size=4, max_wait=0.05, max_in_flight=1)
+        try:
+            return await asyncio.gather(*(batcher.submit({}) for _ in range(3)), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(submit_all()))
+
+def test_object_endpoint_scores_one_object(service, client):
+    record = catalog_records(1, seed=31)[0]
+    response = client.post('/api/predict/object', params={'model_type': 'xgboost'}, json=record)
+    assert response.status_code == 200
+    body = response.json()
+    assert body['batch_size'] >= 1
+    expected = service.score_records('xgboost', [record])['predictions'][0]
+    assert body['prediction_code'] == expected['prediction_code']
+    assert abs(body['confidence'] - expected['confidence']) < 1e-6
+
+def test_object_endpoint_rejects_unknown_models(client):
+    response = client.post('/api/predict/object', params={'model_type': 'missing'}, json={'period': 3.0})
+    assert response.status_code == 400
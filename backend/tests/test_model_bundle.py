@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from model_bundle import (BundleError, BundleModel, current_version, list_bundles, read_manifest, set_current,
+                          verify_artifact, write_bundle)
+
+FEATURES = ["a", "b", "c"]
+LABELS = ["FALSE POSITIVE", "CANDIDATE", "CONFIRMED"]
+
+def fitted_model():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(90, len(FEATURES)))
+    y = np.repeat([0, 1, 2], 30)
+    X[:, 0] += y * 3
+    return LogisticRegression().fit(X, y), X
+
+def test_write_and_activate_bundle(tmp_path):
+    model, _ = fitted_model()
+    root = str(tmp_path)
+    first = write_bundle(root, {"logreg": model}, None, FEATURES, LABELS)
+    manifest = read_manifest(first)
+    assert current_version(root) == manifest["version"]
+    assert manifest["feature_names"] == FEATURES
+    assert manifest["class_mapping"] == {"0": "FALSE POSITIVE", "1": "CANDIDATE", "2": "CONFIRMED"}
+    assert not [name for name in os.listdir(root) if name.startswith(".staging-")]
+
+    second = write_bundle(root, {"logreg": model}, None, FEATURES, LABELS, activate=False)
+    assert current_version(root) == manifest["version"]
+    set_current(root, os.path.basename(second))
+    assert current_version(root) == os.path.basename(second)
+    assert len(list_bundles(root)) == 2
+
+def test_checksum_mismatch_is_rejected(tmp_path):
+    model, _ = fitted_model()
+    bundle_dir = write_bundle(str(tmp_path), {"logreg": model}, None, FEATURES, LABELS)
+    entry = read_manifest(bundle_dir)["models"]["logreg"]
+    path = os.path.join(bundle_dir, entry["file"])
+    verify_artifact(path, entry["checksum"])
+    with open(path, "ab") as f:
+        f.write(b"corrupt")
+    with pytest.raises(BundleError):
+        verify_artifact(path, entry["checksum"])
+
+def test_unreadable_manifest_is_rejected(tmp_path):
+    with pytest.raises(BundleError):
+        read_manifest(str(tmp_path))
+    with pytest.raises(BundleError):
+        set_current(str(tmp_path), "missing")
+
+def test_bundle_model_maps_columns_and_classes():
+    model, X = fitted_model()
+    serving_features = ["c", "x", "a", "b"]
+    serving = np.zeros((len(X), len(serving_features)))
+    serving[:, [2, 3, 0]] = X
+    class_codes = np.array([2, 0, 1])  # Bundle code -> serving code
+    wrapped = BundleModel(model, FEATURES, serving_features, class_codes)
+
+    np.testing.assert_allclose(wrapped.predict_proba(serving), model.predict_proba(X))
+    np.testing.assert_array_equal(wrapped.predict(serving), class_codes[model.predict(X)])
+    np.testing.assert_array_equal(wrapped.classes_, class_codes)
+    assert wrapped.coef_ is model.coef_
+
+def test_activation_refuses_to_drop_models(tmp_path):
+    model, _ = fitted_model()
+    root = str(tmp_path)
+    write_bundle(root, {"logreg": model, "other": model}, None, FEATURES, LABELS)
+    active = current_version(root)
+
+    smaller = write_bundle(root, {"logreg": model}, None, FEATURES, LABELS, activate=False)
+    with pytest.raises(BundleError, match="other"):
+        set_current(root, os.path.basename(smaller))
+    assert current_version(root) == active
+    set_current(root, os.path.basename(smaller), force=True)
+    assert current_version(root) == os.path.basename(smaller)
+
+def test_bundle_medians_follow_serving_order(tmp_path):
+    model, _ = fitted_model()
+    bundle_dir = write_bundle(str(tmp_path), {"logreg": model}, None, FEATURES, LABELS,
+                              medians={"a": 1.0, "b": 2.0, "c": 3.0})
+    manifest = read_manifest(bundle_dir)
+    assert manifest["medians"] == {"a": 1.0, "b": 2.0, "c": 3.0}
+
+    wrapped = BundleModel(model, FEATURES, ["c", "x", "a", "b"], np.arange(3), medians=manifest["medians"])
+    np.testing.assert_array_equal(wrapped.feature_medians(4), [3.0, 0.0, 1.0, 2.0])
+    assert BundleModel(model, FEATURES, FEATURES, np.arange(3)).feature_medians(3) is None
@@ -0,0 +1,55 @@
+import pytest
+
+from model_registry import ModelRegistry
+
+def make_registry(tmp_path, budget, sizes):
+    files = {}
+    for name, size in sizes.items():
+        path = tmp_path / f"{name}.pkl"
+        path.write_bytes(b"x" * size)
+        files[name] = str(path)
+    loaded = []
+
+    def loader(path):
+        loaded.append(path)
+        return {"path": path}
+
+    return ModelRegistry(files, memory_budget_bytes=budget, loader=loader), loaded
+
+def test_loads_lazily_and_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr("model_registry._current_rss", lambda: None)  # Size the models by their files
+    registry, loaded = make_registry(tmp_path, 0, {"a": 10})
+    assert registry.status()["a"]["state"] == "unloaded"
+    assert registry.get("a") is registry.get("a")
+    assert len(loaded) == 1
+    status = registry.status()["a"]
+    assert status["state"] == "ready"
+    assert status["resident_bytes"] == 10
+    assert registry.version("a") is not None
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+def test_evicts_least_recently_used_over_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr("model_registry._current_rss", lambda: None)
+    registry, loaded = make_registry(tmp_path, 250, {"a": 100, "b": 100, "c": 100})
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # b is now the least recently used
+    registry.get("c")
+    assert not registry.is_ready("b")
+    assert registry.is_ready("a") and registry.is_ready("c")
+    assert registry.status()["b"]["evictions"] == 1
+
+    registry.get("b")
+    assert registry.status()["b"]["loads"] == 2
+    assert not registry.is_ready("a")
+
+def test_load_listeners_see_every_load(tmp_path, monkeypatch):
+    monkeypatch.setattr("model_registry._current_rss", lambda: None)
+    registry, _ = make_registry(tmp_path, 0, {"a": 10})
+    seen = []
+    registry.add_load_listener(lambda name, model: seen.append(name))
+    registry.get("a")
+    registry.evict("a")
+    registry.get("a")
+    assert seen == ["a", "a"]
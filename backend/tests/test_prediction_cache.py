@@ -0,0 +1,60 @@
+import numpy as np
+
+from conftest import csv_upload, make_catalog
+
+def post_prediction(client, catalog, model_type='catboost'):
+    response = client.post('/api/predict', data={'model_type': model_type, 'include_plot': 'false'},
+                           files=csv_upload(catalog))
+    assert response.status_code == 200
+    return response.json()
+
+def test_cache_lookup_store_and_lru_eviction(service):
+    cache = service.PredictionCache(3 * service.PredictionCache.ENTRY_BYTES)
+    keys = [(1, 1), (2, 2), (3, 3), (4, 4)]
+    probabilities = np.array([[0.1, 0.2, 0.7], [0.3, 0.3, 0.4], [0.5, 0.4, 0.1], [0.6, 0.2, 0.2]])
+
+    assert cache.lookup(keys[:3], "v1") == [None, None, None]
+    cache.store(keys[:3], probabilities[:3], "v1")
+    assert cache.lookup(keys[:1], "v1") == [tuple(probabilities[0])]  # (1, 1) is now most recently used
+    cache.store(keys[3:], probabilities[3:], "v1")
+
+    found = cache.lookup(keys, "v1")
+    assert found[1] is None  # Least recently used entry was evicted
+    assert found[0] == tuple(probabilities[0]) and found[3] == tuple(probabilities[3])
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"]) == (4, 4)
+
+def test_cache_entries_are_tied_to_the_model_version(service):
+    cache = service.PredictionCache(1024 * 1024)
+    cache.store([(1, 1)], np.array([[0.2, 0.3, 0.5]]), "v1")
+    cache.lookup([(1, 1)], "v1")
+    assert cache.lookup([(1, 1)], "v2") == [None]
+    cache.store([(1, 1)], np.array([[0.9, 0.05, 0.05]]), "v1")  # Stale writer is ignored
+    assert cache.stats()["entries"] == 0
+
+def test_repeated_upload_is_served_from_the_cache(client):
+    client.delete('/api/cache')
+    catalog = make_catalog(120, seed=10)
+    first = post_prediction(client, catalog)
+    second = post_prediction(client, catalog)
+
+    assert first['file_info']['cache_hits'] == 0
+    assert second['file_info']['cache_hits'] == 120
+    assert second['predictions'] == first['predictions']
+    stats = client.get('/api/cache').json()['models']['catboost']
+    assert stats['entries'] >= 120 and stats['hits'] >= 120
+
+def test_overlapping_upload_only_scores_new_rows(client):
+    client.delete('/api/cache')
+    catalog = make_catalog(100, seed=11)
+    post_prediction(client, catalog.iloc[:60])
+    result = post_prediction(client, catalog)
+    assert result['file_info']['cache_hits'] == 60
+
+def test_clearing_the_cache_forces_rescoring(client):
+    catalog = make_catalog(50, seed=12)
+    post_prediction(client, catalog)
+    assert client.delete('/api/cache').json() == {"status": "cleared"}
+    assert client.get('/api/cache').json()['models']['catboost']['entries'] == 0
+    assert post_prediction(client, catalog)['file_info']['cache_hits'] == 0
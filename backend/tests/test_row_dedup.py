@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from conftest import csv_upload, make_catalog
+
+def test_unique_rows_map_back_to_every_row(service):
+    features = np.array([[1, 2], [3, 4], [1, 2], [5, 6], [3, 4]], dtype=np.float32)
+    first, inverse = service.unique_feature_rows(*service.feature_row_hashes(features))
+    np.testing.assert_array_equal(first, [0, 1, 3])
+    np.testing.assert_array_equal(features[first][inverse], features)
+
+def test_64_bit_collisions_fall_back_to_the_full_hash(service):
+    low = np.array([7, 7, 9], dtype=np.uint64)
+    high = np.array([1, 2, 1], dtype=np.uint64)
+    first, inverse = service.unique_feature_rows(low, high)
+    assert len(first) == 3
+    assert len(set(inverse.tolist())) == 3
+
+def test_deduplicated_scores_match_scoring_every_row(service, client, monkeypatch):
+    monkeypatch.setattr(service, "PREDICTION_CACHE_MB", 0)  # Isolate deduplication from the cache
+    catalog = make_catalog(40, seed=20)
+    catalog = pd.concat([catalog, catalog.iloc[::2], catalog.iloc[:5]], ignore_index=True)
+    features = service.preprocess_data(catalog)
+
+    deduplicated = service.predict_rows('lightgbm', features)
+    direct = service.make_predictions(service.registry.get('lightgbm'), features)
+    assert deduplicated['unique_rows'] == 40
+    np.testing.assert_array_equal(deduplicated['predictions'], direct['predictions'])
+    np.testing.assert_allclose(deduplicated['probabilities'], direct['probabilities'], rtol=1e-6)
+
+def test_response_reports_the_dedup_ratio(client):
+    catalog = make_catalog(30, seed=21)
+    catalog = pd.concat([catalog] * 4, ignore_index=True)
+    response = client.post('/api/predict', data={'model_type': 'lightgbm', 'include_plot': 'false'},
+                           files=csv_upload(catalog))
+    file_info = response.json()['file_info']
+    assert file_info['rows_processed'] == 120
+    assert file_info['unique_rows'] == 30
+    assert file_info['dedup_ratio'] == 0.75
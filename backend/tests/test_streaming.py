@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+
+from conftest import csv_upload, make_catalog
+
+def post_prediction(client, catalog, **form):
+    data = {'model_type': 'xgboost', 'include_plot': 'false', **form}
+    return client.post('/api/predict', data=data, files=csv_upload(catalog))
+
+def stream_lines(response):
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_streamed_chunks_match_the_buffered_response(client):
+    catalog = make_catalog(1050, seed=2)
+    buffered = post_prediction(client, catalog).json()
+    lines = stream_lines(post_prediction(client, catalog, stream='true', chunk_size='200'))
+
+    chunks, summary = lines[:-1], lines[-1]
+    assert [line['chunk'] for line in chunks] == list(range(6))
+    assert [len(line['predictions']) for line in chunks] == [200] * 5 + [50]
+    streamed = [prediction for line in chunks for prediction in line['predictions']]
+    assert [prediction['row'] for prediction in streamed] == list(range(1, 1051))
+    assert [p['prediction_code'] for p in streamed] == [p['prediction_code'] for p in buffered['predictions']]
+    np.testing.assert_allclose(
+        [p['confidence'] for p in streamed], [p['confidence'] for p in buffered['predictions']], rtol=1e-6
+    )
+
+    assert summary['file_info']['rows_processed'] == 1050
+    assert summary['file_info']['chunks'] == 6
+    assert summary['statistics'] == buffered['statistics']
+
+def test_columnar_stream_offsets_each_chunk(client):
+    lines = stream_lines(post_prediction(client, make_catalog(250, seed=3), stream='true', chunk_size='100',
+                                         format='columnar'))
+    assert [line['predictions']['row_offset'] for line in lines[:-1]] == [0, 100, 200]
+    assert 'class_mapping' in lines[-1]
+
+def test_invalid_chunk_size_is_rejected(client):
+    response = post_prediction(client, make_catalog(10), stream='true', chunk_size='-5')
+    assert response.status_code == 400
+    assert 'chunk_size' in response.json()['error']
+
+def test_invalid_chunk_mid_stream_ends_with_an_error_line(client):
+    catalog = make_catalog(40, seed=4)
+    catalog['period'] = catalog['period'].astype(object)
+    catalog.loc[35, 'period'] = 'unknown'
+    lines = stream_lines(post_prediction(client, catalog, stream='true', chunk_size='10'))
+    assert [len(line['predictions']) for line in lines[:-1]] == [10, 10, 10]
+    assert "'period'" in lines[-1]['error']
+    assert lines[-1]['rows_processed'] == 30
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from tree_compiler import CompiledTreeModel, RoutedTreeModel, compile_pipeline, load_compiled_for, verify_parity
+
+def make_data(n_classes, rows=600, features=6, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] > 0).astype(int)
+    if n_classes == 3:
+        y += (X[:, 3] > 0.5).astype(int)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+def xgboost_pipeline():
+    xgb = pytest.importorskip("xgboost")
+    return Pipeline([("scaler", StandardScaler()), ("model", xgb.XGBClassifier(n_estimators=30, max_depth=4))])
+
+def lightgbm_pipeline():
+    lgb = pytest.importorskip("lightgbm")
+    return Pipeline([("scaler", StandardScaler()),
+                     ("model", lgb.LGBMClassifier(n_estimators=30, num_leaves=15, verbose=-1))])
+
+@pytest.mark.parametrize("make_pipeline", [xgboost_pipeline, lightgbm_pipeline])
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_compiled_matches_native(make_pipeline, n_classes):
+    X, y = make_data(n_classes)
+    pipeline = make_pipeline().fit(X, y)
+    compiled = compile_pipeline(pipeline, X[:200])
+
+    X_test, _ = make_data(n_classes, rows=300, seed=1)
+    parity = verify_parity(pipeline, compiled, X_test)
+    assert parity["passed"], parity
+    assert parity["label_agreement"] == 1.0
+    np.testing.assert_array_equal(compiled.predict(X_test), pipeline.predict(X_test))
+
+def test_saved_model_round_trips_and_checks_source(tmp_path):
+    X, y = make_data(3)
+    pipeline = xgboost_pipeline().fit(X, y)
+    compiled = compile_pipeline(pipeline, X[:200])
+    compiled.meta["source_checksum"] = "abc"
+    compiled.save(str(tmp_path / "xgboost_pipeline"))
+
+    loaded = CompiledTreeModel.load(str(tmp_path / "xgboost_pipeline"))
+    np.testing.assert_allclose(loaded.predict_proba(X), compiled.predict_proba(X))
+    assert load_compiled_for("ml_models/xgboost_pipeline.pkl", "abc", str(tmp_path)) is not None
+    assert load_compiled_for("ml_models/xgboost_pipeline.pkl", "stale", str(tmp_path)) is None
+
+def test_routed_model_uses_compiled_for_small_batches():
+    X, y = make_data(3)
+    pipeline = xgboost_pipeline().fit(X, y)
+    compiled = compile_pipeline(pipeline, X[:200])
+    routed = RoutedTreeModel(pipeline, compiled, max_rows=8)
+    np.testing.assert_array_equal(routed.predict_proba(X[:8]), compiled.predict_proba(X[:8]))
+    np.testing.assert_array_equal(routed.predict_proba(X), pipeline.predict_proba(X))
+    np.testing.assert_array_equal(routed.classes_, pipeline.classes_)
@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from conftest import csv_upload, make_catalog
+
+def parquet_bytes(catalog, **options):
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(catalog, preserve_index=False), buffer, **options)
+    return buffer.getvalue()
+
+def feather_bytes(catalog, version=2):
+    buffer = io.BytesIO()
+    feather.write_feather(catalog, buffer, version=version)
+    return buffer.getvalue()
+
+def arrow_stream_bytes(catalog):
+    table = pa.Table.from_pandas(catalog, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=25)
+    return sink.getvalue().to_pybytes()
+
+def predictions(client, name, body, **form):
+    response = client.post('/api/predict', data={'model_type': 'xgboost', 'include_plot': 'false', **form},
+                           files={'file': (name, body)})
+    assert response.status_code == 200, response.text
+    return response
+
+def prediction_codes(response):
+    return [row['prediction_code'] for row in response.json()['predictions']]
+
+def test_formats_are_detected_from_extension_or_magic_bytes(service):
+    assert service.detect_upload_format("catalog.PQ", b"") == "parquet"
+    assert service.detect_upload_format("catalog.feather", b"") == "feather"
+    assert service.detect_upload_format("upload", b"PAR1\x15\x04") == "parquet"
+    assert service.detect_upload_format("upload", b"ARROW1\x00\x00") == "arrow"
+    assert service.detect_upload_format("upload", b"\xff\xff\xff\xff\x10\x00") == "arrow"
+    assert service.detect_upload_format("upload.txt", b"period,depth") is None
+
+@pytest.mark.parametrize("name, encode", [
+    ("catalog.parquet", parquet_bytes),
+    ("catalog.feather", feather_bytes),
+    ("catalog.feather", lambda catalog: feather_bytes(catalog, version=1)),
+    ("catalog", arrow_stream_bytes)
+])
+def test_columnar_uploads_match_csv(client, name, encode):
+    catalog = make_catalog(80, seed=70)
+    expected = prediction_codes(predictions(client, 'catalog.csv', csv_upload(catalog)['file'][1]))
+    assert prediction_codes(predictions(client, name, encode(catalog))) == expected
+
+def test_extra_columns_are_ignored(client):
+    catalog = make_catalog(20, seed=71)
+    extended = catalog.assign(source="kepler", notes=["x" * 50] * 20)
+    assert prediction_codes(predictions(client, 'catalog.parquet', parquet_bytes(extended))) == \
+        prediction_codes(predictions(client, 'catalog.parquet', parquet_bytes(catalog)))
+
+def test_streamed_parquet_is_read_in_row_batches(client):
+    body = parquet_bytes(make_catalog(120, seed=72), row_group_size=50)
+    lines = [json.loads(line) for line in predictions(
+        client, 'catalog.parquet', body, stream='true', chunk_size='40'
+    ).text.splitlines()]
+    assert [len(line['predictions']) for line in lines[:-1]] == [40, 40, 40]
+    assert lines[-1]['file_info']['rows_processed'] == 120
+
+def test_corrupt_and_unusable_uploads_are_rejected(client):
+    response = client.post('/api/predict', data={'model_type': 'xgboost'},
+                           files={'file': ('catalog.parquet', b'PAR1 not really parquet')})
+    assert response.status_code == 400
+    assert 'Invalid parquet file' in response.json()['error']
+
+    unrelated = parquet_bytes(make_catalog(5).rename(columns=lambda name: f"x_{name}"))
+    response = client.post('/api/predict', data={'model_type': 'xgboost'},
+                           files={'file': ('catalog.parquet', unrelated)})
+    assert response.status_code == 400
+    assert 'No feature columns found' in response.json()['error']
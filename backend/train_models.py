@@ -1,3 +1,8 @@
+import argparse
+import inspect
+import json
+import os
+import time
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -7,19 +12,70 @@ import xgboost as xgb
 from sklearn.ensemble import VotingClassifier, RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
-import joblib
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.pipeline import Pipeline, make_pipeline
 import warnings
+try:
+    import catboost
+except ImportError:
+    catboost = None
+try:
+    import lightgbm
+except ImportError:
+    lightgbm = None
+from model_bundle import DEFAULT_BUNDLE_DIR, BundleError, set_current, write_bundle
+from dataset_cache import DEFAULT_CACHE_DIR, dataset_key, load_cached_dataset, store_dataset
+from streaming_training import DEFAULT_CHUNK_SIZE, train_xgboost_out_of_core
+from hyperparameter_search import (
+    DEFAULT_ETA, DEFAULT_STORE, DEFAULT_TRIALS, SEARCH_SPACES, TrialStore, successive_halving
+)
+from cross_validation import DEFAULT_CV_DIR, DEFAULT_FOLDS, cross_validate, prepare_folds, print_cv_summary
+from training_scheduler import (
+    DEFAULT_MODELS, measure_stage, parse_model_threads, print_stage_report, train_concurrently
+)
 warnings.filterwarnings('ignore')
 
+# SVC member of the ensemble: the exact RBF SVC scales quadratically (or worse)
+# with training rows and runs an internal 5-fold calibration for probabilities;
+# "nystroem" and "rff" (random Fourier features) map the rows onto an
+# approximate RBF feature space of SVM_COMPONENTS dimensions and fit a linear
+# classifier there, which is linear in the number of rows.
+SVM_KERNELS = ('exact', 'nystroem', 'rff')
+SVM_COMPONENTS = 500
+
+# Class labels by target code. "multiclass" uses the dispositions the server
+# decodes; "binary" separates confirmed planets from everything else and
+# produces bundles the server rejects.
+TARGET_CLASSES = {
+    'multiclass': ['FALSE POSITIVE', 'CANDIDATE', 'CONFIRMED'],
+    'binary': ['NOT CONFIRMED', 'CONFIRMED']
+}
+# Bundle model names as registered by the server
+BUNDLE_MODEL_NAMES = {'xgboost': 'xgboost', 'catboost': 'catboost', 'lightgbm': 'lightgbm', 'ensemble': 'votingensemble'}
+MODEL_DISPLAY_NAMES = {'xgboost': 'XGBoost', 'catboost': 'CatBoost', 'lightgbm': 'LightGBM', 'ensemble': 'Ensemble'}
+
 class ExoplanetModelTrainer:
-    def __init__(self, data_path):
+    def __init__(self, data_path, svm_kernel='exact', svm_components=SVM_COMPONENTS,
+                 dataset_cache_dir=DEFAULT_CACHE_DIR, target='multiclass'):
         """
         Initialize the model trainer with dataset path
         Updated for your specific exoplanet dataset
         """
+        if svm_kernel not in SVM_KERNELS:
+            raise ValueError(f"❌ Unknown SVM kernel '{svm_kernel}', expected one of {SVM_KERNELS}")
+        if target not in TARGET_CLASSES:
+            raise ValueError(f"❌ Unknown target '{target}', expected one of {list(TARGET_CLASSES)}")
         self.data_path = data_path
+        self.target = target
+        self.classes = TARGET_CLASSES[target]
+        self.svm_kernel = svm_kernel
+        self.svm_components = svm_components
+        self.dataset_cache_dir = dataset_cache_dir  # None disables the cleaned dataset cache
+        self.params = {name: {} for name in BUNDLE_MODEL_NAMES}  # Overrides of the default hyperparameters
         self.models = {}
+        self.stage_report = []  # Wall time, CPU time and peak RSS of each training stage
         self.scaler = StandardScaler()
+        self.medians = None  # Training fill values of missing features, recorded in the bundle
         self.label_encoder = LabelEncoder()
         
     def load_and_preprocess_data(self):
@@ -29,6 +85,21 @@ class ExoplanetModelTrainer:
         """
         print("📊 Loading exoplanet dataset...")
         
+        # Cleaned features are cached per source contents, target classes and
+        # the code that cleans the rows and encodes their labels
+        cache_key = None
+        if self.dataset_cache_dir:
+            cleaning = "\n".join([
+                self.target, repr(self.classes),
+                inspect.getsource(type(self).clean_data), inspect.getsource(type(self).encode_target)
+            ])
+            cache_key = dataset_key(self.data_path, cleaning)
+            cached = load_cached_dataset(self.dataset_cache_dir, cache_key)
+            if cached is not None:
+                print(f"⚡ Cleaned dataset memory-mapped from {self.dataset_cache_dir}/{cache_key}: "
+                      f"{cached[0].shape[0]} rows, {cached[0].shape[1]} features")
+                return cached
+        
         try:
             # Load your dataset
             df = pd.read_csv(self.data_path)
@@ -47,7 +118,11 @@ class ExoplanetModelTrainer:
                 for col, count in missing_values[missing_values > 0].items():
                     print(f"   {col}: {count} missing values")
             
-            return self.clean_data(df)
+            X, y, feature_cols = self.clean_data(df)
+            if cache_key is not None:
+                store_dataset(self.dataset_cache_dir, cache_key, X, y, self.data_path)
+                print(f"💾 Cached cleaned dataset as {self.dataset_cache_dir}/{cache_key}")
+            return X, y, feature_cols
             
         except Exception as e:
             print(f"❌ Error loading dataset: {e}")
@@ -68,7 +143,7 @@ class ExoplanetModelTrainer:
         for col in numerical_cols:
             if df_clean[col].isnull().sum() > 0:
                 median_val = df_clean[col].median()
-                df_clean[col].fillna(median_val, inplace=True)
+                df_clean[col] = df_clean[col].fillna(median_val)
                 print(f"   Filled missing values in {col} with median: {median_val:.4f}")
         
         # Handle the target variable 'label'
@@ -78,26 +153,27 @@ class ExoplanetModelTrainer:
         print(f"\n🎯 Target variable 'label' distribution:")
         print(df_clean['label'].value_counts())
         
-        # Convert multi-class labels to binary (Exoplanet vs Non-Exoplanet)
-        # Theory: We'll treat "CONFIRMED" as exoplanets (1), others as non-exoplanets (0)
-        df_clean['is_exoplanet'] = df_clean['label'].apply(
-            lambda x: 1 if 'CONFIRM' in str(x).upper() else 0
-        )
+        # Encode the labels as target codes indexing self.classes
+        df_clean['target'] = self.encode_target(df_clean['label'])
+        unknown = df_clean['target'] < 0
+        if unknown.any():
+            print(f"⚠️  Dropping {unknown.sum()} rows with unknown labels: {df_clean.loc[unknown, 'label'].unique()}")
+            df_clean = df_clean[~unknown]
         
-        print(f"\n🔍 Binary target distribution:")
-        print(f"   Exoplanets (1): {df_clean['is_exoplanet'].sum()}")
-        print(f"   Non-Exoplanets (0): {len(df_clean) - df_clean['is_exoplanet'].sum()}")
+        print(f"\n🔍 {self.target.capitalize()} target distribution:")
+        for code, name in enumerate(self.classes):
+            print(f"   {name} ({code}): {(df_clean['target'] == code).sum()}")
         
         # Select features for training (using your actual column names)
         # Exclude non-feature columns
-        exclude_cols = ['label', 'is_exoplanet', 'source']
+        exclude_cols = ['label', 'target', 'source']
         feature_cols = [col for col in df_clean.columns if col not in exclude_cols]
         
         print(f"\n📊 Selected features ({len(feature_cols)}): {feature_cols}")
         
         # Prepare features and target
         X = df_clean[feature_cols]
-        y = df_clean['is_exoplanet']
+        y = df_clean['target']
         
         # Check for any remaining missing values
         if X.isnull().sum().sum() > 0:
@@ -105,59 +181,205 @@ class ExoplanetModelTrainer:
         
         return X, y, feature_cols
     
-    def train_xgboost(self, X_train, y_train):
+    def encode_target(self, labels):
         """
-        Train XGBoost model with optimized parameters for exoplanet data
+        Target codes of raw labels (-1 for labels outside the target classes)
         """
-        print("🎯 Training XGBoost model...")
-        
-        model = xgb.XGBClassifier(
-            n_estimators=200,
-            max_depth=8,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            eval_metric='logloss'
-        )
-        
-        model.fit(X_train, y_train)
-        return model
+        labels = labels.astype(str).str.strip().str.upper()
+        if self.target == 'binary':
+            # Theory: We'll treat "CONFIRMED" as exoplanets (1), others as non-exoplanets (0)
+            return labels.str.contains('CONFIRM', regex=False).astype(np.int64)
+        codes = {name: code for code, name in enumerate(self.classes)}
+        return labels.map(codes).fillna(-1).astype(np.int64)
+    
+    def build_xgboost(self, params=None, n_jobs=None):
+        """
+        Unfitted XGBoost model with the default parameters updated by `params`
+        """
+        return xgb.XGBClassifier(**{
+            'n_estimators': 200,
+            'max_depth': 8,
+            'learning_rate': 0.05,
+            'subsample': 0.8,
+            'colsample_bytree': 0.8,
+            'random_state': 42,
+            'eval_metric': 'logloss' if len(self.classes) == 2 else 'mlogloss',
+            'n_jobs': n_jobs,
+            **(params or {})
+        })
+    
+    def build_catboost(self, params=None, n_jobs=None):
+        """
+        Unfitted CatBoost model with the default parameters updated by `params`
+        """
+        if catboost is None:
+            raise ImportError("❌ catboost is not installed")
+        return catboost.CatBoostClassifier(**{
+            'iterations': 500,
+            'depth': 6,
+            'learning_rate': 0.1,
+            'random_seed': 42,
+            'thread_count': n_jobs or -1,
+            'allow_writing_files': False,
+            'verbose': False,
+            **(params or {})
+        })
+    
+    def build_lightgbm(self, params=None, n_jobs=None):
+        """
+        Unfitted LightGBM model with the default parameters updated by `params`
+        """
+        if lightgbm is None:
+            raise ImportError("❌ lightgbm is not installed")
+        return lightgbm.LGBMClassifier(**{
+            'n_estimators': 300,
+            'num_leaves': 63,
+            'learning_rate': 0.05,
+            'subsample': 0.8,
+            'subsample_freq': 1,
+            'colsample_bytree': 0.8,
+            'random_state': 42,
+            'n_jobs': n_jobs,
+            'verbose': -1,
+            **(params or {})
+        })
+    
+    def build_svm(self, n_features, kernel=None):
+        """
+        SVC ensemble member, exact or through an RBF kernel approximation
+        """
+        kernel = kernel or self.svm_kernel
+        if kernel == 'exact':
+            return SVC(probability=True, random_state=42, kernel='rbf', C=1.0)
+        
+        # Same kernel width as SVC(gamma='scale') on standardized features
+        gamma = 1.0 / n_features
+        if kernel == 'nystroem':
+            feature_map = Nystroem(kernel='rbf', gamma=gamma, n_components=self.svm_components, random_state=42)
+        else:
+            feature_map = RBFSampler(gamma=gamma, n_components=self.svm_components, random_state=42)
+        # Logistic loss keeps predict_proba for soft voting without a calibration pass
+        return make_pipeline(feature_map, LogisticRegression(C=1.0, max_iter=1000))
     
-    def train_ensemble(self, X_train, y_train):
+    def build_ensemble(self, n_features, params=None, n_jobs=-1):
         """
-        Train Ensemble model with optimized classifiers
+        Unfitted voting ensemble; `params` use VotingClassifier's "<member>__<param>" names
         """
-        print("🎯 Training Ensemble model...")
+        # Members keep their own threading defaults unless a CPU budget is given;
+        # under a budget they are fitted one after another with n_jobs threads each
+        member_jobs = None if n_jobs == -1 else n_jobs
         
         # Define individual models optimized for your data
         estimators = [
-            ('xgboost', xgb.XGBClassifier(n_estimators=100, max_depth=6, random_state=42)),
-            ('random_forest', RandomForestClassifier(n_estimators=100, random_state=42)),
-            ('svm', SVC(probability=True, random_state=42, kernel='rbf', C=1.0))
+            ('xgboost', xgb.XGBClassifier(n_estimators=100, max_depth=6, random_state=42, n_jobs=member_jobs)),
+            ('random_forest', RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=member_jobs)),
+            ('svm', self.build_svm(n_features))
         ]
         
         # Create voting classifier
         ensemble = VotingClassifier(
             estimators=estimators,
             voting='soft',  # Use soft voting for probabilities
-            n_jobs=-1  # Use all available cores
+            n_jobs=-1 if n_jobs == -1 else 1  # All available cores by default
         )
         
-        ensemble.fit(X_train, y_train)
-        return ensemble
+        params = dict(params or {})
+        if 'svm__C' in params and self.svm_kernel != 'exact':
+            params['svm__logisticregression__C'] = params.pop('svm__C')
+        return ensemble.set_params(**params)
     
-    def train_models(self):
+    def build_model(self, model_name, n_features, params=None, n_jobs=None):
         """
-        Main training function for exoplanet detection
+        Unfitted 'xgboost', 'catboost', 'lightgbm' or 'ensemble' model
         """
-        print("🚀 Starting exoplanet detection model training...")
+        if model_name == 'xgboost':
+            return self.build_xgboost(params, n_jobs=n_jobs)
+        if model_name == 'catboost':
+            return self.build_catboost(params, n_jobs=n_jobs)
+        if model_name == 'lightgbm':
+            return self.build_lightgbm(params, n_jobs=n_jobs)
+        return self.build_ensemble(n_features, params, n_jobs=n_jobs if n_jobs is not None else -1)
+    
+    def release_threads(self, model):
+        """
+        Restore the default threading of a model fitted under a CPU budget,
+        so the saved model does not serve with its training thread count
+        """
+        members = [model]
+        if isinstance(model, VotingClassifier):
+            model.set_params(n_jobs=-1)
+            members = [member for _, member in model.estimators] + list(model.estimators_)
+        for member in members:
+            library = type(member).__module__.split('.')[0]
+            if library == 'xgboost':
+                member.set_params(n_jobs=None)
+                if hasattr(member, '_Booster'):
+                    member.get_booster().set_param({'nthread': 0})  # 0: all cores
+            elif library == 'catboost':
+                continue  # Fitted CatBoost models are read-only; their predict methods use all cores anyway
+            elif 'n_jobs' in member.get_params(deep=False):
+                member.set_params(n_jobs=None)
+        return model
+    
+    def available_models(self, model_names):
+        """
+        Models whose library is installed; the others are skipped with a warning
+        """
+        missing = {'catboost': catboost, 'lightgbm': lightgbm}
+        unknown = [name for name in model_names if name not in BUNDLE_MODEL_NAMES]
+        if unknown:
+            raise ValueError(f"❌ Unknown models {unknown}, expected some of {list(BUNDLE_MODEL_NAMES)}")
+        skipped = [name for name in model_names if name in missing and missing[name] is None]
+        if skipped:
+            print(f"⚠️  Skipping {skipped}: library not installed")
+        return [name for name in model_names if name not in skipped]
+    
+    def search_settings(self):
+        """
+        Trainer settings that change search results, part of the trial store key
+        """
+        return {'svm_kernel': self.svm_kernel, 'svm_components': self.svm_components}
+    
+    def search_hyperparameters(self, model_names=('xgboost', 'ensemble'), n_trials=DEFAULT_TRIALS,
+                               cpus=None, eta=DEFAULT_ETA, store_path=DEFAULT_STORE, seed=42):
+        """
+        Successive-halving search on a validation split of the training rows;
+        the best parameters are kept in self.params for train_models
+        """
+        unknown = [name for name in model_names if name not in SEARCH_SPACES]
+        if unknown:
+            raise ValueError(f"❌ No search space for {unknown}, expected some of {list(SEARCH_SPACES)}")
+        
+        print("🚀 Starting hyperparameter search...")
         print("="*60)
         
-        # Load and preprocess data
         X, y, feature_names = self.load_and_preprocess_data()
+        X_train, X_test, y_train, y_test = self.split_and_scale(X, y)
         
-        # Split data
+        # The test rows stay untouched; trials are scored on 20% of the training rows
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, np.asarray(y_train), test_size=0.2, random_state=42, stratify=y_train
+        )
+        
+        store = TrialStore(store_path)
+        results = {}
+        try:
+            for model_name in model_names:
+                result = successive_halving(
+                    self, model_name, X_fit, y_fit, X_val, y_val, store,
+                    n_trials=n_trials, eta=eta, cpus=cpus, seed=seed
+                )
+                self.params[model_name] = result['best_params']
+                results[model_name] = result
+                print(f"   🏆 Best {model_name} accuracy {result['best_score']:.4f}: {result['best_params']}")
+        finally:
+            store.close()
+        return results
+    
+    def split_and_scale(self, X, y):
+        """
+        Stratified 80/20 split with features standardized on the training rows
+        """
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
@@ -171,118 +393,299 @@ class ExoplanetModelTrainer:
         print("\n⚖️ Scaling features...")
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
+        return X_train_scaled, X_test_scaled, y_train, y_test
+    
+    def compare_svm_kernels(self, kernels=SVM_KERNELS):
+        """
+        Fit the SVC member with each kernel and report training time,
+        inference time and accuracy side by side
+        """
+        print("🚀 Comparing SVM kernels...")
+        print("="*60)
         
-        # Train XGBoost
-        print("\n" + "="*40)
-        xgboost_model = self.train_xgboost(X_train_scaled, y_train)
-        
-        # Train Ensemble
-        print("\n" + "="*40)
-        ensemble_model = self.train_ensemble(X_train_scaled, y_train)
+        X, y, feature_names = self.load_and_preprocess_data()
+        X_train, X_test, y_train, y_test = self.split_and_scale(X, y)
+        
+        results = []
+        for kernel in kernels:
+            model = self.build_svm(X_train.shape[1], kernel)
+            started = time.perf_counter()
+            model.fit(X_train, y_train)
+            train_seconds = time.perf_counter() - started
+            
+            started = time.perf_counter()
+            y_pred = model.predict_proba(X_test).argmax(axis=1)
+            inference_seconds = time.perf_counter() - started
+            
+            results.append({
+                'kernel': kernel,
+                'train_seconds': train_seconds,
+                'inference_ms_per_1k_rows': inference_seconds * 1e6 / len(X_test),
+                'accuracy': accuracy_score(y_test, model.classes_[y_pred])
+            })
+        
+        print(f"\n🏁 SVM kernels ({X_train.shape[0]} training rows, {self.svm_components} components):")
+        print(f"   {'kernel':<10} {'train s':>9} {'ms/1k rows':>11} {'accuracy':>9}")
+        for result in results:
+            print(
+                f"   {result['kernel']:<10} {result['train_seconds']:>9.2f} "
+                f"{result['inference_ms_per_1k_rows']:>11.2f} {result['accuracy']:>9.4f}"
+            )
+        return results
+    
+    def cross_validate_models(self, model_names=DEFAULT_MODELS, n_folds=DEFAULT_FOLDS, cores=None,
+                              output_dir=DEFAULT_CV_DIR):
+        """
+        Stratified k-fold evaluation; folds are scaled once and shared by all
+        models, and out-of-fold probabilities are saved for later analysis
+        """
+        print(f"🚀 Starting {n_folds}-fold cross-validation...")
+        print("="*60)
         
-        # Evaluate models
-        print("\n📊 Model Evaluation Results:")
-        print("="*50)
+        model_names = self.available_models(model_names)
+        X, y, feature_names = self.load_and_preprocess_data()
+        directory = prepare_folds(
+            np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.int64),
+            os.path.join(output_dir, 'folds'), n_folds=n_folds
+        )
+        run_dir = os.path.join(output_dir, time.strftime('%Y%m%d-%H%M%S'))
+        summary = cross_validate(self, model_names, directory, run_dir, cores=cores)
+        print_cv_summary(summary)
+        print(f"\n💾 Out-of-fold probabilities saved to {run_dir}")
+        return summary
+    
+    def train_models(self, model_names=DEFAULT_MODELS, cores=None, model_threads=None):
+        """
+        Main training function for exoplanet detection; every model is fitted
+        and scored concurrently within a budget of `cores` threads
+        """
+        print("🚀 Starting exoplanet detection model training...")
+        print("="*60)
         
-        xgb_accuracy = self.evaluate_model(xgboost_model, X_test_scaled, y_test, "XGBoost")
-        ensemble_accuracy = self.evaluate_model(ensemble_model, X_test_scaled, y_test, "Ensemble")
+        cores = max(1, cores or os.cpu_count() or 1)
+        model_names = self.available_models(model_names)
+        self.stage_report = []
+        with measure_stage(self.stage_report, 'total', 'all', threads=cores):
+            # Load and preprocess data
+            with measure_stage(self.stage_report, 'data', 'load'):
+                X, y, feature_names = self.load_and_preprocess_data()
+            
+            with measure_stage(self.stage_report, 'data', 'scale'):
+                X_train_scaled, X_test_scaled, y_train, y_test = self.split_and_scale(X, y)
+            
+            # Fit and predict in parallel worker processes
+            print("\n" + "="*40)
+            with measure_stage(self.stage_report, 'all', 'train', threads=cores):
+                results = train_concurrently(
+                    self, model_names, X_train_scaled, np.asarray(y_train), X_test_scaled,
+                    cores=cores, model_threads=model_threads
+                )
+            for name in model_names:
+                self.stage_report.extend(results[name]['stages'])
+            
+            # Evaluate models
+            print("\n📊 Model Evaluation Results:")
+            print("="*50)
+            
+            with measure_stage(self.stage_report, 'all', 'evaluate'):
+                accuracies = {
+                    name: self.report_predictions(y_test, results[name]['y_pred'], MODEL_DISPLAY_NAMES[name])
+                    for name in model_names
+                }
         
         # Compare models
         print("\n🏆 Model Comparison:")
-        print(f"   XGBoost Accuracy: {xgb_accuracy:.4f}")
-        print(f"   Ensemble Accuracy: {ensemble_accuracy:.4f}")
+        for name, accuracy in accuracies.items():
+            print(f"   {MODEL_DISPLAY_NAMES[name]} Accuracy: {accuracy:.4f}")
+        best = max(accuracies, key=accuracies.get)
+        print(f"   ✅ {MODEL_DISPLAY_NAMES[best]} model performs better!")
         
-        if ensemble_accuracy > xgb_accuracy:
-            print("   ✅ Ensemble model performs better!")
-        else:
-            print("   ✅ XGBoost model performs better!")
+        print_stage_report(self.stage_report, cores)
         
         # Store models
-        self.models = {
-            'xgboost': xgboost_model,
-            'ensemble': ensemble_model
-        }
+        self.models = {name: results[name]['model'] for name in model_names}
         
         return self.models, self.scaler, feature_names
     
+    def train_models_out_of_core(self, chunk_size=DEFAULT_CHUNK_SIZE, cache_dir=None):
+        """
+        Train XGBoost on a dataset larger than memory by streaming it in chunks;
+        the ensemble members need all rows in memory and are skipped
+        """
+        print("🚀 Starting out-of-core exoplanet detection training...")
+        print("="*60)
+        
+        result = train_xgboost_out_of_core(self, self.data_path, chunk_size=chunk_size, cache_dir=cache_dir)
+        self.scaler = result['scaler']
+        self.medians = result['medians']
+        
+        cm = result['confusion_matrix']
+        print("\n📊 Model Evaluation Results:")
+        print("="*50)
+        print(f"   ✅ Accuracy: {np.trace(cm) / max(cm.sum(), 1):.4f}")
+        self.print_confusion_matrix(cm)
+        
+        self.models = {'xgboost': result['model']}
+        return self.models, self.scaler, result['feature_names']
+    
     def evaluate_model(self, model, X_test, y_test, model_name):
         """
         Comprehensive model evaluation
         """
+        return self.report_predictions(y_test, np.asarray(model.predict(X_test)).ravel(), model_name)
+    
+    def report_predictions(self, y_test, y_pred, model_name):
+        """
+        Accuracy, classification report and confusion matrix of test predictions
+        """
         print(f"\n🔍 Evaluating {model_name}...")
         
-        # Predictions
-        y_pred = model.predict(X_test)
-        y_proba = model.predict_proba(X_test)[:, 1] if hasattr(model, 'predict_proba') else None
-        
         # Calculate accuracy
         accuracy = accuracy_score(y_test, y_pred)
         
         # Detailed metrics
         print(f"   ✅ Accuracy: {accuracy:.4f}")
         print(f"   📊 Classification Report:")
-        print(classification_report(y_test, y_pred, target_names=['Non-Exoplanet', 'Exoplanet']))
+        print(classification_report(y_test, y_pred, labels=range(len(self.classes)), target_names=self.classes))
         
         # Confusion matrix
-        cm = confusion_matrix(y_test, y_pred)
-        print(f"   🎯 Confusion Matrix:")
-        print(f"        Predicted 0  Predicted 1")
-        print(f"Actual 0:    {cm[0,0]}         {cm[0,1]}")
-        print(f"Actual 1:    {cm[1,0]}         {cm[1,1]}")
+        cm = confusion_matrix(y_test, y_pred, labels=range(len(self.classes)))
+        self.print_confusion_matrix(cm)
         
         return accuracy
     
-    def save_models(self, models, scaler, feature_names):
+    def print_confusion_matrix(self, cm):
+        print(f"   🎯 Confusion Matrix:")
+        print("        " + "".join(f"  Predicted {code}" for code in range(len(cm))))
+        for code, row in enumerate(cm):
+            print(f"Actual {code}:" + "".join(f"{count:>13}" for count in row))
+    
+    def save_models(self, models, scaler, feature_names, bundle_dir=DEFAULT_BUNDLE_DIR, activate=True, force=False):
         """
-        Save trained models and preprocessing objects
+        Save trained models, scaler and manifest as one versioned bundle; it is
+        not activated if it lacks models of the active bundle unless `force`
         """
-        print("\n💾 Saving models and preprocessing objects...")
-        
-        # Create models directory if it doesn't exist
-        import os
-        os.makedirs('ml_models', exist_ok=True)
-        
-        # Save individual models
-        for name, model in models.items():
-            filename = f'ml_models/{name}_model.pkl'
-            joblib.dump(model, filename)
-            print(f"   ✅ Saved {name} model to {filename}")
+        print("\n💾 Saving model bundle...")
         
-        # Save scaler
-        joblib.dump(scaler, 'ml_models/scaler.pkl')
-        print("   ✅ Saved feature scaler")
-        
-        # Save feature names
-        joblib.dump(feature_names, 'ml_models/feature_names.pkl')
-        print("   ✅ Saved feature names")
-        
-        # Save training info
+        # Bundle models take raw features, so each one carries the scaler
+        pipelines = {
+            BUNDLE_MODEL_NAMES.get(name, name): Pipeline([('scaler', scaler), ('model', model)])
+            for name, model in models.items()
+        }
         training_info = {
-            'feature_names': feature_names,
+            'data_path': self.data_path,
+            'target': self.target,
+            'svm_kernel': self.svm_kernel,
+            'hyperparameters': self.params,
             'model_types': list(models.keys()),
+            'stage_report': self.stage_report,
             'timestamp': pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        joblib.dump(training_info, 'ml_models/training_info.pkl')
-        print("   ✅ Saved training information")
-        
-        print("\n🎉 All models and artifacts saved successfully!")
-        print("📁 Check the 'ml_models/' directory for saved files")
+        path = write_bundle(
+            bundle_dir, pipelines, scaler, feature_names, self.classes, training=training_info, activate=False,
+            medians=self.medians
+        )
+        for name in pipelines:
+            print(f"   ✅ Saved {name} pipeline")
+        print("   ✅ Saved feature scaler, feature order, class mapping and checksums in manifest.json")
+        if self.medians is not None:
+            print("   ✅ Saved training medians for missing values")
+        
+        if activate:
+            try:
+                set_current(bundle_dir, os.path.basename(path), force=force)
+            except BundleError as e:
+                print(f"   ⚠️ Not activated: {e}")
+                activate = False
+        
+        print(f"\n🎉 Bundle saved to {path}" + (" and activated" if activate else ""))
+        return path
 
 # Main execution
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the exoplanet detection models")
+    parser.add_argument('--data', default=os.path.join('data', 'merged_unified_dataset.csv'))
+    parser.add_argument('--svm', choices=SVM_KERNELS, default='exact',
+                        help="SVC member of the ensemble: exact RBF or a kernel approximation")
+    parser.add_argument('--svm-components', type=int, default=SVM_COMPONENTS,
+                        help="Dimensions of the approximate kernel feature space")
+    parser.add_argument('--compare-svm', action='store_true',
+                        help="Only compare the exact and approximate SVM kernels")
+    parser.add_argument('--search', default="",
+                        help=f"Comma-separated models to tune before training ({', '.join(SEARCH_SPACES)})")
+    parser.add_argument('--trials', type=int, default=DEFAULT_TRIALS, help="Candidate configurations per model")
+    parser.add_argument('--models', default=",".join(DEFAULT_MODELS),
+                        help=f"Comma-separated models to train ({', '.join(BUNDLE_MODEL_NAMES)})")
+    parser.add_argument('--cpus', type=int, default=None,
+                        help="Core budget for the search workers and the concurrent model fits (default: all CPUs)")
+    parser.add_argument('--model-threads', default="",
+                        help="Threads per model, e.g. ensemble=4,xgboost=2 (default: an even share of --cpus)")
+    parser.add_argument('--cv', type=int, default=0,
+                        help="Only run K-fold cross-validation of --models with this many folds")
+    parser.add_argument('--cv-dir', default=DEFAULT_CV_DIR,
+                        help="Where cached fold matrices and out-of-fold probabilities are written")
+    parser.add_argument('--stage-report', default=None,
+                        help="Also write the per-model stage timings to this JSON file")
+    parser.add_argument('--eta', type=int, default=DEFAULT_ETA, help="Successive halving reduction factor")
+    parser.add_argument('--search-store', default=DEFAULT_STORE,
+                        help="SQLite file of finished trials; rerunning resumes from it")
+    parser.add_argument('--dataset-cache', default=DEFAULT_CACHE_DIR,
+                        help="Directory of cleaned dataset caches (empty string disables it)")
+    parser.add_argument('--target', choices=list(TARGET_CLASSES), default='multiclass',
+                        help="Disposition classes to predict")
+    parser.add_argument('--bundle-dir', default=DEFAULT_BUNDLE_DIR, help="Where model bundles are written")
+    parser.add_argument('--no-activate', action='store_true',
+                        help="Write the bundle without making it the one servers load")
+    parser.add_argument('--force-activate', action='store_true',
+                        help="Activate the bundle even if it drops models the active bundle serves")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="Stream the dataset in chunks and train XGBoost with external memory")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk with --out-of-core")
+    args = parser.parse_args()
+    
     print("🌌 Exoplanet Detection Model Trainer")
     print("="*50)
     
     # Initialize trainer with your dataset path
-    dataset_path = 'data\\merged_unified_dataset.csv'  # Update this path if needed
-    trainer = ExoplanetModelTrainer(dataset_path)
+    trainer = ExoplanetModelTrainer(
+        args.data, svm_kernel=args.svm, svm_components=args.svm_components,
+        dataset_cache_dir=args.dataset_cache or None, target=args.target
+    )
+    
+    if args.compare_svm:
+        trainer.compare_svm_kernels()
+        raise SystemExit(0)
     
     try:
+        search_models = [name.strip() for name in args.search.split(",") if name.strip()]
+        if search_models:
+            trainer.search_hyperparameters(
+                search_models, n_trials=args.trials, cpus=args.cpus, eta=args.eta, store_path=args.search_store
+            )
+        
+        # Tuned parameters carry over to the cross-validation
+        if args.cv:
+            trainer.cross_validate_models(
+                [name.strip() for name in args.models.split(",") if name.strip()],
+                n_folds=args.cv, cores=args.cpus, output_dir=args.cv_dir
+            )
+            raise SystemExit(0)
+        
         # Train models
-        models, scaler, feature_names = trainer.train_models()
+        if args.out_of_core:
+            models, scaler, feature_names = trainer.train_models_out_of_core(chunk_size=args.chunk_size)
+        else:
+            models, scaler, feature_names = trainer.train_models(
+                [name.strip() for name in args.models.split(",") if name.strip()],
+                cores=args.cpus, model_threads=parse_model_threads(args.model_threads)
+            )
+            if args.stage_report:
+                with open(args.stage_report, "w") as f:
+                    json.dump(trainer.stage_report, f, indent=2)
         
         # Save everything
-        trainer.save_models(models, scaler, feature_names)
+        trainer.save_models(models, scaler, feature_names, bundle_dir=args.bundle_dir, activate=not args.no_activate,
+                            force=args.force_activate)
         
         print("\n" + "="*60)
         print("🚀 EXOPLANET DETECTION MODEL TRAINING COMPLETED!")
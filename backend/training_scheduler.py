@@ -0,0 +1,140 @@
+import contextlib
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from profiling import RSSSampler
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # BLAS/OpenMP pools then follow their own defaults
+    threadpool_limits = None
+
+# Longest-running model first: it is submitted first and gets any leftover cores
+DEFAULT_MODELS = ('ensemble', 'xgboost', 'catboost', 'lightgbm')
+
+def parse_model_threads(spec: str) -> Dict[str, int]:
+    """Parse a "model=threads,model=threads" thread count specification"""
+    threads = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, _, count = entry.partition("=")
+        threads[name.strip().lower()] = int(count)
+    return threads
+
+def allocate_threads(model_names: Sequence[str], cores: int, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Threads per model: explicit overrides, then an even share of the remaining cores
+
+    With fewer cores than models every model gets one thread and the
+    scheduler runs them in waves that fit the budget.
+    """
+    overrides = overrides or {}
+    threads = {name: min(max(1, overrides[name]), cores) for name in model_names if name in overrides}
+    shared = [name for name in model_names if name not in threads]
+    if shared:
+        free = max(cores - sum(threads.values()), len(shared))
+        share, extra = divmod(free, len(shared))
+        for position, name in enumerate(shared):
+            threads[name] = min(share + (position < extra), cores)
+    return {name: threads[name] for name in model_names}
+
+# ===== STAGE ACCOUNTING =====
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+@contextlib.contextmanager
+def measure_stage(report: List[Dict], model: str, stage: str, **extra):
+    """Append the wall time, CPU time and peak RSS of a block to `report`
+
+    CPU time covers every thread of this process plus the child processes
+    reaped during the block; peak RSS is this process only.
+    """
+    cpu_started = time.process_time() + children_cpu_seconds()
+    started = time.perf_counter()
+    with RSSSampler() as rss:
+        yield
+    report.append({
+        "model": model,
+        "stage": stage,
+        "wall_seconds": time.perf_counter() - started,
+        "cpu_seconds": time.process_time() + children_cpu_seconds() - cpu_started,
+        "peak_rss_mb": rss.peak / 1e6,
+        **extra
+    })
+
+# ===== WORKERS =====
+def _fit_and_predict(trainer, model_name: str, threads: int, X_train: np.ndarray, y_train: np.ndarray,
+                     X_test: np.ndarray) -> Dict:
+    """Fit one model with `threads` threads and predict the test rows, timing both stages"""
+    limits = threadpool_limits(threads) if threadpool_limits is not None else contextlib.nullcontext()
+    stages = []
+    with limits:
+        model = trainer.build_model(model_name, X_train.shape[1], trainer.params.get(model_name), n_jobs=threads)
+        with measure_stage(stages, model_name, 'fit', threads=threads):
+            model.fit(X_train, y_train)
+        with measure_stage(stages, model_name, 'predict', threads=threads):
+            y_pred = np.asarray(model.predict(X_test)).ravel()
+    return {"model": trainer.release_threads(model), "y_pred": y_pred, "stages": stages}
+
+# ===== SCHEDULER =====
+def train_concurrently(trainer, model_names: Sequence[str], X_train: np.ndarray, y_train: np.ndarray,
+                       X_test: np.ndarray, cores: Optional[int] = None,
+                       model_threads: Optional[Dict[str, int]] = None) -> Dict[str, Dict]:
+    """Fit and score `model_names` in parallel processes without exceeding `cores` threads
+
+    Each model runs in a fresh spawned process, so its peak RSS is its own
+    and no OpenMP runtime is inherited from the parent. A model starts as soon
+    as enough of the budget is free for its thread count.
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    threads = allocate_threads(model_names, cores, model_threads)
+    print(f"\n🧵 Scheduling {len(threads)} models on {cores} cores: "
+          + ", ".join(f"{name}={count}" for name, count in threads.items()))
+
+    context = multiprocessing.get_context('spawn')
+    pending, running, results = list(threads), {}, {}
+    free = cores
+    try:
+        while pending or running:
+            for name in list(pending):
+                if threads[name] <= free:
+                    pool = ProcessPoolExecutor(max_workers=1, mp_context=context)
+                    future = pool.submit(_fit_and_predict, trainer, name, threads[name], X_train, y_train, X_test)
+                    running[future] = (name, pool)
+                    pending.remove(name)
+                    free -= threads[name]
+                    print(f"   ▶️ {name} started with {threads[name]} threads")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, pool = running.pop(future)
+                pool.shutdown()
+                free += threads[name]
+                results[name] = future.result()
+                fit = results[name]['stages'][0]
+                print(f"   ✅ {name} fitted in {fit['wall_seconds']:.1f}s ({fit['cpu_seconds']:.1f}s CPU)")
+    finally:
+        for future, (_, pool) in running.items():
+            future.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+    return {name: results[name] for name in model_names}
+
+def print_stage_report(report: List[Dict], cores: int):
+    """Table of every stage plus the share of the core budget the run kept busy"""
+    print(f"\n⏱️ Training stages ({cores} cores):")
+    print(f"   {'model':<10} {'stage':<10} {'threads':>7} {'wall s':>8} {'CPU s':>8} {'peak MB':>9}")
+    for row in report:
+        print(
+            f"   {row['model']:<10} {row['stage']:<10} {row.get('threads', ''):>7} "
+            f"{row['wall_seconds']:>8.2f} {row['cpu_seconds']:>8.2f} {row['peak_rss_mb']:>9.1f}"
+        )
+    total = [row for row in report if row['model'] == 'total']
+    if total:
+        wall, cpu = total[0]['wall_seconds'], total[0]['cpu_seconds']
+        print(f"   CPU use: {cpu / max(wall * cores, 1e-9):.0%} of {cores} cores over {wall:.1f}s")
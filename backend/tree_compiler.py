@@ -0,0 +1,463 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPILED_DIR = 'ml_models/compiled'
+COMPILED_FORMAT_VERSION = 1
+DEFAULT_TOLERANCE = 1e-5
+EVAL_BLOCK_ROWS = 4096
+
+# Missing value handling per split node
+MISSING_NAN = 0    # NaN follows the default direction (XGBoost, LightGBM "NaN")
+MISSING_NONE = 1   # NaN is treated as 0.0 (LightGBM "None")
+MISSING_ZERO = 2   # Zero and NaN follow the default direction (LightGBM "Zero")
+LIGHTGBM_ZERO_THRESHOLD = 1e-35
+
+ARRAY_NAMES = (
+    'feature', 'threshold', 'left', 'right', 'default_left', 'missing_type',
+    'value', 'roots', 'tree_class', 'intercept', 'scaler_mean', 'scaler_scale',
+    'classes', 'feature_importances'
+)
+
+# ===== COMPILED MODEL =====
+class CompiledTreeModel:
+    """Gradient-boosted tree ensemble flattened into contiguous NumPy arrays
+
+    All trees share one set of node arrays (feature index, threshold, children,
+    default direction, leaf value). Leaves point to themselves, so evaluation
+    is at most `max_depth` rounds of vectorized gathers over the (row, tree)
+    paths that have not reached a leaf yet, followed by a per-class sum and
+    the link function. A leading StandardScaler from the original pipeline is
+    applied with NumPy.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.arrays = arrays
+        self.meta = meta
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays.get(name))
+        self.classes_ = self.classes
+        self.feature_importances_ = self.feature_importances
+        self.n_classes = int(meta['n_classes'])
+        self.max_depth = int(meta['max_depth'])
+        self.strict_less = meta['comparison'] == '<'
+        self.compare_dtype = np.dtype(meta['compare_dtype'])
+        # Trees -> classes as a one-hot matrix so the per-class sum is one matmul
+        n_outputs = 1 if self.n_classes == 2 else self.n_classes
+        self.class_onehot = np.zeros((len(self.roots), n_outputs))
+        self.class_onehot[np.arange(len(self.roots)), self.tree_class] = 1.0
+        self.is_split = self.left != np.arange(len(self.left))
+        self.has_zero_missing = bool(np.any(self.missing_type[self.is_split] == MISSING_ZERO))
+
+    def _transform(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if self.scaler_mean is not None:
+            X = (X - self.scaler_mean) / self.scaler_scale
+        return X.astype(self.compare_dtype, copy=False)
+
+    def leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Leaf value reached in every tree for every (already transformed) row"""
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        node = np.tile(self.roots, n_rows)
+        row = np.repeat(np.arange(n_rows), n_trees)
+        active = np.arange(node.size)
+        # Missing-value routing only matters for NaN inputs or LightGBM "Zero" splits
+        handle_missing = self.has_zero_missing or bool(np.isnan(X).any())
+
+        for _ in range(self.max_depth):
+            current = node[active]
+            is_split = self.is_split[current]
+            if not is_split.all():  # Drop (row, tree) paths that reached a leaf
+                active, current = active[is_split], current[is_split]
+                if active.size == 0:
+                    break
+
+            x = X[row[active], self.feature[current]]
+            threshold = self.threshold[current]
+            if handle_missing:
+                missing_type = self.missing_type[current]
+                is_nan = np.isnan(x)
+                x = np.where(is_nan & (missing_type == MISSING_NONE), 0, x)
+                is_missing = np.where(
+                    missing_type == MISSING_ZERO,
+                    is_nan | (np.abs(x) <= LIGHTGBM_ZERO_THRESHOLD),
+                    is_nan & (missing_type == MISSING_NAN)
+                )
+            go_left = (x < threshold) if self.strict_less else (x <= threshold)
+            if handle_missing:
+                go_left = np.where(is_missing, self.default_left[current], go_left)
+            node[active] = np.where(go_left, self.left[current], self.right[current])
+
+        return self.value[node].reshape(n_rows, n_trees)
+
+    def decision_function(self, X) -> np.ndarray:
+        """Raw margins per output, in blocks to bound the (rows x trees) working set"""
+        X = self._transform(X)
+        margins = np.empty((X.shape[0], self.class_onehot.shape[1]))
+        for start in range(0, X.shape[0], EVAL_BLOCK_ROWS):
+            block = X[start:start + EVAL_BLOCK_ROWS]
+            margins[start:start + len(block)] = self.leaf_values(block) @ self.class_onehot
+        return margins + self.intercept
+
+    def predict_proba(self, X) -> np.ndarray:
+        margins = self.decision_function(X)
+        if self.n_classes == 2:
+            positive = 1.0 / (1.0 + np.exp(-margins[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        margins -= margins.max(axis=1, keepdims=True)
+        np.exp(margins, out=margins)
+        margins /= margins.sum(axis=1, keepdims=True)
+        return margins
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    # ----- Persistence -----
+    def save(self, directory: str):
+        """Write one .npy per array plus meta.json so arrays can be memory-mapped"""
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays.items():
+            if array is not None:
+                np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'CompiledTreeModel':
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format_version') != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format in {directory}")
+        arrays = {}
+        for name in ARRAY_NAMES:
+            path = os.path.join(directory, f"{name}.npy")
+            arrays[name] = np.load(path, mmap_mode='r' if mmap else None) if os.path.exists(path) else None
+        return cls(arrays, meta)
+
+class RoutedTreeModel:
+    """Original pipeline plus its compiled form, routed by batch size
+
+    The compiled evaluator has almost no per-call overhead, so it wins on the
+    small batches of /api/predict/object; the libraries' multithreaded
+    predictors win on large uploads. Batches of up to `max_rows` rows use the
+    compiled arrays, everything else (and every other attribute) goes to the
+    original pipeline.
+    """
+
+    def __init__(self, pipeline, compiled: CompiledTreeModel, max_rows: int):
+        self.pipeline = pipeline
+        self.compiled = compiled
+        self.max_rows = max_rows
+
+    def predict_proba(self, X) -> np.ndarray:
+        if len(X) <= self.max_rows:
+            return self.compiled.predict_proba(X)
+        return self.pipeline.predict_proba(X)
+
+    def predict(self, X) -> np.ndarray:
+        if len(X) <= self.max_rows:
+            return self.compiled.predict(X)
+        return self.pipeline.predict(X)
+
+    def __getattr__(self, name):
+        if name == 'pipeline':  # Not set yet while unpickling
+            raise AttributeError(name)
+        return getattr(self.pipeline, name)
+
+# ===== TREE FLATTENING =====
+class _NodeBuffer:
+    """Accumulates nodes of successive trees into flat arrays"""
+
+    def __init__(self):
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.default_left: List[bool] = []
+        self.missing_type: List[int] = []
+        self.value: List[float] = []
+        self.roots: List[int] = []
+        self.tree_class: List[int] = []
+        self.max_depth = 0
+
+    def add_node(self, feature=0, threshold=0.0, default_left=False, missing_type=MISSING_NAN, value=0.0) -> int:
+        index = len(self.feature)
+        self.feature.append(feature)
+        self.threshold.append(threshold)
+        self.left.append(index)  # Leaves point to themselves
+        self.right.append(index)
+        self.default_left.append(default_left)
+        self.missing_type.append(missing_type)
+        self.value.append(value)
+        return index
+
+    def arrays(self, compare_dtype) -> Dict[str, np.ndarray]:
+        return {
+            'feature': np.asarray(self.feature, dtype=np.int32),
+            'threshold': np.asarray(self.threshold, dtype=compare_dtype),
+            'left': np.asarray(self.left, dtype=np.int32),
+            'right': np.asarray(self.right, dtype=np.int32),
+            'default_left': np.asarray(self.default_left, dtype=bool),
+            'missing_type': np.asarray(self.missing_type, dtype=np.int8),
+            'value': np.asarray(self.value, dtype=np.float64),
+            'roots': np.asarray(self.roots, dtype=np.int32),
+            'tree_class': np.asarray(self.tree_class, dtype=np.int32)
+        }
+
+def _flatten_xgboost(estimator, buffer: _NodeBuffer) -> Dict:
+    booster = estimator.get_booster()
+    model = json.loads(booster.save_raw('json'))
+    gradient_booster = model['learner']['gradient_booster']
+    if gradient_booster['name'] != 'gbtree':
+        raise ValueError(f"Unsupported XGBoost booster '{gradient_booster['name']}'")
+
+    objective = model['learner']['objective']['name']
+    if objective not in ('multi:softprob', 'multi:softmax', 'binary:logistic'):
+        raise ValueError(f"Unsupported XGBoost objective '{objective}'")
+
+    trees = gradient_booster['model']['trees']
+    tree_info = gradient_booster['model']['tree_info']
+    for tree, tree_class in zip(trees, tree_info):
+        if any(split_type != 0 for split_type in tree.get('split_type', [])):
+            raise ValueError("Categorical XGBoost splits are not supported")
+        left, right = tree['left_children'], tree['right_children']
+        offset = len(buffer.feature)
+
+        for node in range(len(left)):
+            if left[node] == -1:
+                buffer.add_node(value=tree['split_conditions'][node])
+            else:
+                buffer.add_node(
+                    feature=tree['split_indices'][node],
+                    threshold=tree['split_conditions'][node],
+                    default_left=bool(tree['default_left'][node])
+                )
+        for node in range(len(left)):
+            if left[node] != -1:
+                buffer.left[offset + node] = offset + left[node]
+                buffer.right[offset + node] = offset + right[node]
+
+        buffer.roots.append(offset)
+        buffer.tree_class.append(tree_class)
+        buffer.max_depth = max(buffer.max_depth, _tree_depth(left, right))
+
+    # XGBoost compares float32 features against float32 split values: x < split
+    return {'comparison': '<', 'compare_dtype': 'float32', 'library': 'xgboost', 'objective': objective}
+
+def _flatten_lightgbm(estimator, buffer: _NodeBuffer) -> Dict:
+    model = estimator.booster_.dump_model()
+    objective = model['objective'].split()[0]
+    if objective not in ('multiclass', 'binary'):
+        raise ValueError(f"Unsupported LightGBM objective '{objective}'")
+    if objective == 'binary' and 'sigmoid:1' not in model['objective']:
+        raise ValueError("Only LightGBM binary models with sigmoid:1 are supported")
+
+    missing_types = {'NaN': MISSING_NAN, 'None': MISSING_NONE, 'Zero': MISSING_ZERO}
+    per_iteration = model['num_tree_per_iteration']
+
+    def add_subtree(node: Dict) -> int:
+        if 'leaf_value' in node or 'split_feature' not in node:
+            return buffer.add_node(value=node.get('leaf_value', 0.0))
+        if node['decision_type'] != '<=':
+            raise ValueError("Categorical LightGBM splits are not supported")
+        index = buffer.add_node(
+            feature=node['split_feature'],
+            threshold=node['threshold'],
+            default_left=bool(node['default_left']),
+            missing_type=missing_types[node['missing_type']]
+        )
+        buffer.left[index] = add_subtree(node['left_child'])
+        buffer.right[index] = add_subtree(node['right_child'])
+        return index
+
+    for position, tree in enumerate(model['tree_info']):
+        buffer.roots.append(add_subtree(tree['tree_structure']))
+        buffer.tree_class.append(position % per_iteration)
+        buffer.max_depth = max(buffer.max_depth, _nested_depth(tree['tree_structure']))
+
+    # LightGBM compares double features against double thresholds: x <= threshold
+    return {'comparison': '<=', 'compare_dtype': 'float64', 'library': 'lightgbm', 'objective': objective}
+
+def _tree_depth(left: List[int], right: List[int]) -> int:
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [child for node in frontier if left[node] != -1 for child in (left[node], right[node])]
+        if not frontier:
+            return depth
+        depth += 1
+
+def _nested_depth(node: Dict) -> int:
+    if 'left_child' not in node:
+        return 0
+    return 1 + max(_nested_depth(node['left_child']), _nested_depth(node['right_child']))
+
+def _split_pipeline(pipeline):
+    """Return (preprocessing steps, final estimator) of a pipeline or bare estimator"""
+    steps = getattr(pipeline, 'steps', None)
+    if steps is None:
+        return [], pipeline
+    return [step for _, step in steps[:-1]], steps[-1][1]
+
+def compile_pipeline(pipeline, X_reference: np.ndarray) -> CompiledTreeModel:
+    """Flatten an XGBoost or LightGBM (pipeline) classifier into a CompiledTreeModel
+
+    `X_reference` is a sample of untransformed feature rows; it is used to
+    recover the model's base margin (intercept) from the library itself, which
+    keeps the result independent of how each library version stores it.
+    """
+    preprocessing, estimator = _split_pipeline(pipeline)
+    scaler_mean = scaler_scale = None
+    for step in preprocessing:
+        if type(step).__name__ != 'StandardScaler':
+            raise ValueError(f"Unsupported preprocessing step {type(step).__name__}")
+        if scaler_mean is not None:
+            raise ValueError("Only a single StandardScaler step is supported")
+        n_features = len(step.scale_) if step.scale_ is not None else len(step.mean_)
+        scaler_mean = step.mean_ if step.with_mean else np.zeros(n_features)
+        scaler_scale = step.scale_ if step.with_std else np.ones(n_features)
+
+    buffer = _NodeBuffer()
+    library = type(estimator).__module__.split('.')[0]
+    if library == 'xgboost':
+        meta = _flatten_xgboost(estimator, buffer)
+    elif library == 'lightgbm':
+        meta = _flatten_lightgbm(estimator, buffer)
+    else:
+        raise ValueError(f"Cannot compile {type(estimator).__name__}; only XGBoost and LightGBM are supported")
+
+    classes = np.asarray(estimator.classes_)
+    arrays = buffer.arrays(np.dtype(meta['compare_dtype']))
+    arrays.update(
+        intercept=np.zeros(1 if len(classes) == 2 else len(classes)),
+        scaler_mean=None if scaler_mean is None else np.asarray(scaler_mean, dtype=np.float64),
+        scaler_scale=None if scaler_scale is None else np.asarray(scaler_scale, dtype=np.float64),
+        classes=classes,
+        feature_importances=np.asarray(estimator.feature_importances_, dtype=np.float64)
+    )
+    meta.update(
+        format_version=COMPILED_FORMAT_VERSION,
+        n_classes=len(classes),
+        n_trees=len(buffer.roots),
+        n_nodes=len(buffer.feature),
+        max_depth=buffer.max_depth
+    )
+    compiled = CompiledTreeModel(arrays, meta)
+
+    # Base margin = library raw score minus the sum of leaves we reach
+    transformed = pipeline[:-1].transform(X_reference) if preprocessing else X_reference
+    if meta['library'] == 'xgboost':
+        raw = estimator.predict(transformed, output_margin=True)
+    else:
+        raw = estimator.predict(transformed, raw_score=True)
+    raw = np.asarray(raw, dtype=np.float64).reshape(len(X_reference), -1)
+    leaf_sum = compiled.decision_function(X_reference) - compiled.intercept
+    compiled.intercept[:] = np.median(raw - leaf_sum, axis=0)
+    return compiled
+
+def verify_parity(pipeline, compiled: CompiledTreeModel, X: np.ndarray, tolerance: float = DEFAULT_TOLERANCE) -> Dict:
+    """Compare probabilities of the compiled model against the original"""
+    expected = pipeline.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    max_abs_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    return {
+        "rows": len(X),
+        "max_abs_diff": max_abs_diff,
+        "tolerance": tolerance,
+        "label_agreement": float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1))) if len(X) else 1.0,
+        "passed": max_abs_diff <= tolerance
+    }
+
+def compiled_model_dir(pipeline_path: str, compiled_dir: str = COMPILED_DIR) -> str:
+    """Directory holding the compiled arrays for a pipeline artifact"""
+    name = os.path.splitext(os.path.basename(pipeline_path))[0]
+    return os.path.join(compiled_dir, name)
+
+def load_compiled_for(pipeline_path: str, checksum: str, compiled_dir: str = COMPILED_DIR) -> Optional[CompiledTreeModel]:
+    """Load the compiled model for an artifact if it exists and was built from this exact file"""
+    directory = compiled_model_dir(pipeline_path, compiled_dir)
+    if not os.path.exists(os.path.join(directory, 'meta.json')):
+        return None
+    compiled = CompiledTreeModel.load(directory)
+    if compiled.meta.get('source_checksum') != checksum:
+        logger.info(f"ℹ️ Compiled model in {directory} is stale; using the library predictor")
+        return None
+    return compiled
+
+# ===== OFFLINE COMPILE STEP =====
+def _reference_features(data_path: str, rows: int) -> np.ndarray:
+    """Engineered feature rows from the training data, plus copies with missing values"""
+    import pandas as pd
+    from app import load_ml_models, preprocess_data
+
+    load_ml_models()
+    df = pd.read_csv(data_path, nrows=rows)
+    X = np.asarray(preprocess_data(df), dtype=np.float64)
+
+    # Exercise the missing-value paths as well
+    rng = np.random.default_rng(42)
+    with_missing = X.copy()
+    with_missing[rng.random(X.shape) < 0.1] = np.nan
+    return np.vstack([X, with_missing])
+
+def main(argv=None):
+    import app
+    from model_registry import file_checksum, load_pipeline
+
+    parser = argparse.ArgumentParser(description="Compile tree-ensemble pipelines into NumPy arrays")
+    parser.add_argument('models', nargs='*', default=['xgboost', 'lightgbm'], help="Models to compile")
+    parser.add_argument('--data', default='data/merged_unified_dataset.csv', help="Reference data for parity checks")
+    parser.add_argument('--rows', type=int, default=5000, help="Reference rows to read")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Max allowed probability difference")
+    parser.add_argument('--output', default=COMPILED_DIR, help="Output directory")
+    args = parser.parse_args(argv)
+
+    print("🌲 Compiling tree ensembles")
+    print("="*50)
+    X = _reference_features(args.data, args.rows)
+    failures = 0
+
+    # Compile what the server loads: the active bundle's files, fed their own columns
+    if app.active_bundle is not None:
+        X = X[:, [app.feature_names.index(feature) for feature in app.active_bundle['feature_names']]]
+    for name in args.models:
+        pipeline_path = app.registry.model_files[name]
+        pipeline = load_pipeline(pipeline_path)
+        compiled = compile_pipeline(pipeline, X)
+        compiled.meta['source_checksum'] = file_checksum(pipeline_path)
+        compiled.meta['source_path'] = pipeline_path
+
+        parity = verify_parity(pipeline, compiled, X, args.tolerance)
+        compiled.meta['parity'] = parity
+
+        started = time.perf_counter()
+        pipeline.predict_proba(X)
+        library_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        compiled.predict_proba(X)
+        compiled_seconds = time.perf_counter() - started
+
+        print(f"\n🔍 {name}: {compiled.meta['n_trees']} trees, {compiled.meta['n_nodes']} nodes, depth {compiled.meta['max_depth']}")
+        print(f"   Max |Δp|: {parity['max_abs_diff']:.2e} (tolerance {args.tolerance:.0e}), label agreement {parity['label_agreement']:.4f}")
+        print(f"   Batch of {len(X)} rows: library {library_seconds*1000:.1f} ms, compiled {compiled_seconds*1000:.1f} ms")
+
+        if not parity['passed']:
+            print(f"   ❌ Parity check failed; {name} not written")
+            failures += 1
+            continue
+
+        directory = compiled_model_dir(pipeline_path, args.output)
+        compiled.save(directory)
+        print(f"   ✅ Saved to {directory}")
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())